@@ -0,0 +1,81 @@
+"""Benchmark planning a whole session against picking exercises one at a time.
+
+Run with `python benchmarks/plan_session.py`.
+"""
+
+import random
+import timeit
+
+import numpy as np
+
+from rhythm_trainer.exercises import RecentWindow, pick_random_exercise, plan_session
+from rhythm_trainer.sampler import WeightedSampler
+
+CATALOG_SIZE = 100_000
+SESSION_LENGTH = 50
+WINDOW = 10
+REPEAT = 5
+NUMBER = 20
+
+
+def single_picks_with_choices(exercises: list[int], weights: list[int]) -> list[int]:
+    """Pick the session one exercise at a time with `random.choices`."""
+    recent = RecentWindow(WINDOW)
+    plan = []
+    while len(plan) < SESSION_LENGTH:
+        (exercise,) = random.choices(exercises, weights)
+        if exercise not in recent:
+            recent.push(exercise)
+            plan.append(exercise)
+    return plan
+
+
+def single_picks_with_sampler(sampler: WeightedSampler) -> list[int]:
+    """Pick the session one exercise at a time with the Fenwick tree sampler."""
+    recent = RecentWindow(WINDOW)
+    return [pick_random_exercise(sampler, recent) for _ in range(SESSION_LENGTH)]
+
+
+def main() -> None:
+    exercises = list(range(1, CATALOG_SIZE + 1))
+    weights = [random.randint(1, 10) for _ in exercises]
+    sampler = WeightedSampler(exercises, weights)
+    exercise_array = np.asarray(exercises)
+    weight_array = np.asarray(weights)
+    rng = np.random.default_rng()
+
+    candidates = {
+        "random.choices, one pick at a time": lambda: single_picks_with_choices(
+            exercises,
+            weights,
+        ),
+        "WeightedSampler, one pick at a time": lambda: single_picks_with_sampler(
+            sampler,
+        ),
+        "plan_session": lambda: plan_session(
+            exercises,
+            weights,
+            SESSION_LENGTH,
+            WINDOW,
+            rng,
+        ),
+        "plan_session, NumPy arrays": lambda: plan_session(
+            exercise_array,
+            weight_array,
+            SESSION_LENGTH,
+            WINDOW,
+            rng,
+        ),
+    }
+
+    print(
+        f"Session of {SESSION_LENGTH} exercises out of {CATALOG_SIZE}, "
+        f"best of {REPEAT} x {NUMBER} runs:",
+    )
+    for name, candidate in candidates.items():
+        best = min(timeit.repeat(candidate, repeat=REPEAT, number=NUMBER)) / NUMBER
+        print(f"  {name:<40} {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
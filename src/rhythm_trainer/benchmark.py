@@ -0,0 +1,171 @@
+"""Benchmark the registered sampling strategies on synthetic feedback streams.
+
+Run with `python -m rhythm_trainer.benchmark --help` to see the options.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from rhythm_trainer.config import Config, SamplerEngine
+from rhythm_trainer.rng import spawn_rngs
+from rhythm_trainer.strategies import STRATEGIES, Feedback, create_strategy
+
+DEFAULT_SIZES = (90, 1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_STEPS = 1_000
+DEFAULT_BAD_RATE = 0.3
+MEMORY_STEPS = 100  # Steps run while tracing memory, which slows everything down
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Measurements of a strategy on a catalog of a given size."""
+
+    strategy: str
+    catalog_size: int
+    steps: int
+    draws_per_second: float
+    update_p50_us: float
+    update_p95_us: float
+    update_p99_us: float
+    peak_memory_mb: float
+
+
+def synthetic_feedback(rng: random.Random, bad_rate: float) -> Iterator[Feedback]:
+    """Yield an endless stream of feedback, bad with probability `bad_rate`."""
+    while True:
+        yield Feedback.BAD if rng.random() < bad_rate else Feedback.GOOD
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Return the value below which the given fraction of the values fall."""
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_benchmark(
+    strategy_name: str,
+    catalog_size: int,
+    config: Config,
+    steps: int = DEFAULT_STEPS,
+    bad_rate: float = DEFAULT_BAD_RATE,
+    seed: int = 0,
+) -> BenchmarkResult:
+    """Run a strategy through `steps` rounds of drawing an exercise and updating it.
+
+    The feedback and the draws come from independent random streams derived from `seed`.
+    Draws and updates are timed separately. The peak memory is measured in a second run,
+    traced with `tracemalloc`, covering the creation of the strategy and a few steps.
+    """
+    exercises = range(1, catalog_size + 1)
+    weights = [1] * catalog_size
+
+    feedback_rng, draw_rng, memory_rng = spawn_rngs(seed, 3)
+    strategy = create_strategy(strategy_name, exercises, weights, config, draw_rng)
+    feedback = synthetic_feedback(feedback_rng, bad_rate)
+    draw_time = 0.0
+    update_times: list[float] = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        exercise = strategy.draw()
+        middle = time.perf_counter()
+        strategy.update(exercise, next(feedback))
+        end = time.perf_counter()
+        draw_time += middle - start
+        update_times.append(end - middle)
+
+    tracemalloc.start()
+    try:
+        strategy = create_strategy(
+            strategy_name, exercises, weights, config, memory_rng
+        )
+        for _ in range(min(steps, MEMORY_STEPS)):
+            strategy.update(strategy.draw(), next(feedback))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    update_times.sort()
+    return BenchmarkResult(
+        strategy=strategy_name,
+        catalog_size=catalog_size,
+        steps=steps,
+        draws_per_second=steps / draw_time if draw_time > 0 else float("inf"),
+        update_p50_us=statistics.median(update_times) * 1e6,
+        update_p95_us=_percentile(update_times, 0.95) * 1e6,
+        update_p99_us=_percentile(update_times, 0.99) * 1e6,
+        peak_memory_mb=peak / 2**20,
+    )
+
+
+def format_results(results: Sequence[BenchmarkResult]) -> str:
+    """Format the results as a table."""
+    header = (
+        f"{'strategy':<12} {'size':>9} {'draws/s':>12} "
+        f"{'upd p50 us':>11} {'upd p95 us':>11} {'upd p99 us':>11} {'peak MB':>9}"
+    )
+    rows = [
+        f"{r.strategy:<12} {r.catalog_size:>9} {r.draws_per_second:>12.0f} "
+        f"{r.update_p50_us:>11.2f} {r.update_p95_us:>11.2f} "
+        f"{r.update_p99_us:>11.2f} {r.peak_memory_mb:>9.2f}"
+        for r in results
+    ]
+    return "\n".join([header, *rows])
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        choices=sorted(STRATEGIES),
+        help="strategy to benchmark, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        type=int,
+        help=f"catalog size, can be repeated (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--sampler-engine",
+        choices=[engine.value for engine in SamplerEngine],
+        default=SamplerEngine.FENWICK.value,
+    )
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS)
+    parser.add_argument("--bad-rate", type=float, default=DEFAULT_BAD_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args(argv)
+
+    config = Config(
+        csv_path=Path(),
+        sampler_engine=SamplerEngine(args.sampler_engine),
+    )
+    results = []
+    for strategy_name in args.strategy or sorted(STRATEGIES):
+        for catalog_size in args.size or DEFAULT_SIZES:
+            result = run_benchmark(
+                strategy_name,
+                catalog_size,
+                config,
+                args.steps,
+                args.bad_rate,
+                args.seed,
+            )
+            if args.json:
+                print(json.dumps(asdict(result)))
+            results.append(result)
+
+    if not args.json:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
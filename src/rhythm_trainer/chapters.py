@@ -0,0 +1,152 @@
+"""Chapters of the book, mapping ranges of exercises to backing track folders."""
+
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from itertools import pairwise
+from typing import Any
+
+from rhythm_trainer.logger import get_logger
+
+DEFAULT_CHAPTER_NAMES = [
+    "Acoustic",
+    "Classic Blues",
+    "Classic Rock",
+    "Funk",
+    "Fusion",
+    "Hard Rock & Heavy Metal",
+    "Jazz",
+    "Pop",
+    "Soul",
+]
+DEFAULT_EXERCISES_PER_CHAPTER = 10
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Chapter:
+    """A chapter of the book and the folder holding its backing tracks.
+
+    The chapter holds the exercises from `first_exercise` to `last_exercise`
+    included, and `name` is the chapter name used in the backing track file names.
+    `folder` is the name of the folder in the backing tracks directory, which
+    defaults to the chapter name.
+    """
+
+    name: str
+    first_exercise: int
+    last_exercise: int
+    folder: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.folder:
+            object.__setattr__(self, "folder", self.name)
+
+    @property
+    def exercises(self) -> range:
+        return range(self.first_exercise, self.last_exercise + 1)
+
+
+class ChapterMap:
+    """Chapters of the book, indexed by exercise.
+
+    The chapters are sorted by their first exercise, so that finding the chapter of
+    an exercise is a binary search over the first exercises, which costs O(log c)
+    with c chapters. The exercise ranges must not overlap, but they may leave gaps,
+    in which case the exercises in the gaps have no chapter. Every chapter must have
+    its own folder.
+    """
+
+    def __init__(self, chapters: Iterable[Chapter]) -> None:
+        self.chapters = tuple(sorted(chapters, key=lambda c: c.first_exercise))
+        for chapter in self.chapters:
+            if not 1 <= chapter.first_exercise <= chapter.last_exercise:
+                error_message = (
+                    f"Invalid exercise range for chapter '{chapter.name}': "
+                    f"{chapter.first_exercise} to {chapter.last_exercise}."
+                )
+                logger.error(error_message)
+                raise ValueError(error_message)
+        for previous, chapter in pairwise(self.chapters):
+            if chapter.first_exercise <= previous.last_exercise:
+                error_message = (
+                    f"Chapters '{previous.name}' and '{chapter.name}' have "
+                    f"overlapping exercise ranges."
+                )
+                logger.error(error_message)
+                raise ValueError(error_message)
+
+        self._starts = [chapter.first_exercise for chapter in self.chapters]
+        self._folders: dict[str, Chapter] = {}
+        for chapter in self.chapters:
+            if (other := self._folders.get(chapter.folder)) is not None:
+                error_message = (
+                    f"Chapters '{other.name}' and '{chapter.name}' have the same "
+                    f"folder '{chapter.folder}'."
+                )
+                logger.error(error_message)
+                raise ValueError(error_message)
+            self._folders[chapter.folder] = chapter
+
+    def __iter__(self) -> Iterator[Chapter]:
+        return iter(self.chapters)
+
+    def __len__(self) -> int:
+        return len(self.chapters)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ChapterMap):
+            return NotImplemented
+        return self.chapters == other.chapters
+
+    def __hash__(self) -> int:
+        return hash(self.chapters)
+
+    @property
+    def last_exercise(self) -> int:
+        """Last exercise of the last chapter, or 0 if there are no chapters."""
+        return self.chapters[-1].last_exercise if self.chapters else 0
+
+    def find(self, exercise: int) -> Chapter | None:
+        """Return the chapter of the given exercise, or None if it has none."""
+        i = bisect_right(self._starts, exercise) - 1
+        if i >= 0 and exercise <= self.chapters[i].last_exercise:
+            return self.chapters[i]
+        return None
+
+    def by_folder(self, folder: str) -> Chapter | None:
+        """Return the chapter whose backing tracks are in the given folder."""
+        return self._folders.get(folder)
+
+    def to_list(self) -> list[dict[str, Any]]:
+        """Convert the chapters to a list of dictionaries, as in the config file."""
+        return [asdict(chapter) for chapter in self.chapters]
+
+    @classmethod
+    def from_list(cls, data: Iterable[dict[str, Any]]) -> "ChapterMap":
+        """Create the chapter map from a list of dictionaries, as in the config file.
+
+        Raises:
+            ValueError: If a chapter is missing a field or the ranges are invalid.
+
+        """
+        try:
+            chapters = [Chapter(**chapter) for chapter in data]
+        except TypeError as e:
+            error_message = f"Invalid chapter in the chapter map: {e}"
+            logger.error(error_message)
+            raise ValueError(error_message) from e
+        return cls(chapters)
+
+
+def default_chapter_map() -> ChapterMap:
+    """Return the chapters of the default book, ten exercises each."""
+    return ChapterMap(
+        Chapter(
+            name,
+            i * DEFAULT_EXERCISES_PER_CHAPTER + 1,
+            (i + 1) * DEFAULT_EXERCISES_PER_CHAPTER,
+        )
+        for i, name in enumerate(DEFAULT_CHAPTER_NAMES)
+    )
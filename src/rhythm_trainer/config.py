@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Any
@@ -6,10 +6,14 @@ from typing import Any
 import yaml
 
 from rhythm_trainer import dirs
+from rhythm_trainer.chapters import ChapterMap, default_chapter_map
 from rhythm_trainer.logger import get_logger
 
 CONFIG_FILENAME = "config.yaml"
 MAX_EXERCISES = 90  # Default maximum number of exercises supported
+DEFAULT_RECENT_WINDOW = 10  # Default number of recent picks excluded from draws
+DEFAULT_STRATEGY = "weighted"  # Name of the default sampling strategy
+DEFAULT_PREFETCH_CACHE_MB = 256  # Default memory for prefetched backing tracks
 
 logger = get_logger(__name__)
 
@@ -28,6 +32,28 @@ class FileFormat(Enum):
     MP3 = "mp3"
 
 
+class StorageBackend(Enum):
+    """Enum for the storage backends of the exercise weights."""
+
+    CSV = "csv"
+    SQLITE = "sqlite"
+    BINARY = "binary"
+
+
+class SamplerEngine(Enum):
+    """Enum for the engines used to draw random exercises."""
+
+    FENWICK = "fenwick"
+    ALIAS = "alias"
+
+
+class AudioOutput(Enum):
+    """Enum for the backends playing the backing tracks."""
+
+    QT = "qt"
+    NULL = "null"
+
+
 @dataclass
 class Config:
     """Configuration dataclass for rhythm trainer settings.
@@ -45,8 +71,40 @@ class Config:
             Naming scheme for output files.
         file_format : FileFormat
             Audio file format for output files.
+        recent_window : int
+            Number of recently picked exercises that cannot be picked again
+            (default: DEFAULT_RECENT_WINDOW).
+        storage_backend : StorageBackend
+            Backend used to store the weights (default: StorageBackend.CSV).
+        plan_size : int
+            Number of random exercises planned ahead at once, or 0 to pick them one at
+            a time (default: 0).
+        sampler_engine : SamplerEngine
+            Engine used to draw random exercises (default: SamplerEngine.FENWICK).
+        strategy : str
+            Name of the sampling strategy deciding which exercise to practice next
+            (default: DEFAULT_STRATEGY).
+        seed : int | None
+            Seed of the random generator, to make the sequence of exercises
+            reproducible, or None to seed it from OS entropy (default: None).
+        decay_half_life_days : float
+            Number of days after which the part of a weight above 1 is halved while
+            the exercise is not practiced, or 0 to keep the weights (default: 0).
+        chapters : ChapterMap
+            Chapters of the book, with their exercise ranges and backing track
+            folders (default: the chapters of the default book).
+        audio_output : AudioOutput
+            Backend playing the backing tracks, where AudioOutput.NULL plays them
+            silently (default: AudioOutput.QT).
+        prefetch_cache_mb : int
+            Memory, in megabytes, holding the backing tracks loaded ahead of time for
+            the upcoming exercises, or 0 to load them only when they are played
+            (default: DEFAULT_PREFETCH_CACHE_MB).
 
     Methods:
+        exercise_limit:
+            Last exercise of the chapters, which bounds the exercise range and the
+            weight stores, or MAX_EXERCISES if there are no chapters.
         to_dict():
             Convert the configuration to a dictionary with string representations.
 
@@ -58,8 +116,22 @@ class Config:
     backing_tracks_dir: Path | None = None
     naming_scheme: NamingScheme = NamingScheme.DEFAULT
     file_format: FileFormat = FileFormat.WAV
-
-    def to_dict(self) -> dict[str, str | int | None]:
+    recent_window: int = DEFAULT_RECENT_WINDOW
+    storage_backend: StorageBackend = StorageBackend.CSV
+    plan_size: int = 0
+    sampler_engine: SamplerEngine = SamplerEngine.FENWICK
+    strategy: str = DEFAULT_STRATEGY
+    seed: int | None = None
+    decay_half_life_days: float = 0.0
+    chapters: ChapterMap = field(default_factory=default_chapter_map)
+    audio_output: AudioOutput = AudioOutput.QT
+    prefetch_cache_mb: int = DEFAULT_PREFETCH_CACHE_MB
+
+    @property
+    def exercise_limit(self) -> int:
+        return self.chapters.last_exercise or MAX_EXERCISES
+
+    def to_dict(self) -> dict[str, Any]:
         """Convert the configuration to a dictionary with string representations."""
         return {
             "csv_path": str(self.csv_path),
@@ -70,6 +142,16 @@ class Config:
             else None,
             "naming_scheme": self.naming_scheme.value,
             "file_format": self.file_format.value,
+            "recent_window": self.recent_window,
+            "storage_backend": self.storage_backend.value,
+            "plan_size": self.plan_size,
+            "sampler_engine": self.sampler_engine.value,
+            "strategy": self.strategy,
+            "seed": self.seed,
+            "decay_half_life_days": self.decay_half_life_days,
+            "chapters": self.chapters.to_list(),
+            "audio_output": self.audio_output.value,
+            "prefetch_cache_mb": self.prefetch_cache_mb,
         }
 
 
@@ -109,7 +191,7 @@ def parse_config(config_filename: str = CONFIG_FILENAME) -> Config:
             yaml.safe_dump(default_config.to_dict(), file)
         return default_config
 
-    logger.info(f"Reading configuration from {config_path}")
+    logger.info("Reading configuration from {path}", path=config_path)
     with config_path.open("r") as file:
         config_data: dict[str, Any] = yaml.safe_load(file)
         if "csv_path" in config_data:
@@ -127,6 +209,22 @@ def parse_config(config_filename: str = CONFIG_FILENAME) -> Config:
             config_data["file_format"] = FileFormat(
                 config_data["file_format"].lower(),
             )
+        if "storage_backend" in config_data:
+            config_data["storage_backend"] = StorageBackend(
+                config_data["storage_backend"].lower(),
+            )
+        if "sampler_engine" in config_data:
+            config_data["sampler_engine"] = SamplerEngine(
+                config_data["sampler_engine"].lower(),
+            )
+        if "audio_output" in config_data:
+            config_data["audio_output"] = AudioOutput(
+                config_data["audio_output"].lower(),
+            )
+        if config_data.get("chapters") is not None:
+            config_data["chapters"] = ChapterMap.from_list(config_data["chapters"])
+        else:
+            config_data.pop("chapters", None)
         config = Config(**config_data)
 
     if (
@@ -1,14 +1,46 @@
 import csv
+import hashlib
+import heapq
+import logging
+import math
 import random
+import re
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
 from itertools import islice
 from pathlib import Path
 
-from rhythm_trainer.config import MAX_EXERCISES
+import numpy as np
+from numpy.typing import ArrayLike
+
+from rhythm_trainer.config import DEFAULT_RECENT_WINDOW, MAX_EXERCISES
 from rhythm_trainer.logger import get_logger
+from rhythm_trainer.sampler import Sampler
+
+JOURNAL_SUFFIX = ".journal"
+FOLDING_SUFFIX = ".folding"
+CSV_DIGEST_SIZE = 16  # Hex digits of the CSV digest in the names of folding journals
+JOURNAL_COMPACTION_SIZE = 16 * 1024  # Journal size in bytes that triggers compaction
+MIN_PLAN_BATCH = 16  # Minimum number of candidates drawn at once by plan_session
+CSV_HEADER = ["Exercise", "Weight", "Touched"]
+TOUCHED_COLUMN = CSV_HEADER.index("Touched")
+SECONDS_PER_DAY = 86_400
+MAX_DECAY_REJECTIONS = 32  # Draws rejected for decayed weights before giving up
 
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class FeedbackEvent:
+    """A single weight change caused by feedback on an exercise."""
+
+    exercise: int
+    delta: int
+    timestamp: float = field(default_factory=time.time)
+
+
 def get_exercises_and_weights(
     csv_path: Path,
     first_exercise: int,
@@ -20,9 +52,11 @@ def get_exercises_and_weights(
     given indices, with the minimum weight set to 1.
     If the file does not exist, generates a default list of exercise IDs and assigns a
     weight of 1 to each.
+    In both cases, the feedback events recorded in the journal since the last
+    compaction are then replayed on top of the weights.
     """
     if csv_path.exists():
-        logger.info(f"Found existing CSV file at {csv_path}.")
+        logger.info("Found existing CSV file at {path}.", path=csv_path)
         exercises: list[int] = []
         weights: list[int] = []
         with csv_path.open("r") as file:
@@ -31,18 +65,113 @@ def get_exercises_and_weights(
             for row in islice(reader, first_exercise - 1, last_exercise):
                 exercises.append(int(row[0]))
                 weights.append(max(int(row[1]), 1))
+    else:
+        logger.info(
+            "No CSV file found at {path}. Generating default exercises and weights.",
+            path=csv_path,
+        )
+        num_exercises = last_exercise - first_exercise + 1
+        exercises = list(range(1, last_exercise + 1))
+        weights = [0] * (first_exercise - 1) + [1] * num_exercises
 
-        return exercises, weights
+    positions = {
+        exercise: i
+        for i, exercise in enumerate(exercises)
+        if first_exercise <= exercise <= last_exercise
+    }
+    for event in read_journal(csv_path):
+        i = positions.get(event.exercise)
+        if i is not None:
+            weights[i] = apply_delta(weights[i], event.delta)
 
-    logger.info(
-        f"No CSV file found at {csv_path}. Generating default exercises and weights.",
-    )
-    num_exercises = last_exercise - first_exercise + 1
-    exercises = list(range(1, last_exercise + 1))
-    weights = [0] * (first_exercise - 1) + [1] * num_exercises
     return exercises, weights
 
 
+def iter_exercises_and_weights(
+    csv_path: Path,
+    first_exercise: int,
+    last_exercise: int,
+) -> Iterator[tuple[int, int]]:
+    """Yield the exercises within a specified range and their weights, one at a time.
+
+    This gives the same weights as `get_exercises_and_weights` for the exercises in
+    the range, but streams the CSV file instead of reading it into lists. Only the
+    journal, which is kept small by compaction, is read upfront.
+    """
+    deltas: dict[int, list[int]] = {}
+    for event in read_journal(csv_path):
+        if first_exercise <= event.exercise <= last_exercise:
+            deltas.setdefault(event.exercise, []).append(event.delta)
+
+    if csv_path.exists():
+        with csv_path.open("r") as file:
+            reader = csv.reader(file)
+            next(reader)  # Skip header
+            for row in islice(reader, first_exercise - 1, last_exercise):
+                exercise, weight = int(row[0]), max(int(row[1]), 1)
+                for delta in deltas.get(exercise, ()):
+                    weight = apply_delta(weight, delta)
+                yield exercise, weight
+    else:
+        for exercise in range(first_exercise, last_exercise + 1):
+            weight = 1
+            for delta in deltas.get(exercise, ()):
+                weight = apply_delta(weight, delta)
+            yield exercise, weight
+
+
+def get_last_touched(
+    csv_path: Path,
+    first_exercise: int,
+    last_exercise: int,
+) -> dict[int, float]:
+    """Return when the exercises within a specified range last received feedback.
+
+    The timestamps are read from the CSV file and the journal, and exercises that
+    never received feedback are left out.
+    """
+    touched: dict[int, float] = {}
+    if csv_path.exists():
+        with csv_path.open("r") as file:
+            reader = csv.reader(file)
+            next(reader)  # Skip header
+            for row in islice(reader, first_exercise - 1, last_exercise):
+                if len(row) > TOUCHED_COLUMN and row[TOUCHED_COLUMN]:
+                    touched[int(row[0])] = float(row[TOUCHED_COLUMN])
+    for event in read_journal(csv_path):
+        if first_exercise <= event.exercise <= last_exercise:
+            touched[event.exercise] = event.timestamp
+    return touched
+
+
+def apply_delta(weight: int, delta: int) -> int:
+    """Return the weight resulting from applying a feedback delta to a weight.
+
+    Weights are never lower than 1 once an exercise has received feedback, which
+    matches how weights are clamped when they are read.
+    """
+    return max(max(weight, 1) + delta, 1)
+
+
+@dataclass(frozen=True)
+class WeightDecay:
+    """Exponential decay of the weights back to 1 while exercises are not practiced.
+
+    The part of a weight above 1 halves every `half_life_days` days after the last
+    feedback on the exercise. The decayed weight is computed in closed form from the
+    stored weight and the time of the last feedback, so it never needs to be stored.
+    """
+
+    half_life_days: float
+
+    def value(self, weight: int, elapsed: float) -> float:
+        """Return the decayed value of a weight, `elapsed` seconds after feedback."""
+        if weight <= 1 or elapsed <= 0:
+            return float(max(weight, 1))
+        half_lives = elapsed / (self.half_life_days * SECONDS_PER_DAY)
+        return 1 + (weight - 1) * 0.5**half_lives
+
+
 def save_exercises_and_weights(
     csv_path: Path,
     exercises: list[int],
@@ -51,16 +180,26 @@ def save_exercises_and_weights(
 ) -> None:
     """Save the weights of the exercises to a CSV file.
 
-    If the CSV file exists, it reads the current weights and updates them with the
-    provided values.
+    If the CSV file exists, it reads the current weights, replays the feedback
+    journal on top of them and updates them with the provided values. The time of the
+    last feedback on each exercise is kept in the third column.
     If the CSV file does not exist, it creates it and then initializes all exercise
     weights to 0 and sets the provided weights.
-    The created CSV file will contain all exercises from 1 to `total_exercises`, each
-    with their corresponding weight.
+    The created CSV file will contain all exercises from 1 to `total_exercises`, or
+    to the last exercise with a weight if it is past `total_exercises`, each with
+    their corresponding weight. Since the journal is folded into the CSV file,
+    it is removed afterwards.
+
+    The CSV file is written to a temporary file first and then moved into place, so
+    an interrupted save never leaves a truncated CSV file behind. Before that, the
+    journal is set aside under a name holding the digest of the CSV file it applies
+    to, so that a save interrupted before or after the CSV file is replaced neither
+    loses its events nor replays them twice (see `get_folding_paths`).
     """
-    logger.info(f"Saving exercises and weights to CSV file {csv_path}")
+    logger.info("Saving exercises and weights to CSV file {path}", path=csv_path)
     # Initialize all weights to 0 for exercises not in the CSV and read existing weights
     all_weights = dict.fromkeys(range(1, total_exercises + 1), 0)
+    all_touched: dict[int, float] = {}
     if csv_path.exists():
         with csv_path.open("r") as file:
             reader = csv.reader(file)
@@ -68,46 +207,339 @@ def save_exercises_and_weights(
             for row in reader:
                 if row:
                     all_weights[int(row[0])] = int(row[1])
+                if len(row) > TOUCHED_COLUMN and row[TOUCHED_COLUMN]:
+                    all_touched[int(row[0])] = float(row[TOUCHED_COLUMN])
+
+    # Replay the feedback recorded since the last save
+    for event in read_journal(csv_path):
+        all_weights[event.exercise] = apply_delta(
+            all_weights.get(event.exercise, 0),
+            event.delta,
+        )
+        all_touched[event.exercise] = event.timestamp
 
     # Update weights for the exercises being saved
     for i, exercise in enumerate(exercises):
         all_weights[exercise] = weights[i]
 
+    # Fill the gaps, since the exercises are read back by their row number
+    for exercise in range(1, max(all_weights, default=0) + 1):
+        all_weights.setdefault(exercise, 0)
+
     # Write the updated weights back to the CSV file
-    with csv_path.open("w") as file:
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = csv_path.with_suffix(".tmp")
+    with tmp_path.open("w") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        for exercise in sorted(all_weights):
+            touched = all_touched.get(exercise)
+            writer.writerow(
+                [exercise, all_weights[exercise], repr(touched) if touched else ""],
+            )
+
+    # Set the journal aside, as it stays to be replayed until the CSV file is replaced
+    journal_path = get_journal_path(csv_path)
+    folding = _list_folding_paths(csv_path)
+    if journal_path.exists():
+        index = max((i for _, _, i in folding), default=-1) + 1
+        folding_path = _get_folding_path(csv_path, _csv_digest(csv_path), index)
+        journal_path.replace(folding_path)
+        folding.append((folding_path, "", index))
+    tmp_path.replace(csv_path)
+    for path, _, _ in folding:
+        path.unlink(missing_ok=True)
+
+
+def get_journal_path(csv_path: Path) -> Path:
+    """Return the path of the feedback journal that accompanies the given CSV file."""
+    return csv_path.with_suffix(JOURNAL_SUFFIX)
+
+
+def _csv_digest(csv_path: Path) -> str:
+    """Return a digest of the content of the CSV file, empty if it does not exist."""
+    data = csv_path.read_bytes() if csv_path.exists() else b""
+    return hashlib.sha256(data).hexdigest()[:CSV_DIGEST_SIZE]
+
+
+def _get_folding_path(csv_path: Path, digest: str, index: int) -> Path:
+    """Return the path a journal is set aside to while it is folded."""
+    return csv_path.with_name(f"{csv_path.stem}.{digest}.{index}{FOLDING_SUFFIX}")
+
+
+def _list_folding_paths(csv_path: Path) -> list[tuple[Path, str, int]]:
+    """Return every journal set aside for the CSV file, with its digest and index."""
+    if not csv_path.parent.exists():
+        return []
+    pattern = re.compile(
+        rf"{re.escape(csv_path.stem)}\.(\w+)\.(\d+){re.escape(FOLDING_SUFFIX)}"
+    )
+    return [
+        (path, match[1], int(match[2]))
+        for path in csv_path.parent.iterdir()
+        if (match := pattern.fullmatch(path.name))
+    ]
+
+
+def get_folding_paths(csv_path: Path) -> list[Path]:
+    """Return the journals set aside by interrupted saves, oldest first.
+
+    A save sets the journal aside under the digest of the CSV file it applies to,
+    and then replaces the CSV file. While the CSV file still has that digest, the
+    journal was not folded yet and its events are replayed before the journal's.
+    Once the CSV file is replaced, the journal is folded and ignored.
+    """
+    folding = _list_folding_paths(csv_path)
+    if not folding:
+        return []
+    digest = _csv_digest(csv_path)
+    return [path for path, d, _ in sorted(folding, key=lambda f: f[2]) if d == digest]
+
+
+def read_journal(csv_path: Path) -> Iterator[FeedbackEvent]:
+    """Yield the feedback events recorded in the journal, oldest first.
+
+    The events of the journals set aside by interrupted saves come first. Incomplete
+    lines, such as one left behind by an interrupted write, are skipped.
+    """
+    for path in [*get_folding_paths(csv_path), get_journal_path(csv_path)]:
+        yield from _read_journal_file(path)
+
+
+def _read_journal_file(journal_path: Path) -> Iterator[FeedbackEvent]:
+    if not journal_path.exists():
+        return
+
+    with journal_path.open("r", newline="") as file:
+        for row in csv.reader(file):
+            try:
+                timestamp, exercise, delta = row
+                yield FeedbackEvent(int(exercise), int(delta), float(timestamp))
+            except ValueError:
+                logger.warning("Skipping malformed journal entry {row}.", row=row)
+
+
+def append_feedback(
+    csv_path: Path,
+    events: Iterable[FeedbackEvent],
+    total_exercises: int = MAX_EXERCISES,
+) -> None:
+    """Append feedback events to the journal of the given CSV file.
+
+    Appending is O(1) in the number of exercises, unlike rewriting the whole CSV file.
+    Once the journal grows past JOURNAL_COMPACTION_SIZE bytes, it is folded into the
+    CSV file.
+    """
+    journal_path = get_journal_path(csv_path)
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    with journal_path.open("a", newline="") as file:
         writer = csv.writer(file)
-        writer.writerow(["Exercise", "Weight"])  # Write header
-        for exercise, weight in all_weights.items():
-            writer.writerow([exercise, weight])
+        writer.writerows(
+            [repr(event.timestamp), event.exercise, event.delta] for event in events
+        )
+
+    if journal_path.stat().st_size >= JOURNAL_COMPACTION_SIZE:
+        compact_journal(csv_path, total_exercises)
+
+
+def compact_journal(csv_path: Path, total_exercises: int = MAX_EXERCISES) -> None:
+    """Fold the feedback journal into the CSV file and clear the journal."""
+    if get_journal_path(csv_path).exists() or get_folding_paths(csv_path):
+        logger.info("Compacting feedback journal into {path}", path=csv_path)
+        save_exercises_and_weights(csv_path, [], [], total_exercises)
+
+
+class RecentWindow:
+    """Fixed-size window of the most recently picked exercises.
+
+    The exercises are kept both in a deque, to evict the oldest one in O(1), and in a
+    set, for O(1) membership tests.
+    """
+
+    def __init__(self, size: int = DEFAULT_RECENT_WINDOW) -> None:
+        if size < 0:
+            error_message = f"Recent window size must be non-negative, got {size}."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+        self.size = size
+        self._order: deque[int] = deque()
+        self._members: set[int] = set()
+
+    def __contains__(self, exercise: object) -> bool:
+        return exercise in self._members
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def push(self, exercise: int) -> None:
+        """Add an exercise to the window, evicting the oldest ones if it is full."""
+        if self.size == 0:
+            return
+        if exercise in self._members:
+            self._order.remove(exercise)
+        else:
+            self._members.add(exercise)
+        self._order.append(exercise)
+        while len(self._order) > self.size:
+            self._members.remove(self._order.popleft())
+
+    def pop_oldest(self) -> int:
+        """Remove and return the oldest exercise in the window."""
+        exercise = self._order.popleft()
+        self._members.remove(exercise)
+        return exercise
+
+
+def _draw(sampler: Sampler, accept: Callable[[int], bool] | None) -> int:
+    """Draw exercises from the sampler until one is accepted."""
+    exercise = sampler.draw()
+    if accept is not None:
+        for _ in range(MAX_DECAY_REJECTIONS):
+            if accept(exercise):
+                break
+            exercise = sampler.draw()
+    return exercise
 
 
 def pick_random_exercise(
-    exercises: list[int],
-    weights: list[int],
-    buffer: list[int] | None = None,
-    buffer_size: int = 10,
+    sampler: Sampler,
+    recent: RecentWindow | None = None,
+    accept: Callable[[int], bool] | None = None,
 ) -> int:
-    """Select a single exercise from a list of exercises based on provided weights.
+    """Select a single exercise from the sampler based on the exercises' weights.
 
     The selection is done randomly, with the probability of each exercise being
-    proportional to its weight. The function ensures that the selected exercise is not
-    already in the buffer, which is a list of recently selected exercises. If the
-    buffer is full, the oldest exercise is removed to make space for the new one.
+    proportional to its weight. The cost of a draw depends on the sampler engine, see
+    `WeightedSampler` and `AliasSampler`.
+
+    The exercises in the recent window are masked in the sampler for the duration of
+    the draw, so the first draw always succeeds. If the window covers every exercise
+    with a non-zero weight, the oldest exercises are released from the window until
+    one can be drawn. The picked exercise is then pushed into the window.
+
+    If `accept` is given, the drawn exercise is only a proposal, which is drawn again
+    while `accept` rejects it, up to `MAX_DECAY_REJECTIONS` times. This is how weights
+    that decayed since they were put in the sampler are taken into account.
+    """
+    if recent is None:
+        return _draw(sampler, accept)
+
+    with sampler.masked(ex for ex in recent if ex in sampler):
+        while sampler.total <= 0 and len(recent) > 0:
+            oldest = recent.pop_oldest()
+            if oldest in sampler:
+                sampler.unmask(oldest)
+        exercise = _draw(sampler, accept)
+
+    recent.push(exercise)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Picked exercise {exercise} out of {total} total weight, "
+            "{recent} recent exercises excluded",
+            exercise=exercise,
+            total=sampler.total,
+            recent=len(recent),
+        )
+    return exercise
+
+
+def plan_session(
+    exercises: ArrayLike,
+    weights: ArrayLike,
+    n: int,
+    window: int | RecentWindow = DEFAULT_RECENT_WINDOW,
+    rng: np.random.Generator | None = None,
+) -> list[int]:
+    """Plan a practice session of `n` exercises drawn according to their weights.
+
+    Candidates are drawn in vectorized batches by inverting the cumulative weights
+    with a single `searchsorted`, then the candidates that are in the no-repeat window
+    are rejected. Rejecting a candidate leaves the others distributed proportionally
+    to their weights, so the plan follows the same distribution as `n` consecutive
+    calls to `pick_random_exercise`. As there, if the window covers every exercise
+    with a non-zero weight the oldest exercises are released from it.
+
+    `window` is either the size of a new, empty window or an existing window, which
+    is then updated with the planned exercises. The exercises and weights can be
+    sequences or NumPy arrays, the latter avoiding a conversion on large catalogs.
+    """
+    exercise_array = np.asarray(exercises, dtype=np.int64)
+    weight_array = np.asarray(weights, dtype=np.float64)
+    if exercise_array.shape != weight_array.shape:
+        error_message = (
+            f"Got {len(exercise_array)} exercises but {len(weight_array)} weights. "
+            "They must have the same length."
+        )
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    recent = RecentWindow(window) if isinstance(window, int) else window
+    rng = rng or np.random.default_rng()
+    cumulative = np.cumsum(weight_array)
+    total = float(cumulative[-1]) if len(cumulative) else 0.0
+    if n > 0 and total <= 0:
+        error_message = "Cannot plan a session when all weights are zero."
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    positive = exercise_array[weight_array > 0]
+    last_positive = int(np.flatnonzero(weight_array)[-1]) if n > 0 else 0
+
+    plan: list[int] = []
+    while len(plan) < n:
+        if len(recent) >= len(positive) and all(
+            exercise in recent for exercise in positive.tolist()
+        ):
+            recent.pop_oldest()
+            continue
+
+        batch = max(2 * (n - len(plan)), MIN_PLAN_BATCH)
+        positions = np.searchsorted(cumulative, rng.random(batch) * total, "right")
+        candidates = exercise_array[np.minimum(positions, last_positive)]
+        for exercise in candidates.tolist():
+            if exercise in recent:
+                continue
+            recent.push(exercise)
+            plan.append(exercise)
+            if len(plan) == n:
+                break
+
+    return plan
+
+
+def sample_distinct_exercises(
+    exercises_and_weights: Iterable[tuple[int, int]],
+    k: int,
+    rng: random.Random | None = None,
+) -> list[int]:
+    """Pick `k` distinct exercises with probabilities proportional to their weights.
+
+    This uses the exponential keys of Efraimidis and Spirakis: every exercise gets the
+    key `log(u) / weight`, with `u` uniform in (0, 1], and the `k` exercises with the
+    largest keys are kept in a min-heap. The exercises are read in a single pass, so
+    they can be streamed (e.g. from `iter_exercises_and_weights`), and the cost is
+    O(n log k). Exercises with a zero weight are never picked, so fewer than `k`
+    exercises are returned if fewer have a positive weight.
+
+    The exercises are returned by decreasing key, which is distributed like `k`
+    successive weighted draws where every drawn exercise is removed.
     """
-    if buffer is None:
-        buffer = []
-
-    attempts = 0
-    max_attempts = 100
-    while attempts < max_attempts:
-        exercise = random.choices(exercises, weights=weights, k=1)[0]
-        if exercise not in buffer:
-            buffer.append(exercise)
-            return exercise
-        if len(buffer) >= buffer_size:
-            buffer.pop(0)
-        attempts += 1
-
-    error_message = f"Failed to select a unique exercise after {max_attempts} attempts."
-    logger.error(error_message)
-    raise RuntimeError(error_message)
+    if k <= 0:
+        return []
+
+    uniform = rng.random if rng is not None else random.random
+    heap: list[tuple[float, int]] = []
+    for exercise, weight in exercises_and_weights:
+        if weight <= 0:
+            continue
+        key = math.log(1.0 - uniform()) / weight
+        if len(heap) < k:
+            heapq.heappush(heap, (key, exercise))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, exercise))
+
+    return [exercise for _, exercise in sorted(heap, reverse=True)]
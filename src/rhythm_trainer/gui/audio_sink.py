@@ -0,0 +1,67 @@
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QObject
+from PyQt6.QtMultimedia import QAudio, QAudioFormat, QAudioSink, QMediaDevices
+
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.playback import Audio
+
+logger = get_logger(__name__)
+
+SAMPLE_FORMATS = {
+    1: QAudioFormat.SampleFormat.UInt8,
+    2: QAudioFormat.SampleFormat.Int16,
+    4: QAudioFormat.SampleFormat.Int32,
+}
+MICROSECONDS = 1_000_000
+
+
+class QtAudioSink(QObject):
+    """Sink playing the audio on the default output device with Qt Multimedia.
+
+    The decoded audio is kept in a `QBuffer` read by a `QAudioSink`, which pulls
+    the samples from the GUI thread's event loop, so no file is opened once the
+    playback started. Seeking reads the same buffer from another offset.
+    """
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._buffer = QBuffer(self)
+        self._sink: QAudioSink | None = None
+        self._audio: Audio | None = None
+        self._frame = 0
+
+    def start(self, audio: Audio, frame: int = 0) -> None:
+        self._release()
+        if audio is not self._audio:
+            self._buffer.setData(QByteArray(audio.frames))
+            self._audio = audio
+        self._buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self._buffer.seek(frame * audio.frame_size)
+        self._frame = frame
+
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(audio.sample_rate)
+        audio_format.setChannelCount(audio.channels)
+        audio_format.setSampleFormat(SAMPLE_FORMATS[audio.sample_width])
+        self._sink = QAudioSink(QMediaDevices.defaultAudioOutput(), audio_format, self)
+        self._sink.start(self._buffer)
+
+    def stop(self) -> None:
+        self._frame = self.position()
+        self._release()
+
+    def position(self) -> int:
+        if self._audio is None or self._sink is None:
+            return self._frame
+        played = self._sink.processedUSecs() * self._audio.sample_rate // MICROSECONDS
+        return min(self._frame + played, self._audio.frame_count)
+
+    def is_active(self) -> bool:
+        return self._sink is not None and self._sink.state() == QAudio.State.ActiveState
+
+    def _release(self) -> None:
+        """Stop and discard the Qt sink, which cannot be restarted at an offset."""
+        if self._sink is not None:
+            self._sink.stop()
+            self._sink.deleteLater()
+            self._sink = None
+        self._buffer.close()
@@ -0,0 +1,168 @@
+import threading
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from rhythm_trainer.chapters import ChapterMap
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.tracks import BackingTrackIndex
+from rhythm_trainer.utils import probe_library
+
+logger = get_logger(__name__)
+
+
+class _ScanSignals(QObject):
+    indexing = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class _ScanTask(QRunnable):
+    """Probe a backing tracks directory and index it on a pool thread."""
+
+    def __init__(
+        self,
+        backing_tracks_dir: Path,
+        chapters: ChapterMap,
+        signals: _ScanSignals,
+        stop: threading.Event,
+    ) -> None:
+        super().__init__()
+        self.backing_tracks_dir = backing_tracks_dir
+        self.chapters = chapters
+        self.signals = signals
+        self.stop = stop
+
+    def run(self) -> None:
+        if self.stop.is_set():
+            self.signals.cancelled.emit()
+            return
+
+        try:
+            probe = probe_library(self.backing_tracks_dir, self.chapters)
+            index = BackingTrackIndex(
+                self.backing_tracks_dir,
+                probe.naming_scheme,
+                probe.file_format,
+                self.chapters,
+            )
+            self.signals.indexing.emit(index)
+            index.scan(progress=self.signals.progress.emit, stop=self.stop)
+            if self.stop.is_set():
+                logger.info(
+                    "Stopped scanning backing tracks in {path}",
+                    path=self.backing_tracks_dir,
+                )
+                self.signals.cancelled.emit()
+                return
+            index.save()
+        except (OSError, ValueError) as e:
+            error_message = f"Could not index the backing tracks: {e}"
+            logger.error(error_message)
+            self.signals.failed.emit(error_message)
+        else:
+            self.signals.finished.emit(index)
+
+
+class LibraryScan(QObject):
+    """Scan of a backing tracks directory, started by `LibraryScanner.start`.
+
+    The file format and naming scheme are probed first, then the chapter folders are
+    listed concurrently by `BackingTrackIndex.scan`. The `indexing` signal carries
+    the index as soon as it starts being filled, so that the tracks of the chapters
+    already listed can be used before the scan finishes. The `progress` signal
+    reports the number of chapters listed and the total, and `finished` carries the
+    complete index, which is also saved to the cache so that the main window does
+    not scan the directory again. Errors are reported through the `failed` signal.
+
+    Every scan has its own stop event, so that `cancel` stops this scan only,
+    without waiting, after which only `cancelled` is emitted for it.
+    """
+
+    indexing = pyqtSignal(BackingTrackIndex)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(BackingTrackIndex)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, backing_tracks_dir: Path, chapters: ChapterMap) -> None:
+        super().__init__()
+        self.backing_tracks_dir = backing_tracks_dir
+        self.chapters = chapters
+        self._running = True
+        self._stop = threading.Event()
+        self._signals = _ScanSignals(self)
+        self._signals.indexing.connect(self.indexing)
+        self._signals.progress.connect(self.progress)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._signals.cancelled.connect(self._on_cancelled)
+
+    def start(self, pool: QThreadPool) -> None:
+        """Run the scan on a thread of the pool."""
+        pool.start(
+            _ScanTask(self.backing_tracks_dir, self.chapters, self._signals, self._stop)
+        )
+
+    def cancel(self) -> None:
+        """Stop the scan, without waiting for it."""
+        self._stop.set()
+
+    def is_running(self) -> bool:
+        """Return whether the scan is in progress or waiting to start."""
+        return self._running
+
+    def _on_finished(self, index: BackingTrackIndex) -> None:
+        self._running = False
+        self.finished.emit(index)
+
+    def _on_failed(self, message: str) -> None:
+        self._running = False
+        self.failed.emit(message)
+
+    def _on_cancelled(self) -> None:
+        self._running = False
+        self.cancelled.emit()
+
+
+class LibraryScanner(QObject):
+    """Index backing tracks directories without blocking the GUI thread.
+
+    Every call to `start` returns a new `LibraryScan`, whose signals report the
+    progress and the result of that scan. The scanner keeps the scans alive until
+    they end, and `cancel` stops all of them, e.g. when the application closes.
+    """
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._scans: set[LibraryScan] = set()
+
+    def start(self, backing_tracks_dir: Path, chapters: ChapterMap) -> LibraryScan:
+        """Start indexing the directory and return the scan."""
+        logger.info(
+            "Scanning backing tracks in {path} in the background",
+            path=backing_tracks_dir,
+        )
+        scan = LibraryScan(backing_tracks_dir, chapters)
+        self._scans.add(scan)
+        scan.finished.connect(lambda _: self._scans.discard(scan))
+        scan.failed.connect(lambda _: self._scans.discard(scan))
+        scan.cancelled.connect(lambda: self._scans.discard(scan))
+        scan.start(self._pool)
+        return scan
+
+    def cancel(self) -> None:
+        """Stop every scan in progress, without waiting for them."""
+        for scan in self._scans:
+            scan.cancel()
+
+    def is_running(self) -> bool:
+        """Return whether a scan is in progress or waiting to start."""
+        return bool(self._scans)
+
+    def wait(self) -> None:
+        """Block until every scan started has completed."""
+        self._pool.waitForDone()
@@ -1,9 +1,10 @@
 from collections.abc import Callable
+from dataclasses import replace
 from functools import partial
 from pathlib import Path
 
 from PyQt6.QtCore import QObject, QSize, Qt
-from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtGui import QCloseEvent, QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QDialog,
     QHBoxLayout,
@@ -16,23 +17,30 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from rhythm_trainer.config import Config, parse_config, save_config
-from rhythm_trainer.exercises import (
-    get_exercises_and_weights,
-    save_exercises_and_weights,
+from rhythm_trainer.config import AudioOutput, parse_config, save_config
+from rhythm_trainer.exercises import FeedbackEvent
+from rhythm_trainer.gui.library_scanner import LibraryScan, LibraryScanner
+from rhythm_trainer.gui.modes import (
+    BaseModeWidget,
+    ManualModeWidget,
+    RandomModeWidget,
+    SessionModeWidget,
 )
-from rhythm_trainer.gui.modes import BaseModeWidget, ManualModeWidget, RandomModeWidget
+from rhythm_trainer.gui.persistence import PersistenceWorker
 from rhythm_trainer.gui.settings_dialog import SettingsDialog
+from rhythm_trainer.gui.track_watcher import TrackIndexWatcher
 from rhythm_trainer.i18n import _
 from rhythm_trainer.logger import get_logger
-from rhythm_trainer.tracks import play_backing_track
-from rhythm_trainer.utils import infer_file_format, infer_naming_scheme
+from rhythm_trainer.playback import AudioSink, NullSink, Player
+from rhythm_trainer.prefetch import BYTES_PER_MB, TrackCache, TrackPrefetcher
+from rhythm_trainer.rng import get_rng_state, restore_rng
+from rhythm_trainer.storage import STORAGE_ERRORS, open_weight_store
+from rhythm_trainer.strategies import Feedback, create_strategy
+from rhythm_trainer.tracks import BackingTrackIndex, play_backing_track
+from rhythm_trainer.utils import probe_library
 
 logger = get_logger(__name__)
 
-
-SKIP_BK_TRACKS_OPEN = True
-
 # --- UI Constants ---
 WINDOW_TITLE = "Rhythm Trainer"
 WINDOW_SIZE = (350, 425)
@@ -41,6 +49,7 @@ BK_BUTTON_TEXT = "Play backing track"
 BK_BUTTON_SIZE = (250, 50)
 TAB_RANDOM = "Random Exercise"
 TAB_MANUAL = "Manual Input"
+TAB_SESSION = "Session"
 FEEDBACK_LABEL = "How did it go?"
 GOOD_BUTTON_TEXT = "Good"
 BAD_BUTTON_TEXT = "Bad"
@@ -48,6 +57,14 @@ FEEDBACK_BUTTON_SIZE = 100, 50
 STYLE_FILE = "style.qss"
 SHORTCUT_TAB1 = "Ctrl+1"
 SHORTCUT_TAB2 = "Ctrl+2"
+SHORTCUT_TAB3 = "Ctrl+3"
+SHORTCUT_SEEK_BACK = "Ctrl+Left"
+SHORTCUT_SEEK_FORWARD = "Ctrl+Right"
+SEEK_STEP = 5  # Seconds skipped by the seek shortcuts
+ERROR_TIMEOUT_MS = 10000
+PREFETCH_AHEAD = 3  # Upcoming exercises whose backing tracks are prefetched
+RNG_STATE = "rng"  # Names under which states are saved in the weight store
+STRATEGY_STATE = "strategy"
 
 
 class MainWindow(QMainWindow):
@@ -58,29 +75,141 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(_(WINDOW_TITLE))
         self.setMinimumSize(QSize(*WINDOW_SIZE))
 
+        self._persistence: PersistenceWorker | None = None
+        self.track_index: BackingTrackIndex | None = None
+        self._track_watcher: TrackIndexWatcher | None = None
+        self._library_scanner = LibraryScanner(self)
+        self._library_scan: LibraryScan | None = None
         self._load_config_and_exercises()
+        self.track_cache = TrackCache(self.config.prefetch_cache_mb * BYTES_PER_MB)
+        self._prefetcher = TrackPrefetcher(self.track_cache)
+        self.player = Player(self._create_audio_sink(), loader=self.track_cache.get)
         self._setup_ui()
         self._setup_shortcuts()
-        self._buffer: list[int] = []
         self.next_exercise()
 
-    def _load_config_and_exercises(self) -> None:
-        """Load the application configuration and exercises."""
+    def _load_config_and_exercises(
+        self,
+        track_index: BackingTrackIndex | None = None,
+    ) -> None:
+        """Load the application configuration and exercises.
+
+        Any feedback still waiting to be saved is written first, so that the weights
+        are read back up to date. A `track_index` of the configured backing tracks
+        directory, such as the one being filled by the settings dialog, is used
+        instead of probing and loading the directory again.
+        """
+        self._stop_persistence()
+        self._stop_track_watcher()
         self.config = parse_config()
         if self.config.backing_tracks_dir:
-            file_format = infer_file_format(self.config.backing_tracks_dir)
-            naming_scheme = infer_naming_scheme(self.config.backing_tracks_dir)
-
-            self.config.file_format = file_format
-            self.config.naming_scheme = naming_scheme
-
-            save_config(self.config)
+            if track_index is None or (
+                track_index.backing_tracks_dir != self.config.backing_tracks_dir
+                or track_index.chapters != self.config.chapters
+            ):
+                probe = probe_library(
+                    self.config.backing_tracks_dir,
+                    self.config.chapters,
+                )
+                file_format, naming_scheme = probe.file_format, probe.naming_scheme
+                track_index = None
+            else:
+                file_format = track_index.file_format
+                naming_scheme = track_index.naming_scheme
+
+            if (file_format, naming_scheme) != (
+                self.config.file_format,
+                self.config.naming_scheme,
+            ):
+                self.config.file_format = file_format
+                self.config.naming_scheme = naming_scheme
+                save_config(self.config)
+
+            if track_index is None:
+                track_index = BackingTrackIndex.load(
+                    self.config.backing_tracks_dir,
+                    self.config.naming_scheme,
+                    self.config.file_format,
+                    chapters=self.config.chapters,
+                )
+            self.track_index = track_index
+            self._track_watcher = TrackIndexWatcher(self.track_index, parent=self)
+            self._track_watcher.changed.connect(self._on_track_index_changed)
+        else:
+            self.track_index = None
 
-        self.exercises, self.weights = get_exercises_and_weights(
-            self.config.csv_path,
+        self.store = open_weight_store(self.config)
+        exercises, weights = self.store.load(
             self.config.first_exercise,
             self.config.last_exercise,
         )
+        self.rng = restore_rng(self.store.load_state(RNG_STATE), self.config.seed)
+        self.strategy = create_strategy(
+            self.config.strategy,
+            exercises,
+            weights,
+            self.config,
+            self.rng,
+        )
+        strategy_state = self.store.load_state(STRATEGY_STATE)
+        if strategy_state is not None:
+            self.strategy.restore(strategy_state)
+        if self.config.decay_half_life_days > 0:
+            self.strategy.set_last_touched(
+                self.store.load_touched(
+                    self.config.first_exercise,
+                    self.config.last_exercise,
+                ),
+            )
+
+        self._persistence = PersistenceWorker(self.store, parent=self)
+        self._persistence.error.connect(self._show_error)
+
+    def _stop_persistence(self) -> None:
+        """Save the pending feedback, stop the background saver and close the store.
+
+        The states of the random generator and of the sampling strategy are saved
+        too, so that the next run resumes where this one stopped.
+        """
+        if self._persistence is not None:
+            self._persistence.close()
+            self._persistence.deleteLater()
+            self._persistence = None
+            try:
+                self.store.save_state(
+                    RNG_STATE,
+                    get_rng_state(self.rng, self.config.seed),
+                )
+                self.store.save_state(STRATEGY_STATE, self.strategy.serialize())
+            except STORAGE_ERRORS as e:
+                logger.error("Could not save the session state: {error}", error=e)
+            self.store.close()
+
+    def _create_audio_sink(self) -> AudioSink:
+        """Return the sink of the configured audio output.
+
+        Qt Multimedia needs system audio libraries, so the tracks are played
+        silently if it cannot be loaded.
+        """
+        if self.config.audio_output == AudioOutput.QT:
+            try:
+                from rhythm_trainer.gui.audio_sink import QtAudioSink  # noqa: PLC0415
+            except ImportError as e:
+                logger.warning(
+                    "Qt Multimedia is not available, backing tracks will be silent: "
+                    "{error}",
+                    error=e,
+                )
+            else:
+                return QtAudioSink(parent=self)
+        return NullSink()
+
+    def _stop_track_watcher(self) -> None:
+        """Stop watching the backing tracks directory, once its update is done."""
+        if self._track_watcher is not None:
+            self._track_watcher.wait()
+            self._track_watcher.deleteLater()
+            self._track_watcher = None
 
     def _setup_ui(self) -> None:
         """Initialize and arrange the main window's user interface components.
@@ -142,10 +271,11 @@ class MainWindow(QMainWindow):
     def _add_modes_tab(self, layout: QLayout, bk_tracks_button: QPushButton) -> None:
         """Add the modes tab widget to the layout, initializing random and manual modes.
 
-        This method creates a QTabWidget containing two tabs: one for random mode and
-        one for manual mode. It sets up the necessary connections for the manual mode's
-        exercise input to update the exercise and background tracks button state. The
-        tabs are then added to the provided layout.
+        This method creates a QTabWidget containing three tabs: one for random mode,
+        one for manual mode and one for sessions of distinct exercises. It sets up the
+        necessary connections for the manual mode's exercise input to update the
+        exercise and background tracks button state, and for the session mode's button
+        to start a new session. The tabs are then added to the provided layout.
 
         Args:
             layout : QLayout
@@ -173,8 +303,15 @@ class MainWindow(QMainWindow):
             self._update_manual_mode_bk_button,
         )
 
+        self.session_mode = SessionModeWidget(
+            bk_tracks_button,
+            self.config.last_exercise - self.config.first_exercise + 1,
+        )
+        self.session_mode.new_session_button.clicked.connect(self._start_session)
+
         self.tabs.addTab(self.random_mode, _(TAB_RANDOM))
         self.tabs.addTab(self.manual_mode, _(TAB_MANUAL))
+        self.tabs.addTab(self.session_mode, _(TAB_SESSION))
 
         layout.addWidget(self.tabs)
 
@@ -247,6 +384,24 @@ class MainWindow(QMainWindow):
             self._activate_tab_2,
         )
 
+        self.tab_shortcut_ctrl_3 = make_shortcut(
+            QKeySequence(SHORTCUT_TAB3),
+            self._activate_tab_3,
+        )
+
+        self.stop_shortcut = make_shortcut(
+            QKeySequence(Qt.Key.Key_Escape),
+            self.stop_backing_track,
+        )
+        self.seek_back_shortcut = make_shortcut(
+            QKeySequence(SHORTCUT_SEEK_BACK),
+            partial(self.seek_backing_track, -SEEK_STEP),
+        )
+        self.seek_forward_shortcut = make_shortcut(
+            QKeySequence(SHORTCUT_SEEK_FORWARD),
+            partial(self.seek_backing_track, SEEK_STEP),
+        )
+
     def _make_shortcut(
         self,
         keyseq: QKeySequence,
@@ -280,12 +435,8 @@ class MainWindow(QMainWindow):
         """Activate the first tab (random mode)."""
         self.tabs.setCurrentIndex(0)
         self.manual_mode.exercise_input.setText("")
-        if self.config.backing_tracks_dir:
-            self.random_mode.enable_bk_track_button(
-                self.config.backing_tracks_dir,
-                self.config.naming_scheme,
-                self.config.file_format,
-            )
+        if self.track_index is not None:
+            self.random_mode.enable_bk_track_button(self.track_index)
         else:
             self.bk_tracks_button.setEnabled(False)
 
@@ -293,12 +444,19 @@ class MainWindow(QMainWindow):
         """Activate the second tab (manual mode)."""
         self.tabs.setCurrentIndex(1)
         self.manual_mode.exercise_input.setFocus()
-        if self.config.backing_tracks_dir:
-            self.manual_mode.enable_bk_track_button(
-                self.config.backing_tracks_dir,
-                self.config.naming_scheme,
-                self.config.file_format,
-            )
+        if self.track_index is not None:
+            self.manual_mode.enable_bk_track_button(self.track_index)
+        else:
+            self.bk_tracks_button.setEnabled(False)
+
+    def _activate_tab_3(self) -> None:
+        """Activate the third tab (session mode), starting a session if none is open."""
+        self.tabs.setCurrentWidget(self.session_mode)
+        self.manual_mode.exercise_input.setText("")
+        if not self.session_mode.in_progress:
+            self._start_session()
+        elif self.track_index is not None:
+            self.session_mode.enable_bk_track_button(self.track_index)
         else:
             self.bk_tracks_button.setEnabled(False)
 
@@ -311,59 +469,100 @@ class MainWindow(QMainWindow):
         This method also disables the backing tracks button during playback and enables
         the 'good' and 'bad' buttons afterwards.
         """
-        logger.info(f"Playing backing track for exercise {self.current_exercise}.")
+        logger.info(
+            "Playing backing track for exercise {exercise}.",
+            exercise=self.current_exercise,
+        )
         self.bk_tracks_button.setEnabled(False)
 
-        if (
-            self.config.backing_tracks_dir
-            and self.current_exercise is not None
-            and not SKIP_BK_TRACKS_OPEN
-        ):
-            play_backing_track(
-                self.current_exercise,
-                self.config.backing_tracks_dir,
-                self.config.naming_scheme,
-                self.config.file_format,
-            )
+        if self.track_index is not None and self.current_exercise is not None:
+            try:
+                play_backing_track(
+                    self.player,
+                    self.current_exercise,
+                    self.track_index,
+                )
+            except (OSError, ValueError) as e:
+                logger.error("Could not play the backing track: {error}", error=e)
+                self._show_error(str(e))
 
         self.good_button.setEnabled(True)
         self.bad_button.setEnabled(True)
 
+    def stop_backing_track(self) -> None:
+        """Stop the backing track being played."""
+        self.player.stop()
+
+    def seek_backing_track(self, step: float) -> None:
+        """Move the backing track forward, or backward with a negative step."""
+        self.player.seek(self.player.position + step)
+
     def good_feedback(self) -> None:
         """Handle positive feedback for the current exercise.
 
-        Decreases the weight of the current exercise if possible, saves the updated
-        weights and exercises to the CSV file, and advances to the next exercise.
+        Lets the sampling strategy update the current exercise (with the default
+        strategy, its weight decreases if possible), records the feedback to be saved,
+        and advances to the next exercise.
         """
-        logger.info(f"Good feedback received on exercise {self.current_exercise}.")
+        logger.info(
+            "Good feedback received on exercise {exercise}.",
+            exercise=self.current_exercise,
+        )
         if self.current_exercise is not None:
-            if self.weights[self.current_exercise - self.config.first_exercise] > 1:
-                self.weights[self.current_exercise - self.config.first_exercise] -= 1
-            save_exercises_and_weights(
-                self.config.csv_path,
-                self.exercises,
-                self.weights,
-            )
+            self._record_feedback(self.current_exercise, Feedback.GOOD)
             self.next_exercise()
 
     def bad_feedback(self) -> None:
         """Handle negative feedback for the current exercise.
 
-        Increments the weight for the current exercise, saves the updated exercises and
-        weights to the CSV file, and advances to the next exercise.
+        Lets the sampling strategy update the current exercise (with the default
+        strategy, its weight increases), records the feedback to be saved, and advances
+        to the next exercise.
         """
-        logger.info(f"Bad feedback received on exercise {self.current_exercise}.")
+        logger.info(
+            "Bad feedback received on exercise {exercise}.",
+            exercise=self.current_exercise,
+        )
         if self.current_exercise is not None:
-            self.weights[self.current_exercise - self.config.first_exercise] += 1
-            save_exercises_and_weights(
-                self.config.csv_path,
-                self.exercises,
-                self.weights,
-            )
+            self._record_feedback(self.current_exercise, Feedback.BAD)
             self.next_exercise()
 
+    def _record_feedback(self, exercise: int, feedback: Feedback) -> None:
+        """Pass the feedback to the sampling strategy and queue its change to be saved.
+
+        The change is written to the weight store by the background saver, so the
+        interface never waits for the disk.
+        """
+        delta = self.strategy.update(exercise, feedback)
+        if self._persistence is not None:
+            self._persistence.submit(FeedbackEvent(exercise, delta))
+
+    def _show_error(self, message: str) -> None:
+        """Show an error, such as one reported by the background saver."""
+        status_bar = self.statusBar()
+        if status_bar is not None:
+            status_bar.showMessage(message, ERROR_TIMEOUT_MS)
+
+    def closeEvent(self, a0: QCloseEvent | None) -> None:  # noqa: N802
+        """Stop playback, save the pending feedback and compact the weight store."""
+        self.player.stop()
+        self._follow_library_scan(None)
+        self._library_scanner.cancel()
+        self._library_scanner.wait()
+        self._stop_track_watcher()
+        self._prefetcher.close()
+        logger.info(
+            "Backing track cache: {hits} hits, {misses} misses ({rate:.0%} hit rate)",
+            hits=self.track_cache.hits,
+            misses=self.track_cache.misses,
+            rate=self.track_cache.hit_rate,
+        )
+        self._stop_persistence()
+        super().closeEvent(a0)
+
     def reset_interface(self) -> None:
         """Reset the main window interface to get ready for a new exercise."""
+        self.player.stop()
         self.good_button.setEnabled(False)
         self.bad_button.setEnabled(False)
         self.bk_tracks_button.setEnabled(False)
@@ -375,26 +574,79 @@ class MainWindow(QMainWindow):
         self.reset_interface()
 
         if self.tabs.currentIndex() == 0:
-            self.current_exercise = self.random_mode.pick_exercise(
-                self.exercises,
-                self.weights,
-                self._buffer,
-            )
+            if self.config.plan_size > 0 and not self.strategy.upcoming:
+                self.strategy.plan(self.config.plan_size)
+            self.current_exercise = self.random_mode.pick_exercise(self.strategy)
             self._enable_buttons(self.random_mode)
         elif self.tabs.currentIndex() == 1:
             self.current_exercise = self.manual_mode.get_exercise()
             if self.current_exercise is not None:
                 self._enable_buttons(self.manual_mode)
+        elif self.tabs.currentWidget() is self.session_mode:
+            self.current_exercise = self.session_mode.pick_exercise()
+            if self.current_exercise is not None:
+                self._enable_buttons(self.session_mode)
         else:
             error_message = "Invalid tab index. This should never happen."
             logger.error(error_message)
             raise ValueError(error_message)
 
+        self._prefetch_backing_tracks()
+
+    def _predict_exercises(self, count: int) -> list[int]:
+        """Return the exercises most likely to follow the current one, likeliest first.
+
+        Sessions are known in advance, while the exercises of random mode are
+        predicted by the sampling strategy. With `plan_size`, only the exercises left
+        in the current plan are predicted, so that the next plan is still drawn as a
+        whole.
+        """
+        if self.tabs.currentWidget() is self.session_mode:
+            return self.session_mode.remaining_exercises[:count]
+        if self.tabs.currentWidget() is self.random_mode:
+            if self.config.plan_size > 0:
+                count = min(count, len(self.strategy.upcoming))
+            return self.strategy.predict(count)
+        return []
+
+    def _prefetch_backing_tracks(self) -> None:
+        """Load the backing tracks of the current and upcoming exercises in memory.
+
+        The current exercise comes first, as it is the one most likely to be played.
+        """
+        if self.track_index is None:
+            return
+
+        exercises = [self.current_exercise, *self._predict_exercises(PREFETCH_AHEAD)]
+        tracks = [
+            track
+            for exercise in exercises
+            if exercise is not None
+            and (track := self.track_index.get(exercise)) is not None
+        ]
+        self._prefetcher.schedule(tracks)
+
+    @property
+    def upcoming_exercises(self) -> tuple[int, ...]:
+        """Exercises already drawn to be shown next in random mode, in order."""
+        return tuple(self.strategy.upcoming)
+
+    def _start_session(self) -> None:
+        """Plan a new session of distinct exercises and show its first exercise."""
+        self.tabs.setCurrentWidget(self.session_mode)
+        self.session_mode.start_session(
+            self.strategy.exercises,
+            self.strategy.weights,
+            self.rng,
+        )
+        self.next_exercise()
+
     def _settings(self) -> None:
-        settings = SettingsDialog()
+        settings = SettingsDialog(self._library_scanner)
         settings.read_config(self.config)
         if settings.exec() == QDialog.DialogCode.Accepted:
-            config = Config(
+            config = replace(
+                self.config,
                 csv_path=Path(settings.csv_path),
                 first_exercise=settings.first_exercise,
                 last_exercise=settings.last_exercise,
@@ -403,7 +655,15 @@ class MainWindow(QMainWindow):
                 else None,
             )
             save_config(config)
-            self._load_config_and_exercises()
+            scan = settings.library_scan
+            if settings.track_index is None and scan is not None:
+                scan.cancel()  # The index is loaded below instead
+            self._load_config_and_exercises(settings.track_index)
+            adopted = (
+                settings.track_index is not None
+                and self.track_index is settings.track_index
+            )
+            self._follow_library_scan(scan if adopted else None)
             self.next_exercise()
 
     def _enable_buttons(self, mode_widget: BaseModeWidget) -> None:
@@ -418,12 +678,8 @@ class MainWindow(QMainWindow):
                 The mode widget whose buttons are to be enabled or disabled.
 
         """
-        if self.config.backing_tracks_dir:
-            mode_widget.enable_bk_track_button(
-                self.config.backing_tracks_dir,
-                self.config.naming_scheme,
-                self.config.file_format,
-            )
+        if self.track_index is not None:
+            mode_widget.enable_bk_track_button(self.track_index)
         else:
             self.bk_tracks_button.setEnabled(False)
             self.good_button.setEnabled(True)
@@ -435,13 +691,72 @@ class MainWindow(QMainWindow):
         if exercise is not None:
             self.current_exercise = exercise
 
+    def _on_track_index_changed(self) -> None:
+        """Refresh the backing track button after the backing tracks changed on disk.
+
+        The button is left alone once the current exercise has been played, so that
+        the feedback flow is not disturbed. The prefetched tracks are dropped, as they
+        may have changed too.
+        """
+        self.track_cache.clear()
+        if self.track_index is None or self.good_button.isEnabled():
+            return
+
+        mode_widget = self.tabs.currentWidget()
+        if isinstance(mode_widget, BaseModeWidget):
+            mode_widget.enable_bk_track_button(self.track_index)
+
+    def _follow_library_scan(self, scan: LibraryScan | None) -> None:
+        """Follow the scan filling the backing track index, if it is still running.
+
+        The scan followed before is stopped, as its index is no longer used.
+        """
+        previous, self._library_scan = self._library_scan, None
+        if previous is not None:
+            previous.indexing.disconnect(self._on_library_indexing)
+            previous.finished.disconnect(self._on_library_scanned)
+            previous.cancelled.disconnect(self._on_library_scan_cancelled)
+            previous.cancel()
+        if scan is None or not scan.is_running():
+            return
+
+        self._library_scan = scan
+        scan.indexing.connect(self._on_library_indexing)
+        scan.finished.connect(self._on_library_scanned)
+        scan.cancelled.connect(self._on_library_scan_cancelled)
+
+    def _on_library_indexing(self, index: BackingTrackIndex) -> None:
+        """Use the index of a scan started again as soon as it starts filling up."""
+        if index is self.track_index:
+            return
+        self._stop_track_watcher()
+        self.track_index = index
+        self._track_watcher = TrackIndexWatcher(self.track_index, parent=self)
+        self._track_watcher.changed.connect(self._on_track_index_changed)
+        self._on_track_index_changed()
+
+    def _on_library_scanned(self, index: BackingTrackIndex) -> None:
+        """Refresh the backing track button once the followed scan ends."""
+        self._follow_library_scan(None)
+        if index is self.track_index:
+            self._on_track_index_changed()
+
+    def _on_library_scan_cancelled(self) -> None:
+        """Scan the library again, as the index in use was left partially filled."""
+        scan = self._library_scan
+        self._follow_library_scan(None)
+        if scan is not None and self.track_index is not None:
+            logger.info(
+                "Scanning {path} again, as its scan was cancelled",
+                path=scan.backing_tracks_dir,
+            )
+            self._follow_library_scan(
+                self._library_scanner.start(scan.backing_tracks_dir, scan.chapters)
+            )
+
     def _update_manual_mode_bk_button(self) -> None:
         """Update the backing track button state in manual mode based on input."""
-        if self.config.backing_tracks_dir:
-            self.manual_mode.enable_bk_track_button(
-                self.config.backing_tracks_dir,
-                self.config.naming_scheme,
-                self.config.file_format,
-            )
+        if self.track_index is not None:
+            self.manual_mode.enable_bk_track_button(self.track_index)
         else:
             self.bk_tracks_button.setEnabled(False)
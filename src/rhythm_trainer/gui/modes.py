@@ -1,19 +1,23 @@
-from pathlib import Path
+import random
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIntValidator
 from PyQt6.QtWidgets import (
+    QHBoxLayout,
     QLabel,
     QPushButton,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
-from rhythm_trainer.config import FileFormat, NamingScheme
-from rhythm_trainer.exercises import pick_random_exercise
+from rhythm_trainer.exercises import sample_distinct_exercises
 from rhythm_trainer.gui.widgets import NumberOnlyLineEdit
 from rhythm_trainer.i18n import _
-from rhythm_trainer.tracks import validate_backing_track
+from rhythm_trainer.strategies import SamplingStrategy
+from rhythm_trainer.tracks import BackingTrackIndex
+
+DEFAULT_SESSION_SIZE = 10
 
 
 class BaseModeWidget(QWidget):
@@ -29,24 +33,11 @@ class BaseModeWidget(QWidget):
         self.bk_tracks_button = bk_tracks_button
         self.current_exercise: int | None = None
 
-    def enable_bk_track_button(
-        self,
-        backing_tracks_dir: Path,
-        naming_scheme: NamingScheme,
-        file_format: FileFormat,
-    ) -> None:
+    def enable_bk_track_button(self, track_index: BackingTrackIndex) -> None:
         enable = False
 
         if self.current_exercise:
-            enable = (
-                validate_backing_track(
-                    self.current_exercise,
-                    backing_tracks_dir,
-                    naming_scheme,
-                    file_format,
-                )
-                is not None
-            )
+            enable = track_index.get(self.current_exercise) is not None
 
         self.bk_tracks_button.setEnabled(enable)
 
@@ -66,13 +57,11 @@ class RandomModeWidget(BaseModeWidget):
         self.exercise_label.setMinimumHeight(30)
         layout.addWidget(self.exercise_label)
 
-    def pick_exercise(
-        self,
-        exercises: list[int],
-        weights: list[int],
-        buffer: list[int],
-    ) -> int:
-        self.current_exercise = pick_random_exercise(exercises, weights, buffer)
+    def pick_exercise(self, strategy: SamplingStrategy) -> int:
+        return self.show_exercise(strategy.draw())
+
+    def show_exercise(self, exercise: int) -> int:
+        self.current_exercise = exercise
         self.exercise_label.setText(f"{_('Exercise')} #{self.current_exercise}")
         return self.current_exercise
 
@@ -125,3 +114,73 @@ class ManualModeWidget(BaseModeWidget):
         if self.is_valid and self.current_exercise is not None:
             return self.current_exercise
         return None
+
+
+class SessionModeWidget(BaseModeWidget):
+    def __init__(
+        self,
+        bk_tracks_button: QPushButton,
+        max_session_size: int,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(bk_tracks_button, parent)
+
+        self._session: list[int] = []
+        self._position = 0
+
+        layout = QVBoxLayout(self)
+        self.exercise_label = QLabel()
+        self.exercise_label.setObjectName("question")
+        self.exercise_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.exercise_label.setMinimumHeight(30)
+        layout.addWidget(self.exercise_label)
+
+        controls_layout = QHBoxLayout()
+        self.size_input = QSpinBox()
+        self.size_input.setObjectName("session_size_input")
+        self.size_input.setRange(1, max(max_session_size, 1))
+        self.size_input.setValue(min(DEFAULT_SESSION_SIZE, self.size_input.maximum()))
+        self.size_input.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
+        controls_layout.addWidget(self.size_input)
+
+        self.new_session_button = QPushButton(_("New session"))
+        self.new_session_button.setObjectName("new_session_button")
+        self.new_session_button.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        controls_layout.addWidget(self.new_session_button)
+        layout.addLayout(controls_layout)
+
+    @property
+    def in_progress(self) -> bool:
+        return self._position < len(self._session)
+
+    @property
+    def remaining_exercises(self) -> list[int]:
+        return self._session[self._position :]
+
+    def start_session(
+        self,
+        exercises: list[int],
+        weights: list[int],
+        rng: random.Random | None = None,
+    ) -> None:
+        self._session = sample_distinct_exercises(
+            zip(exercises, weights, strict=True),
+            self.size_input.value(),
+            rng,
+        )
+        self._position = 0
+        self.current_exercise = None
+
+    def pick_exercise(self) -> int | None:
+        if not self.in_progress:
+            self.current_exercise = None
+            self.exercise_label.setText(_("Session complete"))
+            return None
+
+        self.current_exercise = self._session[self._position]
+        self._position += 1
+        self.exercise_label.setText(
+            f"{_('Exercise')} #{self.current_exercise} "
+            f"({self._position}/{len(self._session)})",
+        )
+        return self.current_exercise
@@ -0,0 +1,138 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from rhythm_trainer.exercises import FeedbackEvent
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.storage import STORAGE_ERRORS, WeightStore
+
+logger = get_logger(__name__)
+
+FLUSH_INTERVAL_MS = 2000
+
+
+class _WriteSignals(QObject):
+    failed = pyqtSignal(str)
+
+
+class _WriteTask(QRunnable):
+    """Write a batch of feedback events to the weight store on a pool thread.
+
+    The events of a failed write are added to `failed`, guarded by `lock`.
+    """
+
+    def __init__(
+        self,
+        store: WeightStore,
+        events: list[FeedbackEvent],
+        signals: _WriteSignals,
+        failed: list[FeedbackEvent],
+        lock: threading.Lock,
+    ) -> None:
+        super().__init__()
+        self.store = store
+        self.events = events
+        self.signals = signals
+        self.failed = failed
+        self.lock = lock
+
+    def run(self) -> None:
+        try:
+            self.store.append(self.events)
+        except STORAGE_ERRORS as e:
+            error_message = f"Could not save feedback: {e}"
+            logger.error(error_message)
+            with self.lock:
+                self.failed.extend(self.events)
+            self.signals.failed.emit(error_message)
+        else:
+            logger.debug("Saved {count} feedback events.", count=len(self.events))
+
+
+class PersistenceWorker(QObject):
+    """Save feedback events to a weight store without blocking the GUI thread.
+
+    Events submitted from the GUI thread are buffered and handed to a single-threaded
+    pool when the flush timer fires, so a burst of rapid feedback results in a single
+    write to the store and writes happen in submission order. Write errors are
+    reported through the `error` signal and the events are kept to be retried on the
+    next flush.
+    """
+
+    error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        store: WeightStore,
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.store = store
+        self._pending: list[FeedbackEvent] = []
+        # Events of the failed pooled writes, added from the pool thread
+        self._failed: list[FeedbackEvent] = []
+        self._failed_lock = threading.Lock()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _WriteSignals(self)
+        self._signals.failed.connect(self._on_write_failed)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def submit(self, event: FeedbackEvent) -> None:
+        """Buffer a feedback event until the next flush."""
+        self._pending.append(event)
+
+    def flush(self) -> None:
+        """Hand all the buffered events to the pool to be written in a single batch."""
+        if not self._pending:
+            return
+
+        events, self._pending = self._pending, []
+        self._pool.start(
+            _WriteTask(
+                self.store, events, self._signals, self._failed, self._failed_lock
+            )
+        )
+
+    def wait(self) -> None:
+        """Block until every write handed to the pool has completed."""
+        self._pool.waitForDone()
+
+    def close(self) -> None:
+        """Stop the timer, write the buffered events and compact the store.
+
+        This runs on the calling thread, after the writes already in the pool, and is
+        meant to be called once when the application shuts down. The events of the
+        pooled writes that failed are retried too, ahead of the buffered ones.
+        """
+        self._timer.stop()
+        self.wait()
+        self._requeue_failed()
+
+        events, self._pending = self._pending, []
+        try:
+            if events:
+                self.store.append(events)
+            self.store.compact()
+        except STORAGE_ERRORS as e:
+            error_message = f"Could not save feedback: {e}"
+            logger.error(error_message)
+            self.error.emit(error_message)
+
+    def _requeue_failed(self) -> None:
+        """Put the events of the failed pooled writes back ahead of the buffer."""
+        with self._failed_lock:
+            failed = self._failed.copy()
+            self._failed.clear()
+        self._pending[:0] = failed
+
+    def _on_write_failed(self, message: str) -> None:
+        """Put back the events of a failed write and report the error."""
+        self._requeue_failed()
+        self.error.emit(message)
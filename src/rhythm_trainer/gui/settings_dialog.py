@@ -9,19 +9,39 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QProgressBar,
     QPushButton,
     QSpinBox,
 )
 
 from rhythm_trainer import dirs
+from rhythm_trainer.chapters import default_chapter_map
 from rhythm_trainer.config import MAX_EXERCISES, Config
+from rhythm_trainer.gui.library_scanner import LibraryScan, LibraryScanner
+from rhythm_trainer.tracks import BackingTrackIndex
 
 
 class SettingsDialog(QDialog):
-    def __init__(self) -> None:
+    """Dialog editing the main settings of the configuration.
+
+    The backing tracks directory is indexed by `scanner`, which the main window
+    owns, so that a scan still running when the dialog is accepted carries on in
+    the background and fills `track_index` for the main window to use, which can
+    follow it through `library_scan`. Only the scans started by the dialog are
+    stopped when another directory is selected or the dialog is cancelled.
+    """
+
+    def __init__(self, scanner: LibraryScanner | None = None) -> None:
         super().__init__()
         self.setWindowTitle("Settings")
         self.setFixedSize(QSize(483, 201))
+        self.chapters = default_chapter_map()
+        self.exercise_limit = MAX_EXERCISES
+        self.track_index: BackingTrackIndex | None = None
+        self.library_scan: LibraryScan | None = None
+
+        self._scanner = scanner if scanner is not None else LibraryScanner(self)
+        self._followed_scan: LibraryScan | None = None
 
         layout = QFormLayout(self)
         self._add_csv_section(layout)
@@ -56,7 +76,12 @@ class SettingsDialog(QDialog):
         bk_tracks_browse_button = QPushButton("Browse", self)
         bk_tracks_browse_button.setToolTip("Browse for backing tracks directory")
         bk_tracks_browse_button.clicked.connect(self._browse_bk_tracks_dir)
+        self.bk_tracks_progress = QProgressBar()
+        self.bk_tracks_progress.setMinimumWidth(200)
+        self.bk_tracks_progress.setFormat("Scanning %v/%m chapters")
+        self.bk_tracks_progress.hide()
         bk_tracks_layout.addWidget(self.bk_tracks_line)
+        bk_tracks_layout.addWidget(self.bk_tracks_progress)
         bk_tracks_layout.addWidget(bk_tracks_browse_button)
         layout.addRow("Backing Tracks Directory:", bk_tracks_layout)
 
@@ -64,11 +89,11 @@ class SettingsDialog(QDialog):
         range_layout = QHBoxLayout()
         self.range_min_spin = QSpinBox()
         self.range_min_spin.setValue(1)
-        self.range_min_spin.setRange(1, MAX_EXERCISES)
+        self.range_min_spin.setRange(1, self.exercise_limit)
         self.range_min_spin.setFixedWidth(50)
         self.range_max_spin = QSpinBox()
-        self.range_max_spin.setValue(MAX_EXERCISES)
-        self.range_max_spin.setRange(1, MAX_EXERCISES)
+        self.range_max_spin.setValue(self.exercise_limit)
+        self.range_max_spin.setRange(1, self.exercise_limit)
         self.range_max_spin.setFixedWidth(50)
 
         self.range_min_spin.valueChanged.connect(self._set_first_exercise)
@@ -139,9 +164,70 @@ class SettingsDialog(QDialog):
             self.bk_tracks_line.setText(self.bk_tracks_dir.name)
             self.bk_tracks_line.setToolTip(self.bk_tracks_dir.as_posix())
             self.bk_tracks_line.setCursorPosition(0)
+            self._scan_bk_tracks_dir()
+
+    def _scan_bk_tracks_dir(self) -> None:
+        """Index the selected backing tracks directory in the background.
+
+        The progress of the scan replaces the directory field until it is done, and
+        the dialog stays responsive meanwhile.
+        """
+        self.track_index = None
+        self.bk_tracks_progress.setRange(0, 0)  # Busy until the chapters are known
+        self.bk_tracks_line.hide()
+        self.bk_tracks_progress.show()
+        self._detach_scan()
+        if self.library_scan is not None:
+            self.library_scan.cancel()  # Another directory was selected meanwhile
+        scan = self._scanner.start(self.bk_tracks_dir, self.chapters)
+        scan.indexing.connect(self._on_scan_started)
+        scan.progress.connect(self._on_scan_progress)
+        scan.finished.connect(self._on_scan_finished)
+        scan.failed.connect(self._on_scan_failed)
+        self.library_scan = self._followed_scan = scan
+
+    def _detach_scan(self) -> None:
+        """Stop following the progress of the scan started by the dialog."""
+        scan, self._followed_scan = self._followed_scan, None
+        if scan is None:
+            return
+        scan.indexing.disconnect(self._on_scan_started)
+        scan.progress.disconnect(self._on_scan_progress)
+        scan.finished.disconnect(self._on_scan_finished)
+        scan.failed.disconnect(self._on_scan_failed)
+
+    def _on_scan_started(self, index: BackingTrackIndex) -> None:
+        """Expose the index while it fills up, one chapter at a time."""
+        self.track_index = index
+
+    def _on_scan_progress(self, done: int, total: int) -> None:
+        self.bk_tracks_progress.setRange(0, total)
+        self.bk_tracks_progress.setValue(done)
+
+    def _on_scan_finished(self, index: BackingTrackIndex) -> None:
+        self._show_bk_tracks_line(f"{len(index)} backing tracks found")
+
+    def _on_scan_failed(self, message: str) -> None:
+        self._show_bk_tracks_line(message)
+
+    def _show_bk_tracks_line(self, status: str) -> None:
+        """Show the directory field again, with the result of the scan."""
+        self.bk_tracks_progress.hide()
+        self.bk_tracks_line.show()
+        self.bk_tracks_line.setToolTip(f"{self.bk_tracks_dir.as_posix()}\n{status}")
+
+    def done(self, a0: int) -> None:
+        """Detach from the scan, stopping it if the dialog is cancelled."""
+        self._detach_scan()
+        if a0 != QDialog.DialogCode.Accepted:
+            if self.library_scan is not None:
+                self.library_scan.cancel()
+            self.library_scan = None
+            self.track_index = None
+        super().done(a0)
 
     def _set_first_exercise(self, value: int) -> None:
-        self.range_max_spin.setRange(value, MAX_EXERCISES)
+        self.range_max_spin.setRange(value, self.exercise_limit)
         self.first_exercise = value
 
     def _set_last_exercise(self, value: int) -> None:
@@ -154,12 +240,17 @@ class SettingsDialog(QDialog):
         self.csv_file_line.setText(self.csv_path.name)
         self.csv_file_line.setToolTip(self.csv_path.as_posix())
 
+        self.chapters = config.chapters
         if config.backing_tracks_dir:
             self.bk_tracks_dir = config.backing_tracks_dir
             self.bk_tracks_line.setText(self.bk_tracks_dir.name)
             self.bk_tracks_line.setToolTip(self.bk_tracks_dir.as_posix())
 
-        self.first_exercise = config.first_exercise
-        self.last_exercise = config.last_exercise
-        self.range_min_spin.setValue(self.first_exercise)
-        self.range_max_spin.setValue(self.last_exercise)
+        # The range is clamped to the exercises of the chapters
+        self.exercise_limit = config.exercise_limit
+        self.range_min_spin.setRange(1, self.exercise_limit)
+        self.range_max_spin.setRange(1, self.exercise_limit)
+        self.range_min_spin.setValue(config.first_exercise)
+        self.range_max_spin.setValue(config.last_exercise)
+        self.first_exercise = self.range_min_spin.value()
+        self.last_exercise = self.range_max_spin.value()
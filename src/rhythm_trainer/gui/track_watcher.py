@@ -0,0 +1,156 @@
+from pathlib import Path
+
+from PyQt6.QtCore import (
+    QFileSystemWatcher,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    pyqtSignal,
+)
+
+from rhythm_trainer.chapters import Chapter
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.tracks import BackingTrackIndex
+
+logger = get_logger(__name__)
+
+DEBOUNCE_INTERVAL_MS = 200
+
+
+class _RescanSignals(QObject):
+    finished = pyqtSignal(bool)
+
+
+class _RescanTask(QRunnable):
+    """Scan again the changed chapters of an index and save it on a pool thread."""
+
+    def __init__(
+        self,
+        index: BackingTrackIndex,
+        chapters: list[Chapter],
+        root_changed: bool,
+        signals: _RescanSignals,
+    ) -> None:
+        super().__init__()
+        self.index = index
+        self.chapters = chapters
+        self.root_changed = root_changed
+        self.signals = signals
+
+    def run(self) -> None:
+        for chapter in self.chapters:
+            self.index.scan_chapter(chapter)
+        if self.root_changed:
+            self.index.refresh()
+
+        logger.debug(
+            "Backing track index updated in {path}",
+            path=self.index.backing_tracks_dir,
+        )
+        try:
+            self.index.save()
+        except OSError as e:
+            logger.warning("Could not save the backing track index: {error}", error=e)
+        self.signals.finished.emit(self.root_changed)
+
+
+class TrackIndexWatcher(QObject):
+    """Keep a backing track index up to date with the filesystem.
+
+    The backing tracks directory and its chapter folders are watched with a
+    `QFileSystemWatcher`. When a chapter folder changes, only that chapter is scanned
+    again, and when the backing tracks directory itself changes (e.g. a chapter folder
+    is created, deleted or renamed) the watched folders are updated and the chapters
+    whose folder changed are scanned again. Bursts of changes, such as copying a whole
+    chapter, are coalesced and handled once. The chapters are scanned and the index
+    saved to the cache on a single-threaded pool, so the GUI thread never lists a
+    folder, and the `changed` signal is emitted once the index is updated.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(
+        self,
+        index: BackingTrackIndex,
+        debounce_interval_ms: int = DEBOUNCE_INTERVAL_MS,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.index = index
+        self._pending_chapters: set[Chapter] = set()
+        self._root_changed = False
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _RescanSignals(self)
+        self._signals.finished.connect(self._on_rescanned)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_interval_ms)
+        self._timer.timeout.connect(self.apply_changes)
+
+        self._update_watched_paths()
+
+    def watched_paths(self) -> list[Path]:
+        """Return the folders currently being watched."""
+        return sorted(Path(path) for path in self._watcher.directories())
+
+    def _update_watched_paths(self) -> None:
+        """Watch the backing tracks directory and every chapter folder that exists."""
+        expected = {
+            str(folder)
+            for folder in [
+                self.index.backing_tracks_dir,
+                *(
+                    self.index.backing_tracks_dir / chapter.folder
+                    for chapter in self.index.chapters
+                ),
+            ]
+            if folder.is_dir()
+        }
+        watched = set(self._watcher.directories())
+
+        if stale := watched - expected:
+            self._watcher.removePaths(sorted(stale))
+        if new := expected - watched:
+            self._watcher.addPaths(sorted(new))
+
+    def _on_directory_changed(self, path: str) -> None:
+        """Record which part of the library changed and schedule the update."""
+        folder = Path(path)
+        if folder == self.index.backing_tracks_dir:
+            self._root_changed = True
+        elif folder.parent == self.index.backing_tracks_dir and (
+            chapter := self.index.chapters.by_folder(folder.name)
+        ):
+            self._pending_chapters.add(chapter)
+        else:
+            return
+
+        self._timer.start()
+
+    def apply_changes(self) -> None:
+        """Scan again, in the background, the chapters changed since the last update."""
+        self._timer.stop()
+        pending, self._pending_chapters = self._pending_chapters, set()
+        root_changed, self._root_changed = self._root_changed, False
+        if not pending and not root_changed:
+            return
+
+        chapters = sorted(pending, key=lambda c: c.first_exercise)
+        self._pool.start(_RescanTask(self.index, chapters, root_changed, self._signals))
+
+    def wait(self) -> None:
+        """Block until every update handed to the pool has completed."""
+        self._pool.waitForDone()
+
+    def _on_rescanned(self, root_changed: bool) -> None:
+        """Watch the new chapter folders, if any, and report the updated index."""
+        if root_changed:
+            self._update_watched_paths()
+        self.changed.emit()
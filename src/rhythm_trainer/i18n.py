@@ -1,26 +1,87 @@
 import gettext
 import locale
+import logging
+from functools import cache, lru_cache
 from pathlib import Path
 
 from rhythm_trainer import APP_NAME
 from rhythm_trainer.logger import get_logger
 
+DEFAULT_LANGUAGE = "en_US"
+CATALOG_CACHE_SIZE = 4
+TRANSLATION_CACHE_SIZE = 1024
+LOCALE_DIR = Path(__file__).parent / "locale"
+
 logger = get_logger(__name__)
 
+_language: str | None = None
 
-def _(text: str) -> str:
-    """Translate the given text using the current locale."""
-    lang = locale.getlocale()[0]
+
+def set_language(lang: str | None) -> None:
+    """Translate all the following texts to the given language.
+
+    The catalog of the language is loaded on first use and kept in the cache, so
+    switching back and forth between languages does not read the catalogs again.
+    Passing None goes back to following the current locale, which is read again.
+    """
+    global _language  # noqa: PLW0603
+    _language = lang
     if lang is None:
-        lang = "en_US"  # Default to English if no locale is set
+        _get_locale_language.cache_clear()
+    else:
+        logger.debug("Setting language to {lang}", lang=lang)
+        _get_catalog(lang)
+
+
+def get_language() -> str:
+    """Return the language texts are currently translated to.
+
+    This is the language set with `set_language`, or the language of the current
+    locale if none was set. The locale is only read the first time, since this is
+    called for every translated text.
+    """
+    if _language is not None:
+        return _language
+    return _get_locale_language()
+
 
-    logger.debug(f"Setting locale to {lang}")
-    locale_dir = Path(__file__).parent / "locale"
+@cache
+def _get_locale_language() -> str:
+    """Return the language of the current locale, or DEFAULT_LANGUAGE if unset."""
+    return locale.getlocale()[0] or DEFAULT_LANGUAGE
 
-    translate = gettext.translation(
+
+@lru_cache(maxsize=CATALOG_CACHE_SIZE)
+def _get_catalog(lang: str) -> gettext.NullTranslations:
+    """Load the catalog of the given language, falling back to the original texts."""
+    logger.debug("Loading the translation catalog for {lang}", lang=lang)
+    return gettext.translation(
         APP_NAME,
-        locale_dir,
+        LOCALE_DIR,
         languages=[lang],
         fallback=True,
     )
-    return translate.gettext(text)
+
+
+@lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def _translate(lang: str, text: str) -> str:
+    """Translate the given text to the given language."""
+    translation = _get_catalog(lang).gettext(text)
+    if (
+        logger.isEnabledFor(logging.DEBUG)
+        and translation == text
+        and lang != DEFAULT_LANGUAGE
+    ):
+        logger.debug("No {lang} translation for {text!r}", lang=lang, text=text)
+    return translation
+
+
+def clear_cache() -> None:
+    """Forget the loaded catalogs and translations, e.g. after updating them."""
+    _get_catalog.cache_clear()
+    _translate.cache_clear()
+
+
+def _(text: str) -> str:
+    """Translate the given text using the current language."""
+    return _translate(get_language(), text)
@@ -1,34 +1,185 @@
+import atexit
+import copy
 import logging
+import queue
+import threading
+from collections.abc import Mapping, MutableMapping
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any
 
 from rhythm_trainer import dirs
 
+LOG_FILENAME = "rhythm_trainer.log"
+PACKAGE_LOGGER = "rhythm_trainer"
+DEFAULT_LEVEL = logging.DEBUG  # Inherited by the package loggers unless configured
 
-def get_logger(
-    name: str,
+_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_listener: QueueListener | None = None
+_lock = threading.RLock()
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler that starts the logging pipeline the first time it is used."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        configure_logging()
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Hand a copy of the record, with its message filled in, to the listener.
+
+        The message is filled in on the logging thread, so that it shows the fields
+        as they were when logged rather than when the listener gets to the record.
+        Records of disabled levels never reach the handler, so they stay unformatted.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_queue_handler = _QueueHandler(_queue)
+logging.getLogger(PACKAGE_LOGGER).setLevel(DEFAULT_LEVEL)
+
+
+def configure_logging(
     console_level: int = logging.INFO,
     file_level: int = logging.DEBUG,
-) -> logging.Logger:
-    """Create and configure a logger with the specified name."""
+) -> QueueListener:
+    """Start the process-wide logging pipeline, if it is not running yet.
+
+    Loggers only put their records on a queue, and a single listener thread owns the
+    console and file handlers, so that writing the log never blocks the caller.
+    Calling this again while the pipeline is running does nothing and returns the
+    running listener. The pipeline is stopped, and the remaining records written, when
+    the interpreter exits.
+    """
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        return _listener
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level)
+        console_formatter = logging.Formatter(
+            "{name} - {levelname} - {message}",
+            style="{",
+        )
+        console_handler.setFormatter(console_formatter)
+
+        log_path = Path(dirs.user_log_dir) / LOG_FILENAME
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(log_path, mode="a", encoding="utf-8")
+        file_handler.setLevel(file_level)
+        file_formatter = logging.Formatter(
+            "{asctime} - {name} - {levelname} - {message}",
+            style="{",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        file_handler.setFormatter(file_formatter)
+
+        listener = QueueListener(
+            _queue,
+            console_handler,
+            file_handler,
+            respect_handler_level=True,
+        )
+        listener.start()
+        _listener = listener
+
+    return listener
+
+
+def shutdown_logging() -> None:
+    """Write the queued records, stop the listener thread and close the handlers.
+
+    Records logged afterwards start the pipeline again.
+    """
+    global _listener  # noqa: PLW0603
+    with _lock:
+        listener, _listener = _listener, None
+        if listener is None:
+            return
+
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown_logging)
+
+
+class LogMessage:
+    """Log message made of a template and the fields to fill it with.
+
+    The template uses `str.format` placeholders and is only filled in when the
+    message is needed, i.e. when a handler formats the record.
+    """
+
+    __slots__ = ("fields", "template")
+
+    def __init__(self, template: str, fields: Mapping[str, object]) -> None:
+        self.template = template
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return self.template.format(**self.fields)
+
+    def __repr__(self) -> str:
+        return f"LogMessage({self.template!r}, {self.fields!r})"
+
+
+class StructuredLogger(logging.LoggerAdapter[logging.Logger]):
+    """Logger taking message templates and fields instead of formatted messages.
+
+    `logger.info("Saved {count} events", count=len(events))` logs a `LogMessage`,
+    which is only formatted if a handler accepts the record, and nothing is done at
+    all if the level is disabled. The fields are also available to handlers as the
+    `fields` attribute of the record.
+    """
+
+    _LOG_KWARGS = frozenset({"exc_info", "stack_info", "stacklevel", "extra"})
+
+    def log(
+        self,
+        level: int,
+        msg: object,
+        *args: object,
+        **kwargs: Any,
+    ) -> None:
+        if not self.isEnabledFor(level):
+            return
+
+        fields = {k: v for k, v in kwargs.items() if k not in self._LOG_KWARGS}
+        log_kwargs = {k: v for k, v in kwargs.items() if k in self._LOG_KWARGS}
+        if fields:
+            msg = LogMessage(str(msg), fields)
+            log_kwargs["extra"] = {**log_kwargs.get("extra", {}), "fields": fields}
+        log_kwargs["stacklevel"] = log_kwargs.get("stacklevel", 1) + 1
+
+        self.logger.log(level, msg, *args, **log_kwargs)
+
+    def process(
+        self,
+        msg: Any,
+        kwargs: MutableMapping[str, Any],
+    ) -> tuple[Any, MutableMapping[str, Any]]:
+        return msg, kwargs
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Return the logger with the specified name, attached to the logging pipeline.
+
+    Calling this more than once for the same name returns a logger backed by the
+    same `logging.Logger`, without adding handlers again. The level of the logger is
+    left as configured, and the loggers of the package inherit DEFAULT_LEVEL.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(console_level)
-    console_formatter = logging.Formatter("{name} - {levelname} - {message}", style="{")
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-
-    log_path = Path(dirs.user_log_dir) / "rhythm_trainer.log"
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    file_handler = logging.FileHandler(log_path, mode="a", encoding="utf-8")
-    file_handler.setLevel(file_level)
-    file_formatter = logging.Formatter(
-        "{asctime} - {name} - {levelname} - {message}",
-        style="{",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
-
-    return logger
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
+
+    return StructuredLogger(logger)
@@ -0,0 +1,274 @@
+"""In-process playback of the backing tracks.
+
+Backing tracks are decoded from WAV files in memory and handed to an audio sink,
+which is the backend producing the sound. The `Player` measures how long it takes
+from the request to play a track to the sink starting, and reports the tracks that
+exceed its latency budget. Compressed tracks, such as MP3 files, cannot be decoded
+here and are opened in the default application of the system instead.
+"""
+
+import io
+import subprocess
+import time
+import wave
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from rhythm_trainer.logger import get_logger
+
+DEFAULT_LATENCY_BUDGET = 0.05  # Seconds from the play request to the sink starting
+PACKED_SAMPLE_WIDTH = 3  # 24-bit samples, widened to 32 bits for the sinks
+WIDE_SAMPLE_WIDTH = 4
+DECODED_SUFFIX = ".wav"  # Tracks with other suffixes are handed to the system
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Audio:
+    """Decoded PCM audio, with the samples of each frame interleaved.
+
+    The samples are little-endian, unsigned with 8 bits and signed otherwise, as in
+    WAV files, and `sample_width` is their size in bytes.
+    """
+
+    frames: bytes
+    sample_rate: int
+    channels: int
+    sample_width: int
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frames) // self.frame_size
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.sample_rate
+
+    def frame_at(self, seconds: float) -> int:
+        """Return the frame played at the given time, clamped to the audio."""
+        return min(max(round(seconds * self.sample_rate), 0), self.frame_count)
+
+
+def decode_wave(data: bytes) -> Audio:
+    """Decode the content of a PCM WAV file.
+
+    24-bit samples are widened to 32 bits, which every sink supports.
+
+    Raises:
+        ValueError: If the data is not a PCM WAV file.
+
+    """
+    try:
+        with wave.open(io.BytesIO(data), "rb") as reader:
+            audio = Audio(
+                reader.readframes(reader.getnframes()),
+                reader.getframerate(),
+                reader.getnchannels(),
+                reader.getsampwidth(),
+            )
+    except (wave.Error, EOFError) as e:
+        error_message = f"Could not decode the WAV data: {e}"
+        logger.error(error_message)
+        raise ValueError(error_message) from e
+
+    if audio.sample_width == PACKED_SAMPLE_WIDTH:
+        packed = np.frombuffer(audio.frames, np.uint8).reshape(-1, PACKED_SAMPLE_WIDTH)
+        wide = np.zeros((len(packed), WIDE_SAMPLE_WIDTH), np.uint8)
+        wide[:, 1:] = packed
+        audio = Audio(
+            wide.tobytes(),
+            audio.sample_rate,
+            audio.channels,
+            WIDE_SAMPLE_WIDTH,
+        )
+    return audio
+
+
+def open_with_system_player(track: Path) -> None:
+    """Open a track in the default application of the system."""
+    subprocess.Popen(  # noqa: S603
+        ["/usr/bin/open", str(track)],
+        stdout=subprocess.DEVNULL,
+    )
+
+
+class AudioSink(Protocol):
+    """Backend producing the sound of the decoded audio."""
+
+    def start(self, audio: Audio, frame: int = 0) -> None:
+        """Start playing the audio from the given frame, replacing any audio."""
+        ...
+
+    def stop(self) -> None:
+        """Stop playing."""
+        ...
+
+    def position(self) -> int:
+        """Return the frame being played, or where the playback stopped."""
+        ...
+
+    def is_active(self) -> bool:
+        """Return whether the audio is being played."""
+        ...
+
+
+class NullSink:
+    """Sink playing the audio silently, in real time.
+
+    The position advances with `clock`, as if the audio was played, so that the
+    player behaves the same without any audio device, as on headless machines.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._audio: Audio | None = None
+        self._frame = 0
+        self._started_at: float | None = None
+
+    def start(self, audio: Audio, frame: int = 0) -> None:
+        self._audio = audio
+        self._frame = frame
+        self._started_at = self._clock()
+
+    def stop(self) -> None:
+        self._frame = self.position()
+        self._started_at = None
+
+    def position(self) -> int:
+        if self._audio is None or self._started_at is None:
+            return self._frame
+        elapsed = self._clock() - self._started_at
+        played = self._frame + int(elapsed * self._audio.sample_rate)
+        return min(played, self._audio.frame_count)
+
+    def is_active(self) -> bool:
+        return (
+            self._audio is not None
+            and self._started_at is not None
+            and self.position() < self._audio.frame_count
+        )
+
+
+class FileSink(NullSink):
+    """Sink writing the audio it is asked to play to a WAV file.
+
+    Every start overwrites the file with the audio from the starting frame on,
+    which lets the tests check what would have been heard.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(clock)
+        self.path = path
+
+    def start(self, audio: Audio, frame: int = 0) -> None:
+        with wave.open(str(self.path), "wb") as writer:
+            writer.setnchannels(audio.channels)
+            writer.setsampwidth(audio.sample_width)
+            writer.setframerate(audio.sample_rate)
+            writer.writeframes(audio.frames[frame * audio.frame_size :])
+        super().start(audio, frame)
+
+
+class Player:
+    """Play backing tracks through an audio sink.
+
+    The tracks are read with `loader`, which defaults to reading the whole file, and
+    decoded in memory. The time from a call to `play` to the sink starting is kept in
+    `latency`, and a warning is logged when it exceeds `latency_budget` seconds.
+    Tracks that are not WAV files are passed to `opener` instead, which defaults to
+    the default application of the system, and have no duration or position.
+    """
+
+    def __init__(
+        self,
+        sink: AudioSink,
+        loader: Callable[[Path], bytes] = Path.read_bytes,
+        latency_budget: float = DEFAULT_LATENCY_BUDGET,
+        timer: Callable[[], float] = time.perf_counter,
+        opener: Callable[[Path], None] = open_with_system_player,
+    ) -> None:
+        self.sink = sink
+        self.loader = loader
+        self.opener = opener
+        self.latency_budget = latency_budget
+        self.latency: float | None = None
+        self.track: Path | None = None
+        self._timer = timer
+        self._audio: Audio | None = None
+
+    @property
+    def duration(self) -> float:
+        """Duration of the current track in seconds, or 0 if there is none."""
+        return self._audio.duration if self._audio is not None else 0.0
+
+    @property
+    def position(self) -> float:
+        """Time being played in the current track, in seconds."""
+        if self._audio is None:
+            return 0.0
+        return self.sink.position() / self._audio.sample_rate
+
+    def is_playing(self) -> bool:
+        return self._audio is not None and self.sink.is_active()
+
+    def play(self, track: Path) -> None:
+        """Play a track from the beginning, replacing the current one.
+
+        Raises:
+            OSError: If the track cannot be read.
+            ValueError: If the WAV track is not a PCM WAV file.
+
+        """
+        if track.suffix.lower() != DECODED_SUFFIX:
+            self.sink.stop()
+            self._audio = None
+            self.latency = None
+            self.track = track
+            logger.info("Opening '{track}' in the system player", track=track.name)
+            self.opener(track)
+            return
+
+        requested_at = self._timer()
+        audio = decode_wave(self.loader(track))
+        self.sink.start(audio)
+        self.latency = self._timer() - requested_at
+        self._audio = audio
+        self.track = track
+
+        if self.latency > self.latency_budget:
+            logger.warning(
+                "Starting '{track}' took {latency:.0f} ms, over the budget of "
+                "{budget:.0f} ms",
+                track=track.name,
+                latency=self.latency * 1000,
+                budget=self.latency_budget * 1000,
+            )
+        else:
+            logger.debug(
+                "Started '{track}' in {latency:.1f} ms",
+                track=track.name,
+                latency=self.latency * 1000,
+            )
+
+    def stop(self) -> None:
+        """Stop playing, keeping the track to resume it with `seek`."""
+        self.sink.stop()
+
+    def seek(self, seconds: float) -> None:
+        """Play the current track from the given time, clamped to the track."""
+        if self._audio is None:
+            return
+        self.sink.start(self._audio, self._audio.frame_at(seconds))
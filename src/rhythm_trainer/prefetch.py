@@ -0,0 +1,196 @@
+"""Load the backing tracks of the upcoming exercises before they are played.
+
+The content of the tracks is kept in a `TrackCache`, bounded in memory and evicting
+the least recently used tracks first, which the player reads the tracks from. A
+`TrackPrefetcher` fills the cache on a background thread with the tracks of the
+exercises predicted to come next, so that playing one of them starts from memory
+instead of waiting for the disk or the network share.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from rhythm_trainer.logger import get_logger
+
+BYTES_PER_MB = 1024 * 1024
+
+logger = get_logger(__name__)
+
+
+class TrackCache:
+    """Least recently used cache of the content of backing tracks.
+
+    The cache holds at most `max_bytes` bytes of tracks, and a track larger than
+    that is never cached. `get` counts a hit when the track was already loaded, or
+    was being prefetched and only had to be waited for, and a miss when it had to be
+    read, so that `hit_rate` measures how often the predictions were right. The cache
+    is safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        loader: Callable[[Path], bytes] = Path.read_bytes,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Path, bytes] = OrderedDict()
+        self._size = 0
+        self._loading: dict[Path, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, track: object) -> bool:
+        with self._lock:
+            return track in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Number of bytes held in the cache."""
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the `get` calls served from memory, or 0 before any call."""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def get(self, track: Path) -> bytes:
+        """Return the content of a track, reading and caching it if needed.
+
+        Raises:
+            OSError: If the track is not cached and cannot be read.
+
+        """
+        data = self._lookup(track)
+        if data is None:
+            with self._lock:
+                loading = self._loading.get(track)
+            if loading is not None:
+                loading.wait()
+                data = self._lookup(track)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+            return data
+
+        with self._lock:
+            self.misses += 1
+        logger.debug("Backing track cache miss for '{track}'", track=track.name)
+        data = self.loader(track)
+        self._store(track, data)
+        return data
+
+    def prefetch(self, track: Path) -> None:
+        """Read a track into the cache, or mark it as recently used if it is cached.
+
+        Raises:
+            OSError: If the track cannot be read.
+
+        """
+        with self._lock:
+            if track in self._entries:
+                self._entries.move_to_end(track)
+                return
+            if track in self._loading:
+                return
+            loading = self._loading[track] = threading.Event()
+
+        try:
+            self._store(track, self.loader(track))
+        finally:
+            with self._lock:
+                del self._loading[track]
+            loading.set()
+
+    def track_size(self, track: Path) -> int:
+        """Return the size of a track, without reading it if it is not cached."""
+        with self._lock:
+            data = self._entries.get(track)
+        return len(data) if data is not None else track.stat().st_size
+
+    def clear(self) -> None:
+        """Drop every cached track, for instance after the tracks changed on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _lookup(self, track: Path) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(track)
+            if data is not None:
+                self._entries.move_to_end(track)
+            return data
+
+    def _store(self, track: Path, data: bytes) -> None:
+        """Cache a track, evicting the least recently used ones to make room."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(track, None)
+            if previous is not None:
+                self._size -= len(previous)
+            while self._entries and self._size + len(data) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+            self._entries[track] = data
+            self._size += len(data)
+
+
+class TrackPrefetcher:
+    """Fill a track cache on a background thread.
+
+    `schedule` replaces the tracks still to be prefetched with new ones, given from
+    the most to the least likely to be played. Only the first tracks that fit in the
+    cache together are loaded, so that loading the less likely tracks never evicts
+    the more likely ones.
+    """
+
+    def __init__(self, cache: TrackCache) -> None:
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="track-prefetch")
+        self._pending: Future[None] | None = None
+        self._generation = 0
+
+    def schedule(self, tracks: Sequence[Path]) -> None:
+        """Prefetch the given tracks, abandoning the previously scheduled ones."""
+        self._generation += 1
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = self._executor.submit(
+            self._prefetch, list(dict.fromkeys(tracks)), self._generation
+        )
+
+    def wait(self) -> None:
+        """Block until the scheduled tracks have been prefetched."""
+        if self._pending is not None and not self._pending.cancelled():
+            self._pending.result()
+
+    def close(self) -> None:
+        """Stop prefetching, without waiting for the track being read."""
+        self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prefetch(self, tracks: list[Path], generation: int) -> None:
+        budget = self.cache.max_bytes
+        for track in tracks:
+            if generation != self._generation:
+                return  # Superseded by newer predictions
+            try:
+                size = self.cache.track_size(track)
+                if size > budget:
+                    return
+                budget -= size
+                self.cache.prefetch(track)
+            except OSError as e:
+                logger.warning(
+                    "Could not prefetch '{track}': {error}", track=track.name, error=e
+                )
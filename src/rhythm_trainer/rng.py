@@ -0,0 +1,83 @@
+"""Random number generators used to draw exercises.
+
+Every draw goes through an explicit `random.Random` generator instead of the global
+`random` module, so that a sequence of draws can be reproduced from a seed, and a
+generator can be saved and restored to resume exactly where it stopped.
+"""
+
+import random
+from typing import Any
+
+import numpy as np
+
+from rhythm_trainer.logger import get_logger
+
+logger = get_logger(__name__)
+
+RNG_STATE_VERSION = 1
+
+
+def create_rng(seed: int | None = None) -> random.Random:
+    """Return a new generator seeded with `seed`, or with OS entropy if it is None."""
+    return random.Random(seed)
+
+
+def spawn_rngs(seed: int | None, count: int) -> list[random.Random]:
+    """Return `count` generators with independent streams derived from `seed`.
+
+    The streams are derived with a NumPy `SeedSequence`, so they do not overlap even
+    though they come from the same seed, which makes them suitable for parallel
+    simulations. With a None seed, the streams are derived from OS entropy.
+    """
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [
+        random.Random(int.from_bytes(child.generate_state(4).tobytes(), "little"))
+        for child in children
+    ]
+
+
+def numpy_rng(rng: random.Random) -> np.random.Generator:
+    """Return a NumPy generator seeded from `rng`.
+
+    This is how vectorized draws, such as planning a session, stay reproducible from
+    the state of the generator used for single draws.
+    """
+    return np.random.default_rng(rng.getrandbits(128))
+
+
+def get_rng_state(rng: random.Random, seed: int | None) -> dict[str, Any]:
+    """Return the state of a generator as JSON-serializable data.
+
+    The seed the generator was created with is saved along with it, so that a
+    different seed in the configuration starts a new stream instead of resuming.
+    """
+    version, internal_state, gauss_next = rng.getstate()
+    return {
+        "version": RNG_STATE_VERSION,
+        "seed": seed,
+        "state": [version, list(internal_state), gauss_next],
+    }
+
+
+def restore_rng(saved: dict[str, Any] | None, seed: int | None) -> random.Random:
+    """Return a generator resuming from a saved state, or a new one.
+
+    The saved state is only used if it was created with the same seed. A state that
+    cannot be restored is logged and ignored.
+    """
+    rng = create_rng(seed)
+    if saved is None or saved.get("seed") != seed:
+        return rng
+
+    try:
+        if saved["version"] != RNG_STATE_VERSION:
+            error_message = f"Unsupported version {saved['version']}"
+            raise ValueError(error_message)
+        version, internal_state, gauss_next = saved["state"]
+        rng.setstate((version, tuple(internal_state), gauss_next))
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Could not restore the random generator: {error}", error=e)
+        return create_rng(seed)
+
+    logger.debug("Restored the random generator state")
+    return rng
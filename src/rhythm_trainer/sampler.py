@@ -0,0 +1,367 @@
+import random
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from rhythm_trainer.config import SamplerEngine
+from rhythm_trainer.logger import get_logger
+
+MAX_REJECTIONS = 32  # Alias draws rejected for masking before scanning the weights
+
+logger = get_logger(__name__)
+
+
+class Sampler(ABC):
+    """Base class of the weighted random samplers of exercises.
+
+    It keeps the exercises, their weights and the set of masked exercises, while the
+    subclasses implement the data structure used to draw from them. Exercises can be
+    masked, which removes them from the distribution without forgetting their weight,
+    so that recently picked exercises can be excluded from a draw instead of being
+    rejected after the fact. Draws use the given generator, or a new one seeded from
+    OS entropy.
+    """
+
+    def __init__(
+        self,
+        exercises: Iterable[int],
+        weights: Iterable[int],
+        rng: random.Random | None = None,
+    ) -> None:
+        self.rng = rng if rng is not None else random.Random()
+        self._exercises: list[int] = list(exercises)
+        self._weights: list[int] = list(weights)
+        if len(self._exercises) != len(self._weights):
+            error_message = (
+                f"Got {len(self._exercises)} exercises but {len(self._weights)} "
+                f"weights."
+            )
+            logger.error(error_message)
+            raise ValueError(error_message)
+        if any(weight < 0 for weight in self._weights):
+            error_message = "Weights must be non-negative."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+        self._positions = {
+            exercise: position for position, exercise in enumerate(self._exercises)
+        }
+        self._masked: set[int] = set()
+        self._build()
+
+    @abstractmethod
+    def _build(self) -> None:
+        """Build the data structure used to draw from the current weights."""
+
+    def __len__(self) -> int:
+        return len(self._exercises)
+
+    def __contains__(self, exercise: object) -> bool:
+        return exercise in self._positions
+
+    @property
+    def exercises(self) -> list[int]:
+        """Return a copy of the exercises handled by the sampler."""
+        return list(self._exercises)
+
+    @property
+    def weights(self) -> list[int]:
+        """Return a copy of the current weights, in the same order as the exercises."""
+        return list(self._weights)
+
+    @property
+    @abstractmethod
+    def total(self) -> int:
+        """Return the sum of the weights of all the exercises that are not masked."""
+
+    def weight(self, exercise: int) -> int:
+        """Return the current weight of the given exercise."""
+        return self._weights[self._position(exercise)]
+
+    @abstractmethod
+    def update(self, exercise: int, weight: int) -> None:
+        """Set the weight of the given exercise."""
+
+    @abstractmethod
+    def mask(self, exercise: int) -> None:
+        """Exclude the given exercise from draws while keeping its weight."""
+
+    @abstractmethod
+    def unmask(self, exercise: int) -> None:
+        """Make a previously masked exercise available to draws again."""
+
+    def is_masked(self, exercise: int) -> bool:
+        """Return whether the given exercise is currently excluded from draws."""
+        return self._position(exercise) in self._masked
+
+    @contextmanager
+    def masked(self, exercises: Iterable[int]) -> Iterator[None]:
+        """Temporarily mask the given exercises for the duration of the context."""
+        newly_masked = [ex for ex in exercises if not self.is_masked(ex)]
+        for exercise in newly_masked:
+            self.mask(exercise)
+        try:
+            yield
+        finally:
+            for exercise in newly_masked:
+                self.unmask(exercise)
+
+    @abstractmethod
+    def draw(self) -> int:
+        """Draw an exercise with probability proportional to its weight.
+
+        Masked exercises are never drawn.
+
+        Raises:
+            ValueError: If all the weights of the unmasked exercises are zero.
+
+        """
+
+    def _check_weight(self, weight: int) -> None:
+        if weight < 0:
+            error_message = f"Weight must be non-negative, got {weight}."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+    def _check_total(self) -> None:
+        if self.total <= 0:
+            error_message = "Cannot draw an exercise when all weights are zero."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+    def _position(self, exercise: int) -> int:
+        try:
+            return self._positions[exercise]
+        except KeyError:
+            error_message = f"Exercise {exercise} is not handled by this sampler."
+            logger.error(error_message)
+            raise KeyError(error_message) from None
+
+
+class WeightedSampler(Sampler):
+    """Weighted random sampler backed by a Fenwick (binary indexed) tree.
+
+    The tree stores the weight of every exercise so that both drawing an exercise
+    proportionally to its weight and changing a single weight cost O(log n), instead
+    of rebuilding the cumulative weight table on every draw. Masking an exercise
+    removes its weight from the tree, also in O(log n).
+    """
+
+    def _build(self) -> None:
+        """Build the Fenwick tree from the current weights in O(n)."""
+        size = len(self._weights)
+        tree = [0, *self._weights]
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._total = sum(self._weights)
+        # Highest power of two not exceeding the size, used to descend the tree
+        self._top_bit = 1 << (size.bit_length() - 1) if size else 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def update(self, exercise: int, weight: int) -> None:
+        """Set the weight of the given exercise in O(log n)."""
+        self._check_weight(weight)
+        position = self._position(exercise)
+        delta = weight - self._weights[position]
+        self._weights[position] = weight
+        if position not in self._masked:
+            self._add(position, delta)
+
+    def mask(self, exercise: int) -> None:
+        position = self._position(exercise)
+        if position not in self._masked:
+            self._masked.add(position)
+            self._add(position, -self._weights[position])
+
+    def unmask(self, exercise: int) -> None:
+        position = self._position(exercise)
+        if position in self._masked:
+            self._masked.remove(position)
+            self._add(position, self._weights[position])
+
+    def _add(self, position: int, delta: int) -> None:
+        """Add delta to the tree entry of the exercise at the given position."""
+        if delta == 0:
+            return
+
+        self._total += delta
+        i = position + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def draw(self) -> int:
+        """Draw an exercise with probability proportional to its weight in O(log n).
+
+        Masked exercises are never drawn.
+
+        Raises:
+            ValueError: If all the weights of the unmasked exercises are zero.
+
+        """
+        self._check_total()
+        return self._exercises[self._find(self.rng.random() * self._total)]
+
+    def _find(self, target: float) -> int:
+        """Return the position of the first exercise whose prefix sum exceeds target."""
+        position = 0
+        bit = self._top_bit
+        while bit:
+            candidate = position + bit
+            if candidate < len(self._tree) and self._tree[candidate] <= target:
+                position = candidate
+                target -= self._tree[candidate]
+            bit >>= 1
+        # Floating point rounding can push the target up to the total weight, which
+        # overshoots the last exercise: step back to the last drawable one
+        position = min(position, len(self._weights) - 1)
+        while self._weights[position] == 0 or position in self._masked:
+            position -= 1
+        return position
+
+
+class AliasSampler(Sampler):
+    """Weighted random sampler backed by a Vose alias table.
+
+    Drawing an exercise costs O(1): a single random number selects a column of the
+    table and decides between the column's exercise and its alias. Changing a weight
+    only marks the table as dirty, and the table is rebuilt in O(n) by the next draw,
+    so that a burst of weight changes results in a single rebuild.
+
+    Masking an exercise does not touch the table: masked exercises drawn from it are
+    rejected and drawn again. If too many draws in a row are rejected, because the
+    masked exercises carry most of the weight, the exercise is drawn by scanning the
+    weights of the unmasked exercises instead. Both ways follow the weights of the
+    unmasked exercises exactly.
+    """
+
+    def _build(self) -> None:
+        self._total_weight = sum(self._weights)
+        self._masked_weight = sum(self._weights[p] for p in self._masked)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Rebuild the alias table from the current weights in O(n)."""
+        size = len(self._weights)
+        probabilities = [1.0] * size
+        aliases = list(range(size))
+        if self._total_weight > 0:
+            scaled = [weight * size / self._total_weight for weight in self._weights]
+            small = [i for i, p in enumerate(scaled) if p < 1.0]
+            large = [i for i, p in enumerate(scaled) if p >= 1.0]
+            while small and large:
+                less, more = small.pop(), large.pop()
+                probabilities[less] = scaled[less]
+                aliases[less] = more
+                scaled[more] += scaled[less] - 1.0
+                (small if scaled[more] < 1.0 else large).append(more)
+            # Whatever is left is at probability 1 up to rounding errors, except for
+            # exercises with a zero weight which must never be drawn from their column
+            for i in small + large:
+                if self._weights[i] == 0:
+                    probabilities[i] = 0.0
+                    aliases[i] = next(j for j, w in enumerate(self._weights) if w > 0)
+
+        self._probabilities = probabilities
+        self._aliases = aliases
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """Return whether the alias table must be rebuilt before the next draw."""
+        return self._dirty
+
+    @property
+    def total(self) -> int:
+        return self._total_weight - self._masked_weight
+
+    def update(self, exercise: int, weight: int) -> None:
+        """Set the weight of the given exercise, marking the table as dirty."""
+        self._check_weight(weight)
+        position = self._position(exercise)
+        delta = weight - self._weights[position]
+        if delta == 0:
+            return
+
+        self._weights[position] = weight
+        self._total_weight += delta
+        if position in self._masked:
+            self._masked_weight += delta
+        self._dirty = True
+
+    def mask(self, exercise: int) -> None:
+        position = self._position(exercise)
+        if position not in self._masked:
+            self._masked.add(position)
+            self._masked_weight += self._weights[position]
+
+    def unmask(self, exercise: int) -> None:
+        position = self._position(exercise)
+        if position in self._masked:
+            self._masked.remove(position)
+            self._masked_weight -= self._weights[position]
+
+    def draw(self) -> int:
+        """Draw an exercise with probability proportional to its weight in O(1).
+
+        The alias table is rebuilt first if any weight changed since the last draw.
+        Masked exercises are never drawn.
+
+        Raises:
+            ValueError: If all the weights of the unmasked exercises are zero.
+
+        """
+        self._check_total()
+        if self._dirty:
+            self.rebuild()
+
+        size = len(self._weights)
+        for _ in range(MAX_REJECTIONS):
+            column, fraction = divmod(self.rng.random() * size, 1.0)
+            position = min(int(column), size - 1)
+            if fraction >= self._probabilities[position]:
+                position = self._aliases[position]
+            if position not in self._masked:
+                return self._exercises[position]
+
+        return self._exercises[self._scan()]
+
+    def _scan(self) -> int:
+        """Draw the position of an unmasked exercise by scanning the weights."""
+        target = self.rng.random() * self.total
+        last = 0
+        for position, weight in enumerate(self._weights):
+            if weight == 0 or position in self._masked:
+                continue
+            if target < weight:
+                return position
+            target -= weight
+            last = position
+        # Floating point rounding can leave the target just above the total weight
+        return last
+
+
+def create_sampler(
+    engine: SamplerEngine,
+    exercises: Iterable[int],
+    weights: Iterable[int],
+    rng: random.Random | None = None,
+) -> Sampler:
+    """Create the sampler of the given engine for the given exercises and weights."""
+    if engine == SamplerEngine.FENWICK:
+        return WeightedSampler(exercises, weights, rng)
+    if engine == SamplerEngine.ALIAS:
+        return AliasSampler(exercises, weights, rng)
+
+    error_message = (
+        f"Unsupported sampler engine: {engine}. "
+        f"Use one of {[f'SamplerEngine.{e.name}' for e in SamplerEngine]}"
+    )
+    logger.error(error_message)
+    raise ValueError(error_message)
@@ -0,0 +1,403 @@
+"""Simulate learners practicing with the weighted strategy, without the GUI.
+
+Each simulated learner has a skill on every exercise, which is the probability of
+playing it well and which grows every time the exercise is practiced. Feedback is
+drawn from the skills and fed to the weight update rule, so that changes to the rule
+can be evaluated on how fast learners master every exercise.
+
+Run with `python -m rhythm_trainer.simulate --help` to see the options.
+"""
+
+import argparse
+import json
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from rhythm_trainer.config import DEFAULT_RECENT_WINDOW, Config, SamplerEngine
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.rng import spawn_rngs
+from rhythm_trainer.strategies import (
+    STRATEGIES,
+    Feedback,
+    create_strategy,
+    feedback_deltas,
+)
+
+logger = get_logger(__name__)
+
+DEFAULT_LEARNERS = 1_000
+DEFAULT_EXERCISES = 90
+DEFAULT_STEPS = 4_000
+
+
+@dataclass(frozen=True)
+class LearnerModel:
+    """Parameters of the skill curves of the simulated learners.
+
+    The initial skills follow a beta distribution with mean `initial_skill`, whose
+    spread decreases as `concentration` increases. Practicing an exercise moves its
+    skill towards one by a fraction of the remaining gap, the learning rate, which is
+    `learning_rate` scaled by a log-normal factor of parameter `rate_spread` drawn for
+    each learner and exercise. At every step, all skills fall back towards their
+    initial value by a fraction `forgetting_rate` of the gap. An exercise is mastered
+    once its skill reaches `mastery_threshold`.
+    """
+
+    initial_skill: float = 0.3
+    concentration: float = 4.0
+    learning_rate: float = 0.2
+    rate_spread: float = 0.5
+    forgetting_rate: float = 0.0
+    mastery_threshold: float = 0.9
+
+
+@dataclass(frozen=True)
+class WeightRule:
+    """Weight update rule of the weighted strategy, with tunable amounts.
+
+    See `feedback_delta`. The resulting weights are never lower than `min_weight`,
+    and the defaults are the rule of `WeightedStrategy`.
+    """
+
+    increment: int = 1
+    decrement: int = 1
+    min_weight: int = 1
+
+    def apply(self, weights: np.ndarray, bad: np.ndarray) -> np.ndarray:
+        """Return the weights after the given feedback."""
+        delta = feedback_deltas(
+            weights, bad, self.increment, self.decrement, self.min_weight
+        )
+        return np.maximum(np.maximum(weights, self.min_weight) + delta, self.min_weight)
+
+
+class Learners:
+    """Skills of a population of learners on a catalog of exercises.
+
+    The skills are stored in a `(learners, exercises)` array, so that every learner
+    practices one exercise at each step in a single vectorized operation.
+    """
+
+    def __init__(
+        self,
+        model: LearnerModel,
+        learners: int,
+        exercises: int,
+        rng: np.random.Generator,
+    ) -> None:
+        if learners < 1 or exercises < 1:
+            error_message = (
+                f"At least one learner and one exercise are needed, got {learners} "
+                f"learners and {exercises} exercises."
+            )
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+        shape = (learners, exercises)
+        self.model = model
+        self.rng = rng
+        self.initial_skills = rng.beta(
+            model.initial_skill * model.concentration,
+            (1 - model.initial_skill) * model.concentration,
+            size=shape,
+        )
+        self.skills = self.initial_skills.copy()
+        self.learning_rates = np.minimum(
+            model.learning_rate * rng.lognormal(0.0, model.rate_spread, size=shape),
+            1.0,
+        )
+        self._rows = np.arange(learners)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.skills.shape
+
+    def practice(self, picks: np.ndarray) -> np.ndarray:
+        """Have each learner practice the exercise at the given index.
+
+        Returns whether each learner played their exercise badly.
+        """
+        skills = self.skills[self._rows, picks]
+        bad = self.rng.random(len(picks)) >= skills
+        self.skills[self._rows, picks] = skills + self.learning_rates[
+            self._rows, picks
+        ] * (1 - skills)
+        if self.model.forgetting_rate > 0:
+            self.skills -= self.model.forgetting_rate * (
+                self.skills - self.initial_skills
+            )
+        return bad
+
+    def mastered(self) -> np.ndarray:
+        """Return which exercises each learner has mastered."""
+        return self.skills >= self.model.mastery_threshold
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """Outcome of a simulation.
+
+    `mastery_steps` and `coverage_steps` hold, for each learner, the number of steps
+    after which every exercise was mastered, respectively practiced at least once, or
+    -1 if that never happened. `mastered_fraction` and `coverage` hold, for each step,
+    the mean fraction of exercises mastered, respectively practiced, by the learners.
+    """
+
+    learners: int
+    exercises: int
+    steps: int
+    mastery_steps: np.ndarray
+    coverage_steps: np.ndarray
+    mastered_fraction: np.ndarray
+    coverage: np.ndarray
+
+    def summary(self) -> dict[str, Any]:
+        """Return the main statistics as JSON-serializable data."""
+
+        def percentile(values: np.ndarray, q: float) -> float | None:
+            reached = values[values >= 0]
+            if len(reached) == 0:
+                return None
+            return float(np.percentile(reached, q))
+
+        return {
+            "learners": self.learners,
+            "exercises": self.exercises,
+            "steps": self.steps,
+            "mastered_learners": float(np.mean(self.mastery_steps >= 0)),
+            "mastery_steps_p50": percentile(self.mastery_steps, 50),
+            "mastery_steps_p90": percentile(self.mastery_steps, 90),
+            "covered_learners": float(np.mean(self.coverage_steps >= 0)),
+            "coverage_steps_p50": percentile(self.coverage_steps, 50),
+            "coverage_steps_p90": percentile(self.coverage_steps, 90),
+            "final_mastered_fraction": float(self.mastered_fraction[-1]),
+            "final_coverage": float(self.coverage[-1]),
+        }
+
+
+def _run(
+    learners: Learners,
+    steps: int,
+    pick: Callable[[], np.ndarray],
+    update: Callable[[np.ndarray, np.ndarray], None],
+) -> SimulationResult:
+    """Run the pick/practice/update cycle and track mastery and coverage."""
+    n_learners, n_exercises = learners.shape
+    practiced = np.zeros(learners.shape, dtype=bool)
+    mastery_steps = np.full(n_learners, -1)
+    coverage_steps = np.full(n_learners, -1)
+    mastered_fraction = np.empty(steps)
+    coverage = np.empty(steps)
+
+    for step in range(steps):
+        picks = pick()
+        bad = learners.practice(picks)
+        update(picks, bad)
+        practiced[np.arange(n_learners), picks] = True
+
+        mastered = learners.mastered()
+        mastered_counts = mastered.sum(axis=1)
+        practiced_counts = practiced.sum(axis=1)
+        mastery_steps[(mastery_steps < 0) & (mastered_counts == n_exercises)] = step + 1
+        coverage_steps[(coverage_steps < 0) & (practiced_counts == n_exercises)] = (
+            step + 1
+        )
+        mastered_fraction[step] = mastered_counts.mean() / n_exercises
+        coverage[step] = practiced_counts.mean() / n_exercises
+
+    return SimulationResult(
+        learners=n_learners,
+        exercises=n_exercises,
+        steps=steps,
+        mastery_steps=mastery_steps,
+        coverage_steps=coverage_steps,
+        mastered_fraction=mastered_fraction,
+        coverage=coverage,
+    )
+
+
+def simulate(
+    model: LearnerModel,
+    learners: int = DEFAULT_LEARNERS,
+    exercises: int = DEFAULT_EXERCISES,
+    steps: int = DEFAULT_STEPS,
+    recent_window: int = DEFAULT_RECENT_WINDOW,
+    weights: ArrayLike | None = None,
+    rule: WeightRule | None = None,
+    seed: int | np.random.SeedSequence = 0,
+) -> SimulationResult:
+    """Simulate learners practicing with the weighted strategy, all at once.
+
+    This reproduces `WeightedStrategy` with NumPy arrays holding the weights of every
+    learner: at each step, every learner draws an exercise proportionally to its
+    weights, excluding their `recent_window` most recent picks, and the weight of the
+    exercise is updated with `rule`, which defaults to the rule of `WeightedStrategy`.
+    The initial `weights`, one per exercise and all positive, default to one.
+
+    Since weights never drop to zero, a window covering every exercise behaves like
+    a window covering all but one, which is how it is handled here.
+    """
+    rng = np.random.default_rng(seed)
+    population = Learners(model, learners, exercises, rng)
+
+    if weights is None:
+        weights = np.ones(exercises, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.int64)
+    if rule is None:
+        rule = WeightRule()
+    if rule.min_weight < 1 or rule.increment < 0 or rule.decrement < 0:
+        error_message = f"Invalid weight rule: {rule}."
+        logger.error(error_message)
+        raise ValueError(error_message)
+    if weights.shape != (exercises,) or np.any(weights < 1):
+        error_message = (
+            f"Expected {exercises} positive initial weights, got {weights.tolist()}."
+        )
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    all_weights = np.tile(weights, (learners, 1))
+    window = min(max(recent_window, 0), exercises - 1)
+    recent = np.empty((learners, window), dtype=np.int64)
+    rows = np.arange(learners)
+    step = 0
+
+    def pick() -> np.ndarray:
+        masked = all_weights.copy()
+        if window > 0:
+            np.put_along_axis(masked, recent[:, : min(step, window)], 0, axis=1)
+        cumulative = np.cumsum(masked, axis=1)
+        targets = rng.integers(0, cumulative[:, -1])
+        return (cumulative <= targets[:, None]).sum(axis=1)
+
+    def update(picks: np.ndarray, bad: np.ndarray) -> None:
+        nonlocal step
+        current = all_weights[rows, picks]
+        all_weights[rows, picks] = rule.apply(current, bad)
+        if window > 0:
+            recent[:, step % window] = picks
+        step += 1
+
+    return _run(population, steps, pick, update)
+
+
+def simulate_strategy(
+    strategy_name: str,
+    config: Config,
+    model: LearnerModel,
+    learners: int = DEFAULT_LEARNERS,
+    exercises: int = DEFAULT_EXERCISES,
+    steps: int = DEFAULT_STEPS,
+    seed: int = 0,
+) -> SimulationResult:
+    """Simulate learners each practicing with their own instance of a strategy.
+
+    Unlike `simulate`, this drives any registered strategy, one learner at a time, so it
+    is much slower. Each learner draws from an independent random stream. It is meant
+    for strategies without a vectorized version, and to check the vectorized version
+    against the real one.
+    """
+    rng = np.random.default_rng(seed)
+    population = Learners(model, learners, exercises, rng)
+    catalog = range(1, exercises + 1)
+    strategies = [
+        create_strategy(strategy_name, catalog, [1] * exercises, config, learner_rng)
+        for learner_rng in spawn_rngs(seed, learners)
+    ]
+
+    def pick() -> np.ndarray:
+        return np.array([strategy.draw() - 1 for strategy in strategies])
+
+    def update(picks: np.ndarray, bad: np.ndarray) -> None:
+        for strategy, index, is_bad in zip(strategies, picks, bad, strict=True):
+            strategy.update(int(index) + 1, Feedback.BAD if is_bad else Feedback.GOOD)
+
+    return _run(population, steps, pick, update)
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    """Format a summary as one `name: value` line per statistic."""
+    width = max(len(name) for name in summary)
+    return "\n".join(f"{name:<{width}}  {value}" for name, value in summary.items())
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--learners", type=int, default=DEFAULT_LEARNERS)
+    parser.add_argument("--exercises", type=int, default=DEFAULT_EXERCISES)
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS)
+    parser.add_argument("--recent-window", type=int, default=DEFAULT_RECENT_WINDOW)
+    parser.add_argument("--increment", type=int, default=1)
+    parser.add_argument("--decrement", type=int, default=1)
+    parser.add_argument("--min-weight", type=int, default=1)
+    parser.add_argument(
+        "--strategy",
+        choices=sorted(STRATEGIES),
+        help="drive this strategy for each learner instead of the vectorized "
+        "weighted strategy, ignoring the weight rule options",
+    )
+    parser.add_argument(
+        "--sampler-engine",
+        choices=[engine.value for engine in SamplerEngine],
+        default=SamplerEngine.FENWICK.value,
+    )
+    defaults = LearnerModel()
+    parser.add_argument("--initial-skill", type=float, default=defaults.initial_skill)
+    parser.add_argument("--concentration", type=float, default=defaults.concentration)
+    parser.add_argument("--learning-rate", type=float, default=defaults.learning_rate)
+    parser.add_argument("--rate-spread", type=float, default=defaults.rate_spread)
+    parser.add_argument(
+        "--forgetting-rate", type=float, default=defaults.forgetting_rate
+    )
+    parser.add_argument(
+        "--mastery-threshold", type=float, default=defaults.mastery_threshold
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print a JSON object")
+    args = parser.parse_args(argv)
+
+    model = LearnerModel(
+        initial_skill=args.initial_skill,
+        concentration=args.concentration,
+        learning_rate=args.learning_rate,
+        rate_spread=args.rate_spread,
+        forgetting_rate=args.forgetting_rate,
+        mastery_threshold=args.mastery_threshold,
+    )
+    if args.strategy is None:
+        result = simulate(
+            model,
+            args.learners,
+            args.exercises,
+            args.steps,
+            args.recent_window,
+            rule=WeightRule(args.increment, args.decrement, args.min_weight),
+            seed=args.seed,
+        )
+    else:
+        config = Config(
+            csv_path=Path(),
+            recent_window=args.recent_window,
+            sampler_engine=SamplerEngine(args.sampler_engine),
+        )
+        result = simulate_strategy(
+            args.strategy,
+            config,
+            model,
+            args.learners,
+            args.exercises,
+            args.steps,
+            args.seed,
+        )
+
+    summary = result.summary()
+    print(json.dumps(summary) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
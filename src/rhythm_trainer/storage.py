@@ -0,0 +1,641 @@
+import csv
+import json
+import mmap
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Protocol
+
+from rhythm_trainer.config import MAX_EXERCISES, Config, StorageBackend
+from rhythm_trainer.exercises import (
+    CSV_HEADER,
+    TOUCHED_COLUMN,
+    FeedbackEvent,
+    append_feedback,
+    apply_delta,
+    compact_journal,
+    get_exercises_and_weights,
+    get_folding_paths,
+    get_journal_path,
+    get_last_touched,
+)
+from rhythm_trainer.logger import get_logger
+
+SQLITE_SUFFIX = ".sqlite3"
+BINARY_SUFFIX = ".weights"
+STATE_SUFFIX = ".json"
+BINARY_MAGIC = b"RTWB"
+BINARY_VERSION = 2
+# Magic, version, reserved and number of slots, followed by one uint32 weight per
+# exercise, then by one uint32 timestamp per exercise (only the weights in version 1)
+BINARY_HEADER = struct.Struct("<4sHHI")
+BINARY_SLOT = struct.Struct("<I")
+BINARY_TOUCHED = struct.Struct("<I")
+SQLITE_TIMEOUT = 30.0  # Seconds to wait for a lock held by another connection
+# Exceptions that weight stores may raise when reading or writing fails
+STORAGE_ERRORS = (OSError, sqlite3.Error)
+
+logger = get_logger(__name__)
+
+
+class WeightStore(Protocol):
+    """Persistent storage for the weights of the exercises."""
+
+    def load(
+        self,
+        first_exercise: int,
+        last_exercise: int,
+    ) -> tuple[list[int], list[int]]:
+        """Return the exercises in the given range and their weights."""
+        ...
+
+    def load_touched(self, first_exercise: int, last_exercise: int) -> dict[int, float]:
+        """Return when the exercises in the given range last received feedback.
+
+        The times are in seconds since the epoch, and exercises that never received
+        feedback are left out.
+        """
+        ...
+
+    def append(self, events: Iterable[FeedbackEvent]) -> None:
+        """Persist the weight changes described by the given feedback events."""
+        ...
+
+    def compact(self) -> None:
+        """Fold any pending changes into the main storage."""
+        ...
+
+    def load_state(self, name: str) -> dict[str, Any] | None:
+        """Return the state saved under the given name, or None if there is none."""
+        ...
+
+    def save_state(self, name: str, state: dict[str, Any]) -> None:
+        """Save JSON-serializable state alongside the weights, under the given name.
+
+        This is used for the state of the random generator and of the sampling
+        strategy.
+        """
+        ...
+
+    def close(self) -> None:
+        """Release the resources held by the store."""
+        ...
+
+
+class CsvWeightStore:
+    """Weight store backed by a CSV snapshot plus an append-only feedback journal."""
+
+    def __init__(self, csv_path: Path, total_exercises: int = MAX_EXERCISES) -> None:
+        self.csv_path = csv_path
+        self.total_exercises = total_exercises
+
+    def load(
+        self,
+        first_exercise: int,
+        last_exercise: int,
+    ) -> tuple[list[int], list[int]]:
+        """Return the exercises in the given range and their weights."""
+        return get_exercises_and_weights(self.csv_path, first_exercise, last_exercise)
+
+    def load_touched(self, first_exercise: int, last_exercise: int) -> dict[int, float]:
+        """Return the times of the last feedback from the CSV file and the journal."""
+        return get_last_touched(self.csv_path, first_exercise, last_exercise)
+
+    def append(self, events: Iterable[FeedbackEvent]) -> None:
+        """Append the feedback events to the journal."""
+        append_feedback(self.csv_path, events, self.total_exercises)
+
+    def compact(self) -> None:
+        """Fold the feedback journal into the CSV file."""
+        compact_journal(self.csv_path, self.total_exercises)
+
+    def load_state(self, name: str) -> dict[str, Any] | None:
+        """Return the state saved in its JSON file next to the CSV file."""
+        return _read_state(get_state_path(self.csv_path, name))
+
+    def save_state(self, name: str, state: dict[str, Any]) -> None:
+        """Save the state to its JSON file next to the CSV file."""
+        _write_state(get_state_path(self.csv_path, name), state)
+
+    def close(self) -> None:
+        """Do nothing, as the CSV store does not keep any file open."""
+
+
+class SqliteWeightStore:
+    """Weight store backed by an SQLite database keyed by exercise.
+
+    The database runs in WAL mode, so readers never block the writer and vice versa.
+    Every operation opens its own short-lived connection, which makes the store safe
+    to use from the background persistence thread.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS weights ("
+                "exercise INTEGER PRIMARY KEY, "
+                "weight INTEGER NOT NULL, "
+                "touched REAL"
+                ")",
+            )
+            columns = {
+                row[1] for row in connection.execute("PRAGMA table_info(weights)")
+            }
+            if "touched" not in columns:
+                # Databases created before the time of the last feedback was stored
+                connection.execute("ALTER TABLE weights ADD COLUMN touched REAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "name TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL"
+                ")",
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit, or roll back on error, when done."""
+        with (
+            closing(sqlite3.connect(self.db_path, timeout=SQLITE_TIMEOUT)) as conn,
+            conn,
+        ):
+            yield conn
+
+    def load(
+        self,
+        first_exercise: int,
+        last_exercise: int,
+    ) -> tuple[list[int], list[int]]:
+        """Return the exercises in the given range and their weights.
+
+        Exercises missing from the database get a weight of 1, and the minimum weight
+        is set to 1 as for the CSV file.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT exercise, weight FROM weights "
+                "WHERE exercise BETWEEN ? AND ? ORDER BY exercise",
+                (first_exercise, last_exercise),
+            )
+            stored = dict(rows.fetchall())
+
+        exercises = list(range(first_exercise, last_exercise + 1))
+        weights = [max(stored.get(exercise, 1), 1) for exercise in exercises]
+        return exercises, weights
+
+    def load_touched(self, first_exercise: int, last_exercise: int) -> dict[int, float]:
+        """Return the times of the last feedback stored in the database."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT exercise, touched FROM weights "
+                "WHERE exercise BETWEEN ? AND ? AND touched IS NOT NULL",
+                (first_exercise, last_exercise),
+            )
+            return dict(rows.fetchall())
+
+    def append(self, events: Iterable[FeedbackEvent]) -> None:
+        """Apply the feedback events to their rows in a single transaction."""
+        # Same rule as exercises.apply_delta, so both backends agree on the weights
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO weights (exercise, weight, touched) "
+                "VALUES (?, max(1 + ?, 1), ?) "
+                "ON CONFLICT (exercise) DO UPDATE "
+                "SET weight = max(max(weight, 1) + ?, 1), touched = excluded.touched",
+                (
+                    (event.exercise, event.delta, event.timestamp, event.delta)
+                    for event in events
+                ),
+            )
+
+    def set_weights(self, exercises: Iterable[int], weights: Iterable[int]) -> None:
+        """Overwrite the weights of the given exercises."""
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO weights (exercise, weight) VALUES (?, ?) "
+                "ON CONFLICT (exercise) DO UPDATE SET weight = excluded.weight",
+                zip(exercises, weights, strict=True),
+            )
+
+    def set_touched(self, touched: Mapping[int, float]) -> None:
+        """Overwrite the times of the last feedback on the given exercises."""
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO weights (exercise, weight, touched) VALUES (?, 0, ?) "
+                "ON CONFLICT (exercise) DO UPDATE SET touched = excluded.touched",
+                touched.items(),
+            )
+
+    def compact(self) -> None:
+        """Checkpoint the write-ahead log into the database file."""
+        with self._connect() as connection:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def load_state(self, name: str) -> dict[str, Any] | None:
+        """Return the state saved in the database under the given name."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM state WHERE name = ?",
+                (name,),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save_state(self, name: str, state: dict[str, Any]) -> None:
+        """Save the state in the database, replacing the previous one."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO state (name, data) VALUES (?, ?)",
+                (name, json.dumps(state)),
+            )
+
+    def close(self) -> None:
+        """Do nothing, as every operation closes its own connection."""
+
+
+class BinaryWeightStore:
+    """Weight store backed by a memory-mapped file of fixed-width weights.
+
+    The file holds a small header followed by a dense array of little-endian uint32
+    weights, where slot i holds the weight of exercise i + 1, and by a parallel array
+    of the times of the last feedback, in whole seconds since the epoch. Opening the
+    store only maps the file, so it costs O(1) whatever the size of the catalog, and
+    a feedback event rewrites a single weight and timestamp in place. A weight or
+    timestamp of 0 marks an exercise that never received feedback. Files written
+    before the timestamps were stored are upgraded when opened.
+    """
+
+    def __init__(self, path: Path, slots: int = MAX_EXERCISES) -> None:
+        self.path = path
+        # Writes happen on the persistence thread and may remap the file
+        self._lock = threading.RLock()
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("wb") as file:
+                file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, slots))
+                file.truncate(self._size(slots))
+        self._open()
+
+    def _open(self) -> None:
+        """Map the file and validate its header, upgrading it if needed."""
+        self._file = self.path.open("r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, _, slots = BINARY_HEADER.unpack_from(self._map)
+        if magic != BINARY_MAGIC or version not in {1, BINARY_VERSION}:
+            self.close()
+            error_message = f"{self.path} is not a valid weight file."
+            logger.error(error_message)
+            raise ValueError(error_message)
+        self.slots: int = slots
+        if version == 1:
+            self._upgrade()
+
+    def _upgrade(self) -> None:
+        """Append the timestamp array to a file written by version 1."""
+        logger.info("Adding feedback times to {path}", path=self.path)
+        self.close()
+        with self.path.open("r+b") as file:
+            file.truncate(self._size(self.slots))
+            file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, self.slots))
+        self._open()
+
+    def _grow(self, slots: int) -> None:
+        """Extend the file so that it holds the given number of slots.
+
+        The timestamp array is moved after the extended weight array.
+        """
+        logger.info("Growing {path} to {slots} exercises", path=self.path, slots=slots)
+        old_slots = self.slots
+        touched = self._map[
+            self._touched_offset(1) : self._touched_offset(old_slots + 1)
+        ]
+        self.close()
+        with self.path.open("r+b") as file:
+            file.truncate(self._size(slots))
+            file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, slots))
+            file.seek(self._offset(old_slots + 1))
+            file.write(bytes((slots - old_slots) * BINARY_SLOT.size))
+            file.write(touched)
+            file.write(bytes((slots - old_slots) * BINARY_TOUCHED.size))
+        self._open()
+
+    def _reserve(self, exercises: Iterable[int]) -> None:
+        """Make room for the given exercises before any of them is written.
+
+        The file grows to hold the exercises past the last slot.
+
+        Raises:
+            ValueError: If an exercise is lower than 1, which has no slot.
+
+        """
+        exercises = list(exercises)
+        if not exercises:
+            return
+        if min(exercises) < 1:
+            error_message = (
+                f"Cannot store exercise {min(exercises)} in {self.path}. "
+                "Exercises start at 1."
+            )
+            logger.error(error_message)
+            raise ValueError(error_message)
+        if max(exercises) > self.slots:
+            self._grow(max(max(exercises), 2 * self.slots))
+
+    @staticmethod
+    def _size(slots: int) -> int:
+        return BINARY_HEADER.size + slots * (BINARY_SLOT.size + BINARY_TOUCHED.size)
+
+    @staticmethod
+    def _offset(exercise: int) -> int:
+        return BINARY_HEADER.size + (exercise - 1) * BINARY_SLOT.size
+
+    def _touched_offset(self, exercise: int) -> int:
+        return self._offset(self.slots + 1) + (exercise - 1) * BINARY_TOUCHED.size
+
+    def touched(self, exercise: int) -> int:
+        """Return the time of the last feedback on the given exercise, or 0."""
+        with self._lock:
+            if not 1 <= exercise <= self.slots:
+                return 0
+            return BINARY_TOUCHED.unpack_from(
+                self._map, self._touched_offset(exercise)
+            )[0]
+
+    def weight(self, exercise: int) -> int:
+        """Return the stored weight of the given exercise in O(1)."""
+        with self._lock:
+            if not 1 <= exercise <= self.slots:
+                return 0
+            return BINARY_SLOT.unpack_from(self._map, self._offset(exercise))[0]
+
+    def load(
+        self,
+        first_exercise: int,
+        last_exercise: int,
+    ) -> tuple[list[int], list[int]]:
+        """Return the exercises in the given range and their weights.
+
+        Only the slots in the range are read, and the minimum weight is set to 1 as
+        for the CSV file.
+        """
+        stored = array("I")
+        with self._lock:
+            first_slot = min(first_exercise, self.slots + 1)
+            last_slot = min(last_exercise, self.slots)
+            stored.frombytes(
+                self._map[self._offset(first_slot) : self._offset(last_slot + 1)],
+            )
+        if sys.byteorder == "big":
+            stored.byteswap()
+
+        exercises = list(range(first_exercise, last_exercise + 1))
+        weights = [max(weight, 1) for weight in stored]
+        weights += [1] * (len(exercises) - len(weights))
+        return exercises, weights
+
+    def load_touched(self, first_exercise: int, last_exercise: int) -> dict[int, float]:
+        """Return the times of the last feedback, reading only the range's slots."""
+        stored = array("I")
+        with self._lock:
+            first_slot = min(first_exercise, self.slots + 1)
+            last_slot = min(last_exercise, self.slots)
+            start = self._touched_offset(first_slot)
+            stop = self._touched_offset(last_slot + 1)
+            stored.frombytes(self._map[start:stop])
+        if sys.byteorder == "big":
+            stored.byteswap()
+        return {
+            exercise: float(touched)
+            for exercise, touched in zip(
+                range(first_slot, last_slot + 1), stored, strict=True
+            )
+            if touched
+        }
+
+    def append(self, events: Iterable[FeedbackEvent]) -> None:
+        """Apply each feedback event to its exercise's slots in place.
+
+        Raises:
+            ValueError: If an event is for an exercise lower than 1, in which case
+                none of the events is applied.
+
+        """
+        events = list(events)
+        with self._lock:
+            self._reserve(event.exercise for event in events)
+            for event in events:
+                weight = apply_delta(self.weight(event.exercise), event.delta)
+                BINARY_SLOT.pack_into(self._map, self._offset(event.exercise), weight)
+                BINARY_TOUCHED.pack_into(
+                    self._map,
+                    self._touched_offset(event.exercise),
+                    int(event.timestamp),
+                )
+
+    def set_weights(self, exercises: Iterable[int], weights: Iterable[int]) -> None:
+        """Overwrite the weights of the given exercises."""
+        items = list(zip(exercises, weights, strict=True))
+        with self._lock:
+            self._reserve(exercise for exercise, _ in items)
+            for exercise, weight in items:
+                BINARY_SLOT.pack_into(self._map, self._offset(exercise), weight)
+
+    def set_touched(self, touched: Mapping[int, float]) -> None:
+        """Overwrite the times of the last feedback on the given exercises."""
+        with self._lock:
+            self._reserve(touched)
+            for exercise, timestamp in touched.items():
+                BINARY_TOUCHED.pack_into(
+                    self._map, self._touched_offset(exercise), int(timestamp)
+                )
+
+    def compact(self) -> None:
+        """Flush the modified slots to disk."""
+        with self._lock:
+            self._map.flush()
+
+    def load_state(self, name: str) -> dict[str, Any] | None:
+        """Return the state saved in its JSON file next to the weight file."""
+        return _read_state(get_state_path(self.path, name))
+
+    def save_state(self, name: str, state: dict[str, Any]) -> None:
+        """Save the state to its JSON file next to the weight file."""
+        _write_state(get_state_path(self.path, name), state)
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def export_csv(self, csv_path: Path) -> None:
+        """Write every slot to a CSV file with the same layout as the CSV backend."""
+        with self._lock:
+            exercises = range(1, self.slots + 1)
+            weights = [self.weight(exercise) for exercise in exercises]
+            touched = [self.touched(exercise) or "" for exercise in exercises]
+        tmp_path = csv_path.with_suffix(".tmp")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("w") as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(zip(exercises, weights, touched, strict=True))
+        tmp_path.replace(csv_path)
+
+
+def get_sqlite_path(csv_path: Path) -> Path:
+    """Return the path of the SQLite database that replaces the given CSV file."""
+    return csv_path.with_suffix(SQLITE_SUFFIX)
+
+
+def get_binary_path(csv_path: Path) -> Path:
+    """Return the path of the binary weight file that replaces the given CSV file."""
+    return csv_path.with_suffix(BINARY_SUFFIX)
+
+
+def get_state_path(weights_path: Path, name: str) -> Path:
+    """Return the path of the JSON file holding the state saved under `name`."""
+    return weights_path.with_suffix(f".{name}{STATE_SUFFIX}")
+
+
+def _read_state(path: Path) -> dict[str, Any] | None:
+    """Read a state from a JSON file, if it exists."""
+    if not path.exists():
+        return None
+    try:
+        with path.open("r") as file:
+            return json.load(file)
+    except json.JSONDecodeError as e:
+        logger.warning("Ignoring invalid state in {path}: {error}", path=path, error=e)
+        return None
+
+
+def _write_state(path: Path, state: dict[str, Any]) -> None:
+    """Write a state to a JSON file, replacing it atomically."""
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("w") as file:
+        json.dump(state, file)
+    tmp_path.replace(path)
+
+
+def _read_csv_snapshot(
+    csv_path: Path,
+) -> tuple[list[int], list[int], dict[int, float]]:
+    """Compact the journal of the CSV file and return every row of the file.
+
+    Returns the exercises, their weights and the times of their last feedback.
+    """
+    compact_journal(csv_path)
+    exercises: list[int] = []
+    weights: list[int] = []
+    touched: dict[int, float] = {}
+    with csv_path.open("r") as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip header
+        for row in reader:
+            if row:
+                exercises.append(int(row[0]))
+                weights.append(int(row[1]))
+            if len(row) > TOUCHED_COLUMN and row[TOUCHED_COLUMN]:
+                touched[int(row[0])] = float(row[TOUCHED_COLUMN])
+    return exercises, weights, touched
+
+
+def migrate_csv_to_sqlite(csv_path: Path, db_path: Path) -> SqliteWeightStore:
+    """Copy the weights of the CSV file, journal included, into a new database.
+
+    The CSV file is left untouched apart from its journal being compacted, so it is
+    still usable with the CSV backend afterwards. The database is built under a
+    temporary name and moved into place once complete, so an interrupted migration is
+    simply run again next time.
+    """
+    logger.info(
+        "Migrating weights from {source} to {target}",
+        source=csv_path,
+        target=db_path,
+    )
+    exercises, weights, touched = _read_csv_snapshot(csv_path)
+
+    tmp_path = db_path.with_suffix(".migrating")
+    tmp_path.unlink(missing_ok=True)
+    tmp_store = SqliteWeightStore(tmp_path)
+    tmp_store.set_weights(exercises, weights)
+    tmp_store.set_touched(touched)
+    tmp_store.compact()
+    tmp_path.replace(db_path)
+    return SqliteWeightStore(db_path)
+
+
+def migrate_csv_to_binary(
+    csv_path: Path,
+    binary_path: Path,
+    slots: int = MAX_EXERCISES,
+) -> BinaryWeightStore:
+    """Copy the weights of the CSV file, journal included, into a new binary file.
+
+    The binary file has room for `slots` exercises, or for every exercise of the CSV
+    file if there are more. As for the SQLite migration, the CSV file stays usable
+    and the binary file is only moved into place once complete.
+    """
+    logger.info(
+        "Migrating weights from {source} to {target}",
+        source=csv_path,
+        target=binary_path,
+    )
+    exercises, weights, touched = _read_csv_snapshot(csv_path)
+
+    tmp_path = binary_path.with_suffix(".migrating")
+    tmp_path.unlink(missing_ok=True)
+    tmp_store = BinaryWeightStore(tmp_path, max([*exercises, slots]))
+    tmp_store.set_weights(exercises, weights)
+    tmp_store.set_touched(touched)
+    tmp_store.compact()
+    tmp_store.close()
+    tmp_path.replace(binary_path)
+    return BinaryWeightStore(binary_path)
+
+
+def open_weight_store(config: Config) -> WeightStore:
+    """Return the weight store selected by the configuration.
+
+    When the SQLite or binary backend is selected for the first time and the CSV file
+    or its journal exist, their weights are migrated into the new store.
+    """
+    if config.storage_backend == StorageBackend.CSV:
+        return CsvWeightStore(config.csv_path, config.exercise_limit)
+
+    has_csv_data = (
+        config.csv_path.exists()
+        or get_journal_path(config.csv_path).exists()
+        or bool(get_folding_paths(config.csv_path))
+    )
+
+    if config.storage_backend == StorageBackend.SQLITE:
+        db_path = get_sqlite_path(config.csv_path)
+        if not db_path.exists() and has_csv_data:
+            return migrate_csv_to_sqlite(config.csv_path, db_path)
+        return SqliteWeightStore(db_path)
+
+    if config.storage_backend == StorageBackend.BINARY:
+        binary_path = get_binary_path(config.csv_path)
+        if not binary_path.exists() and has_csv_data:
+            return migrate_csv_to_binary(
+                config.csv_path,
+                binary_path,
+                config.exercise_limit,
+            )
+        return BinaryWeightStore(binary_path, config.exercise_limit)
+
+    error_message = (
+        f"Unsupported storage backend: {config.storage_backend}. "
+        f"Use one of {[f'StorageBackend.{e.name}' for e in StorageBackend]}"
+    )
+    logger.error(error_message)
+    raise ValueError(error_message)
@@ -0,0 +1,532 @@
+import heapq
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass
+from enum import Enum
+from itertools import chain, islice
+from typing import Any, Protocol
+
+import numpy as np
+
+from rhythm_trainer.config import DEFAULT_STRATEGY, Config
+from rhythm_trainer.exercises import (
+    SECONDS_PER_DAY,
+    RecentWindow,
+    WeightDecay,
+    apply_delta,
+    pick_random_exercise,
+    plan_session,
+)
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.rng import create_rng, numpy_rng
+from rhythm_trainer.sampler import Sampler, create_sampler
+
+logger = get_logger(__name__)
+
+SM2_STRATEGY = "sm2"
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+PASSING_QUALITY = 3  # SM-2 qualities range from 0 to 5
+MIN_HEAP_REBUILD = 64  # Stale heap entries always tolerated before a rebuild
+
+
+class Feedback(Enum):
+    """Enum for the feedback given on a practiced exercise."""
+
+    GOOD = "good"
+    BAD = "bad"
+
+
+# Quality of a review, as used by the SM-2 rule, for each kind of feedback
+FEEDBACK_QUALITY = {Feedback.GOOD: 4, Feedback.BAD: 1}
+
+
+class SamplingStrategy(Protocol):
+    """Policy deciding which exercise to practice next and how feedback affects it.
+
+    `exercises` and `weights` expose the current selection weights, used to plan
+    sessions ahead of time. Draws use the random generator given to the factory.
+    `update` returns the weight delta to record in the weight store, `serialize`
+    returns the state of the strategy as JSON-serializable data, and `restore` resumes
+    from such data. `set_last_touched` gives the times, in seconds since the epoch, at
+    which the exercises last received feedback, as recorded in the weight store.
+    `predict` draws the next exercises ahead of time, which the following calls to
+    `draw` then return in order, so that their backing tracks can be loaded early.
+    `plan` does the same with a whole batch of exercises drawn at once, and
+    `upcoming` lists the exercises drawn ahead of time.
+    """
+
+    name: str
+
+    @property
+    def exercises(self) -> list[int]: ...
+
+    @property
+    def weights(self) -> list[int]: ...
+
+    @property
+    def upcoming(self) -> list[int]: ...
+
+    def draw(self) -> int: ...
+
+    def predict(self, count: int) -> list[int]: ...
+
+    def plan(self, count: int) -> list[int]: ...
+
+    def update(self, exercise: int, feedback: Feedback) -> int: ...
+
+    def serialize(self) -> dict[str, Any]: ...
+
+    def restore(self, state: dict[str, Any]) -> None: ...
+
+    def set_last_touched(self, touched: Mapping[int, float]) -> None: ...
+
+
+def feedback_delta(
+    weight: int,
+    bad: bool,
+    increment: int = 1,
+    decrement: int = 1,
+    min_weight: int = 1,
+) -> int:
+    """Return the weight change caused by feedback under the weighted strategy.
+
+    Bad feedback increases the weight by `increment`, while good feedback decreases it
+    by `decrement` as long as it stays above `min_weight`. The defaults are the rule of
+    `WeightedStrategy`.
+    """
+    if bad:
+        return increment
+    return -decrement if weight > min_weight else 0
+
+
+def feedback_deltas(
+    weights: np.ndarray,
+    bad: np.ndarray,
+    increment: int = 1,
+    decrement: int = 1,
+    min_weight: int = 1,
+) -> np.ndarray:
+    """Return the weight changes of `feedback_delta`, element by element.
+
+    This applies the same rule to NumPy arrays of weights and feedback at once.
+    """
+    return np.where(bad, increment, np.where(weights > min_weight, -decrement, 0))
+
+
+type StrategyFactory = Callable[
+    [Iterable[int], Iterable[int], Config, random.Random], SamplingStrategy
+]
+
+STRATEGIES: dict[str, StrategyFactory] = {}
+
+
+def register_strategy(
+    name: str,
+) -> Callable[[StrategyFactory], StrategyFactory]:
+    """Register a strategy factory under the given name.
+
+    The factory is called with the exercises, their stored weights, the configuration
+    and the random generator to draw from, and returns a new strategy.
+    """
+
+    def decorator(factory: StrategyFactory) -> StrategyFactory:
+        if name in STRATEGIES:
+            error_message = f"A sampling strategy named '{name}' already exists."
+            logger.error(error_message)
+            raise ValueError(error_message)
+        STRATEGIES[name] = factory
+        return factory
+
+    return decorator
+
+
+def create_strategy(
+    name: str,
+    exercises: Iterable[int],
+    weights: Iterable[int],
+    config: Config,
+    rng: random.Random | None = None,
+) -> SamplingStrategy:
+    """Create the strategy registered under the given name.
+
+    The strategy draws from `rng`, or from a new generator seeded with `config.seed`
+    if it is None.
+    """
+    try:
+        factory = STRATEGIES[name]
+    except KeyError:
+        error_message = (
+            f"Unsupported sampling strategy: {name}. Use one of {sorted(STRATEGIES)}"
+        )
+        logger.error(error_message)
+        raise ValueError(error_message) from None
+
+    if rng is None:
+        rng = create_rng(config.seed)
+    return factory(exercises, weights, config, rng)
+
+
+class WeightedStrategy:
+    """Draw exercises proportionally to their weights, adjusting them by one.
+
+    Bad feedback increases the weight of the exercise by one, while good feedback
+    decreases it by one as long as it stays above one. The most recently drawn
+    exercises are excluded from draws.
+
+    The exercises drawn ahead of time by `predict` and `plan` are queued and served
+    first by `draw`, so a prediction costs the same as the draw it replaces. They
+    only enter the recent window when served, and the draws ahead exclude the recent
+    window followed by the queue, as if the queue had been served already. Feedback
+    drops the queued exercises that were drawn with the previous weight.
+
+    With a `decay`, the weights drift back to 1 while the exercises are not practiced.
+    The decayed weights are never swept: the sampler keeps upper bounds of them, and
+    a drawn exercise is only accepted with probability decayed weight / bound, which
+    draws the exercises proportionally to their decayed weights. The bound of a drawn
+    exercise is lowered to its rounded up decayed weight, so that rejections stay
+    rare. Feedback then applies to the rounded decayed weight.
+    """
+
+    name = DEFAULT_STRATEGY
+
+    def __init__(
+        self,
+        sampler: Sampler,
+        recent: RecentWindow,
+        clock: Callable[[], float] = time.time,
+        decay: WeightDecay | None = None,
+    ) -> None:
+        self.sampler = sampler
+        self.recent = recent
+        self.clock = clock
+        self.decay = decay
+        self._touched: dict[int, float] = {}
+        # Stored weights of the exercises whose bound was lowered in the sampler
+        self._stored: dict[int, int] = {}
+        self._upcoming: deque[int] = deque()
+
+    @property
+    def exercises(self) -> list[int]:
+        return self.sampler.exercises
+
+    @property
+    def weights(self) -> list[int]:
+        if self.decay is None:
+            return self.sampler.weights
+        now = self.clock()
+        return [round(self._decayed(ex, now)) for ex in self.sampler.exercises]
+
+    def set_last_touched(self, touched: Mapping[int, float]) -> None:
+        self._touched = {ex: t for ex, t in touched.items() if ex in self.sampler}
+
+    def _decayed(self, exercise: int, now: float) -> float:
+        """Return the decayed weight of an exercise at the given time."""
+        weight = self._stored.get(exercise, self.sampler.weight(exercise))
+        touched = self._touched.get(exercise)
+        if self.decay is None or touched is None:
+            return weight
+        return self.decay.value(weight, now - touched)
+
+    def _accept(self, exercise: int) -> bool:
+        """Accept a drawn exercise with probability decayed weight / bound."""
+        bound = self.sampler.weight(exercise)
+        decayed = self._decayed(exercise, self.clock())
+        if math.ceil(decayed) < bound:
+            self._stored.setdefault(exercise, bound)
+            bound = math.ceil(decayed)
+            self.sampler.update(exercise, bound)
+        return self.sampler.rng.random() * bound < decayed
+
+    @property
+    def upcoming(self) -> list[int]:
+        """Exercises already drawn ahead of time, in the order they will be served."""
+        return list(self._upcoming)
+
+    def draw(self) -> int:
+        if not self._upcoming:
+            return self._draw_one(self.recent)
+        exercise = self._upcoming.popleft()
+        self.recent.push(exercise)
+        return exercise
+
+    def _draw_one(self, recent: RecentWindow) -> int:
+        accept = None if self.decay is None else self._accept
+        return pick_random_exercise(self.sampler, recent, accept)
+
+    def _window_ahead(self) -> RecentWindow:
+        """Return a copy of the recent window with the queued exercises pushed."""
+        window = RecentWindow(self.recent.size)
+        for exercise in chain(self.recent, self._upcoming):
+            window.push(exercise)
+        return window
+
+    def predict(self, count: int) -> list[int]:
+        """Draw ahead of time, if needed, and return the next `count` exercises."""
+        if len(self._upcoming) < count:
+            window = self._window_ahead()
+            while len(self._upcoming) < count:
+                self._upcoming.append(self._draw_one(window))
+        return list(islice(self._upcoming, count))
+
+    def plan(self, count: int) -> list[int]:
+        """Draw a batch of `count` exercises at once and queue them after the others.
+
+        The batch is drawn with `plan_session`, from the current decayed weights and
+        with the recent window of the strategy, so it follows the same distribution as
+        `count` calls to `draw`. Returns the planned exercises.
+        """
+        planned = plan_session(
+            self.exercises,
+            self.weights,
+            count,
+            self._window_ahead(),
+            numpy_rng(self.sampler.rng),
+        )
+        self._upcoming.extend(planned)
+        return planned
+
+    def update(self, exercise: int, feedback: Feedback) -> int:
+        """Apply feedback to the decayed weight of the exercise.
+
+        The exercises drawn ahead of time with the previous weight are dropped, see
+        `_drop_stale_upcoming`, so that the feedback applies from the next draw on.
+        Returns the difference between the new weight and the stored one, which is
+        the feedback delta itself without decay.
+        """
+        now = self.clock()
+        weight = round(self._decayed(exercise, now))
+        stored = self._stored.pop(exercise, self.sampler.weight(exercise))
+        new_weight = apply_delta(
+            weight, feedback_delta(weight, feedback == Feedback.BAD)
+        )
+        self.sampler.update(exercise, new_weight)
+        self._touched[exercise] = now
+        self._drop_stale_upcoming(exercise)
+        return new_weight - max(stored, 1)
+
+    def _drop_stale_upcoming(self, exercise: int) -> None:
+        """Drop the queued exercises whose draw depended on the weight of `exercise`.
+
+        The queued exercises drawn while `exercise` was in their window did not
+        depend on its weight, so they are kept, while the ones after them are dropped
+        to be drawn again with the new weight.
+        """
+        recent = list(self.recent)
+        if exercise in self.recent:
+            served_since = len(recent) - recent.index(exercise)
+            keep = max(self.recent.size - served_since + 1, 0)
+        else:
+            keep = 0
+        while len(self._upcoming) > keep:
+            self._upcoming.pop()
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            "strategy": self.name,
+            "weights": dict(zip(self.exercises, self.weights, strict=True)),
+            "recent": list(self.recent),
+            "upcoming": list(self._upcoming),
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Restore the recent window and the exercises drawn ahead of time.
+
+        The weights are not restored, as they are loaded from the weight store. A
+        state serialized by another strategy is ignored.
+        """
+        if state.get("strategy") != self.name:
+            logger.info(
+                "Ignoring the saved state of the {saved} strategy",
+                saved=state.get("strategy"),
+            )
+            return
+
+        for exercise in state.get("recent", []):
+            if exercise in self.sampler:
+                self.recent.push(exercise)
+        self._upcoming.extend(
+            exercise
+            for exercise in state.get("upcoming", [])
+            if exercise in self.sampler
+        )
+
+
+@register_strategy(DEFAULT_STRATEGY)
+def _create_weighted_strategy(
+    exercises: Iterable[int],
+    weights: Iterable[int],
+    config: Config,
+    rng: random.Random,
+) -> SamplingStrategy:
+    sampler = create_sampler(config.sampler_engine, exercises, weights, rng)
+    return WeightedStrategy(
+        sampler, RecentWindow(config.recent_window), decay=_create_decay(config)
+    )
+
+
+def _create_decay(config: Config) -> WeightDecay | None:
+    """Return the weight decay set in the configuration, if any."""
+    if config.decay_half_life_days <= 0:
+        return None
+    return WeightDecay(config.decay_half_life_days)
+
+
+@dataclass(slots=True)
+class Review:
+    """Spaced repetition state of an exercise.
+
+    `interval` is the number of days between the last review and the next one, and
+    `due` the time of the next review, in seconds since the epoch.
+    """
+
+    repetitions: int = 0
+    ease: float = INITIAL_EASE
+    interval: float = 0.0
+    due: float = 0.0
+
+    def schedule(self, quality: int, now: float) -> None:
+        """Schedule the next review with the SM-2 rule, given a quality from 0 to 5.
+
+        A passing quality moves the next review 1 day, then 6 days, then the previous
+        interval times the ease factor later, while a failing one starts over from 1
+        day. The ease factor grows with high qualities and shrinks with low ones, down
+        to MIN_EASE.
+        """
+        if quality >= PASSING_QUALITY:
+            if self.repetitions == 0:
+                self.interval = FIRST_INTERVAL_DAYS
+            elif self.repetitions == 1:
+                self.interval = SECOND_INTERVAL_DAYS
+            else:
+                self.interval *= self.ease
+            self.repetitions += 1
+        else:
+            self.repetitions = 0
+            self.interval = FIRST_INTERVAL_DAYS
+
+        penalty = 5 - quality
+        self.ease = max(self.ease + 0.1 - penalty * (0.08 + penalty * 0.02), MIN_EASE)
+        self.due = now + self.interval * SECONDS_PER_DAY
+
+
+class SpacedRepetitionStrategy(WeightedStrategy):
+    """Serve exercises when they are due for review, as scheduled by SM-2.
+
+    Every exercise that received feedback has a `Review`, and the reviews are kept in
+    a heap keyed by due time, so that both picking the most overdue exercise and
+    rescheduling one after feedback cost O(log n). Good feedback counts as a quality
+    of 4 and bad feedback as a quality of 1. When no exercise is due, exercises are
+    drawn as with `WeightedStrategy`, whose weights keep being updated as well.
+
+    The heap entries of rescheduled exercises are left in place and skipped when they
+    reach the top, and the heap is rebuilt when these stale entries outnumber the
+    reviews.
+    """
+
+    name = SM2_STRATEGY
+
+    def __init__(
+        self,
+        sampler: Sampler,
+        recent: RecentWindow,
+        clock: Callable[[], float] = time.time,
+        decay: WeightDecay | None = None,
+    ) -> None:
+        super().__init__(sampler, recent, clock, decay)
+        self._reviews: dict[int, Review] = {}
+        self._heap: list[tuple[float, int]] = []
+
+    def review(self, exercise: int) -> Review | None:
+        """Return the review state of the given exercise, if it received feedback."""
+        return self._reviews.get(exercise)
+
+    def _next_due(self) -> tuple[float, int] | None:
+        """Return the earliest review in the heap, dropping stale entries."""
+        while self._heap:
+            due, exercise = self._heap[0]
+            review = self._reviews.get(exercise)
+            if review is not None and review.due == due:
+                return due, exercise
+            heapq.heappop(self._heap)
+        return None
+
+    def _queue_due(self) -> None:
+        """Put the most overdue exercise, if any, at the front of the queue.
+
+        If the exercise was already drawn ahead, it is served early instead, and the
+        exercises queued after it are dropped, as they were drawn without excluding
+        it from their window.
+        """
+        entry = self._next_due()
+        if entry is None or entry[0] > self.clock():
+            return
+        exercise = entry[1]
+        if self._upcoming and self._upcoming[0] == exercise:
+            return
+        if exercise in self._upcoming:
+            while self._upcoming.pop() != exercise:
+                pass
+        self._upcoming.appendleft(exercise)
+        logger.debug("Exercise {exercise} is due for review", exercise=exercise)
+
+    def draw(self) -> int:
+        """Return the most overdue exercise, or draw one by weight if none is due."""
+        self._queue_due()
+        return super().draw()
+
+    def predict(self, count: int) -> list[int]:
+        """Return the most overdue exercise, if any, then the ones drawn ahead."""
+        if count > 0:
+            self._queue_due()
+        return super().predict(count)
+
+    def update(self, exercise: int, feedback: Feedback) -> int:
+        delta = super().update(exercise, feedback)
+        review = self._reviews.setdefault(exercise, Review())
+        review.schedule(FEEDBACK_QUALITY[feedback], self.clock())
+        heapq.heappush(self._heap, (review.due, exercise))
+        if len(self._heap) > 2 * len(self._reviews) + MIN_HEAP_REBUILD:
+            self._rebuild_heap()
+        return delta
+
+    def _rebuild_heap(self) -> None:
+        """Rebuild the heap from the reviews, dropping the stale entries."""
+        self._heap = [(review.due, ex) for ex, review in self._reviews.items()]
+        heapq.heapify(self._heap)
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            **super().serialize(),
+            "reviews": {ex: asdict(review) for ex, review in self._reviews.items()},
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Restore the recent window and the reviews of the exercises."""
+        super().restore(state)
+        if state.get("strategy") != self.name:
+            return
+
+        for exercise, review in state.get("reviews", {}).items():
+            # JSON object keys are strings
+            if int(exercise) in self.sampler:
+                self._reviews[int(exercise)] = Review(**review)
+        self._rebuild_heap()
+
+
+@register_strategy(SM2_STRATEGY)
+def _create_spaced_repetition_strategy(
+    exercises: Iterable[int],
+    weights: Iterable[int],
+    config: Config,
+    rng: random.Random,
+) -> SamplingStrategy:
+    sampler = create_sampler(config.sampler_engine, exercises, weights, rng)
+    return SpacedRepetitionStrategy(
+        sampler, RecentWindow(config.recent_window), decay=_create_decay(config)
+    )
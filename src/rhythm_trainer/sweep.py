@@ -0,0 +1,257 @@
+"""Sweep the parameters of the weight rule with the learner simulation.
+
+Every combination of the given parameter values is simulated in a pool of worker
+processes. Each result is appended to a JSON lines file as soon as it is available,
+so that an interrupted sweep is resumed by running the same command again.
+
+Run with `python -m rhythm_trainer.sweep --help` to see the options.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, astuple, dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+
+import numpy as np
+
+from rhythm_trainer.config import DEFAULT_RECENT_WINDOW
+from rhythm_trainer.logger import get_logger
+from rhythm_trainer.simulate import (
+    DEFAULT_EXERCISES,
+    DEFAULT_LEARNERS,
+    DEFAULT_STEPS,
+    LearnerModel,
+    WeightRule,
+    simulate,
+)
+
+logger = get_logger(__name__)
+
+MAX_PENDING_PER_WORKER = 2  # Grid points submitted ahead of the free workers
+
+# Forking would copy the state of the logging thread into the workers
+_MP_CONTEXT = multiprocessing.get_context("forkserver")
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    """Parameters of the weight rule simulated in one grid cell."""
+
+    recent_window: int = DEFAULT_RECENT_WINDOW
+    increment: int = 1
+    decrement: int = 1
+    min_weight: int = 1
+
+    @property
+    def rule(self) -> WeightRule:
+        return WeightRule(self.increment, self.decrement, self.min_weight)
+
+    def key(self) -> tuple[int, ...]:
+        return astuple(self)
+
+
+@dataclass(frozen=True)
+class SweepSettings:
+    """Settings shared by every grid cell of a sweep.
+
+    Each grid cell is simulated with the child of the seed sequence created from
+    `seed` whose spawn key is made of the parameters of the cell. Every cell thus has
+    an independent random stream, which depends neither on the number of workers,
+    nor on the other cells of the grid, nor on which cells already ran.
+    """
+
+    model: LearnerModel = field(default_factory=LearnerModel)
+    learners: int = DEFAULT_LEARNERS
+    exercises: int = DEFAULT_EXERCISES
+    steps: int = DEFAULT_STEPS
+    seed: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def make_grid(
+    recent_windows: Iterable[int] = (DEFAULT_RECENT_WINDOW,),
+    increments: Iterable[int] = (1,),
+    decrements: Iterable[int] = (1,),
+    min_weights: Iterable[int] = (1,),
+) -> list[SweepPoint]:
+    """Return every combination of the given parameter values.
+
+    Raises:
+        ValueError: If a recent window size is negative, or an increment, decrement
+            or minimum weight is lower than 1.
+
+    """
+    recent_windows = list(recent_windows)
+    if any(window < 0 for window in recent_windows):
+        error_message = f"Recent window sizes must be non-negative: {recent_windows}."
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    increments = list(increments)
+    decrements = list(decrements)
+    min_weights = list(min_weights)
+    for name, values in [
+        ("Increments", increments),
+        ("Decrements", decrements),
+        ("Minimum weights", min_weights),
+    ]:
+        if any(value < 1 for value in values):
+            error_message = f"{name} must be at least 1: {values}."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+    return [
+        SweepPoint(*values)
+        for values in itertools.product(
+            recent_windows, increments, decrements, min_weights
+        )
+    ]
+
+
+def run_point(point: SweepPoint, settings: SweepSettings) -> dict[str, Any]:
+    """Simulate a grid cell and return its result line. Runs in a worker process."""
+    seed = np.random.SeedSequence(settings.seed, spawn_key=point.key())
+    result = simulate(
+        settings.model,
+        settings.learners,
+        settings.exercises,
+        settings.steps,
+        point.recent_window,
+        rule=point.rule,
+        seed=seed,
+    )
+    return {"point": asdict(point), "summary": result.summary()}
+
+
+def _read_results(path: Path, settings: SweepSettings) -> set[tuple[int, ...]]:
+    """Return the keys of the grid cells already in a results file.
+
+    The first line of the file holds the settings of the sweep, which must match the
+    given ones. A last line cut short by an interruption is removed from the file.
+    """
+    with path.open("rb+") as file:
+        content = file.read()
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            logger.warning(
+                "Removing an incomplete line at the end of {path}", path=path
+            )
+            file.truncate(end)
+
+    lines = content[:end].decode("utf-8").splitlines()
+    if not lines:
+        return set()
+
+    header = json.loads(lines[0])
+    if header != {"settings": settings.to_dict()}:
+        error_message = (
+            f"The results in {path} were computed with different settings: "
+            f"{header.get('settings')}. Use another output file."
+        )
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    return {SweepPoint(**json.loads(line)["point"]).key() for line in lines[1:]}
+
+
+def _write_line(file: TextIO, data: dict[str, Any]) -> None:
+    """Append a compact JSON line and flush it to disk."""
+    file.write(json.dumps(data, separators=(",", ":")) + "\n")
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def run_sweep(
+    grid: Sequence[SweepPoint],
+    settings: SweepSettings,
+    output: Path,
+    max_workers: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Simulate every grid cell not in `output` yet, appending the results to it.
+
+    The cells run in a pool of `max_workers` processes, defaulting to one per CPU core,
+    started from a fork server, and the result lines are yielded in the order the cells
+    finish. Only a few cells are submitted ahead of the free workers, so that an
+    interruption loses at most the cells being simulated.
+    """
+    max_workers = max_workers or os.process_cpu_count() or 1
+    done = _read_results(output, settings) if output.exists() else set()
+    todo = [point for point in grid if point.key() not in done]
+    logger.info(
+        "Sweeping {todo} grid cells, {done} already done",
+        todo=len(todo),
+        done=len(grid) - len(todo),
+    )
+    remaining = iter(todo)
+
+    with (
+        output.open("a", encoding="utf-8") as file,
+        ProcessPoolExecutor(max_workers, mp_context=_MP_CONTEXT) as executor,
+    ):
+        if file.tell() == 0:
+            _write_line(file, {"settings": settings.to_dict()})
+
+        max_pending = MAX_PENDING_PER_WORKER * max_workers
+        pending: set[Future[dict[str, Any]]] = set()
+        try:
+            while True:
+                for point in itertools.islice(remaining, max_pending - len(pending)):
+                    pending.add(executor.submit(run_point, point, settings))
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    line = future.result()
+                    _write_line(file, line)
+                    yield line
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", type=Path, help="JSON lines file for the results")
+    parser.add_argument(
+        "--recent-window", nargs="+", type=int, default=[DEFAULT_RECENT_WINDOW]
+    )
+    parser.add_argument("--increment", nargs="+", type=int, default=[1])
+    parser.add_argument("--decrement", nargs="+", type=int, default=[1])
+    parser.add_argument("--min-weight", nargs="+", type=int, default=[1])
+    parser.add_argument("--learners", type=int, default=DEFAULT_LEARNERS)
+    parser.add_argument("--exercises", type=int, default=DEFAULT_EXERCISES)
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, help="number of worker processes (default: CPU cores)"
+    )
+    args = parser.parse_args(argv)
+
+    grid = make_grid(
+        args.recent_window, args.increment, args.decrement, args.min_weight
+    )
+    settings = SweepSettings(
+        learners=args.learners,
+        exercises=args.exercises,
+        steps=args.steps,
+        seed=args.seed,
+    )
+    for line in run_sweep(grid, settings, args.output, args.workers):
+        summary = line["summary"]
+        print(
+            f"{line['point']}: mastered {summary['mastered_learners']:.0%}, "
+            f"median {summary['mastery_steps_p50']} steps"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,343 @@
-import subprocess
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any
 
+from rhythm_trainer import dirs
+from rhythm_trainer.chapters import Chapter, ChapterMap, default_chapter_map
 from rhythm_trainer.config import FileFormat, NamingScheme
 from rhythm_trainer.logger import get_logger
+from rhythm_trainer.playback import Player
+
+INDEX_CACHE_FILENAME = "backing_tracks_index.json"
+SCAN_WORKERS = 8  # Chapter folders listed concurrently
 
 logger = get_logger(__name__)
 
 
+def get_track_filename(
+    chapter: str,
+    exercise: int,
+    naming_convention: NamingScheme,
+    file_format: FileFormat,
+) -> str:
+    """Return the file name of the backing track of an exercise in a chapter."""
+    if naming_convention == NamingScheme.LOGICAL:
+        return f"BK {chapter} {exercise:02d}.{file_format.value}"
+    if naming_convention == NamingScheme.DEFAULT:
+        return f"{chapter} {exercise} BK.{file_format.value}"
+    raise ValueError(
+        f"Unsupported naming convention: {naming_convention}. "
+        f"Use one of {[f'NamingConvention.{e.name}' for e in NamingScheme]}",
+    )
+
+
 def validate_backing_track(
     exercise: int,
     backing_tracks_dir: Path,
     naming_convention: NamingScheme = NamingScheme.DEFAULT,
     file_format: FileFormat = FileFormat.WAV,
+    chapters: ChapterMap | None = None,
 ) -> Path | None:
     """Check if the backing track for a given exercise exists.
 
-    Returns the backing track's Path if it exists, None otherwise.
+    The chapter of the exercise is looked up in `chapters`, which defaults to the
+    chapters of the default book. Returns the backing track's Path if it exists, None
+    otherwise, including when the exercise is in no chapter.
     """
-    subdirs = [
-        "Acoustic",
-        "Classic Blues",
-        "Classic Rock",
-        "Funk",
-        "Fusion",
-        "Hard Rock & Heavy Metal",
-        "Jazz",
-        "Pop",
-        "Soul",
-    ]
-
-    chapter_folder = backing_tracks_dir / subdirs[(exercise - 1) // 10]
+    chapter = (chapters or default_chapter_map()).find(exercise)
+    if chapter is None:
+        return None
+    chapter_folder = backing_tracks_dir / chapter.folder
     if not chapter_folder.is_dir():
         return None
 
-    if naming_convention == NamingScheme.LOGICAL:
-        track_path = (
-            chapter_folder
-            / f"BK {chapter_folder.name} {exercise:02d}.{file_format.value}"
-        )
-    elif naming_convention == NamingScheme.DEFAULT:
-        track_path = (
-            chapter_folder / f"{chapter_folder.name} {exercise} BK.{file_format.value}"
+    track_path = chapter_folder / get_track_filename(
+        chapter.name,
+        exercise,
+        naming_convention,
+        file_format,
+    )
+    return track_path if track_path.is_file() else None
+
+
+class BackingTrackIndex:
+    """Index mapping exercise numbers to their backing tracks.
+
+    The chapters and their folders are given by a `ChapterMap`, which defaults to
+    the chapters of the default book. Each chapter folder is listed with a single
+    `os.scandir` pass, with the folders listed concurrently by a thread pool, after
+    which looking up an exercise is a dictionary hit with no filesystem access. The
+    index can be saved to the user cache directory together with the modification
+    time of every chapter folder, so that only the chapters changed since then are
+    scanned again on the next start.
+    """
+
+    def __init__(
+        self,
+        backing_tracks_dir: Path,
+        naming_scheme: NamingScheme = NamingScheme.DEFAULT,
+        file_format: FileFormat = FileFormat.WAV,
+        chapters: ChapterMap | None = None,
+    ) -> None:
+        self.backing_tracks_dir = backing_tracks_dir
+        self.naming_scheme = naming_scheme
+        self.file_format = file_format
+        self.chapters = chapters or default_chapter_map()
+        self._tracks: dict[int, Path] = {}
+        self._mtimes: dict[str, int | None] = {}
+        # Chapters may be applied by a scan while the index is read or saved
+        self._lock = threading.Lock()
+
+    def __contains__(self, exercise: object) -> bool:
+        return exercise in self._tracks
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def get(self, exercise: int) -> Path | None:
+        """Return the backing track of the given exercise, or None if missing."""
+        return self._tracks.get(exercise)
+
+    def _chapter_mtime(self, chapter: Chapter) -> int | None:
+        """Return the modification time of a chapter folder, or None if missing."""
+        try:
+            return (self.backing_tracks_dir / chapter.folder).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _list_chapter(self, chapter: Chapter) -> tuple[int | None, set[str] | None]:
+        """Return the modification time and the file names of a chapter folder.
+
+        This only reads the filesystem, so chapters can be listed concurrently.
+        """
+        mtime = self._chapter_mtime(chapter)
+        try:
+            with os.scandir(self.backing_tracks_dir / chapter.folder) as entries:
+                return mtime, {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            return mtime, None
+
+    def _apply_chapter(
+        self,
+        chapter: Chapter,
+        mtime: int | None,
+        files: set[str] | None,
+    ) -> None:
+        """Replace the entries of a chapter's exercises with the listed files."""
+        chapter_folder = self.backing_tracks_dir / chapter.folder
+        exercises = chapter.exercises
+        with self._lock:
+            for exercise in exercises:
+                self._tracks.pop(exercise, None)
+            self._mtimes[chapter.folder] = mtime
+            if files is None:
+                return
+
+            for exercise in exercises:
+                filename = get_track_filename(
+                    chapter.name,
+                    exercise,
+                    self.naming_scheme,
+                    self.file_format,
+                )
+                if filename in files:
+                    self._tracks[exercise] = chapter_folder / filename
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Found {count} backing tracks out of {files} files in {chapter}",
+                count=sum(exercise in self._tracks for exercise in exercises),
+                files=len(files),
+                chapter=chapter.name,
+            )
+
+    def scan_chapter(self, chapter: Chapter) -> None:
+        """List a chapter folder once and update the entries of its exercises."""
+        self._apply_chapter(chapter, *self._list_chapter(chapter))
+
+    def _scan_chapters(
+        self,
+        *,
+        changed_only: bool,
+        max_workers: int | None,
+        progress: Callable[[int, int], None] | None,
+        stop: threading.Event | None = None,
+    ) -> bool:
+        """List the chapter folders concurrently and apply each one as it completes.
+
+        With `changed_only`, only the chapters whose folder changed since they were
+        last scanned are listed. `progress` is called on the calling thread with the
+        number of chapters done and the total after each chapter. Once `stop` is set,
+        the chapters not listed yet are skipped. Returns whether any chapter was
+        scanned.
+        """
+        known = dict(self._mtimes)
+
+        def list_if_changed(
+            chapter: Chapter,
+        ) -> tuple[int | None, set[str] | None] | None:
+            if changed_only and chapter.folder in known:
+                mtime = self._chapter_mtime(chapter)
+                if known[chapter.folder] == mtime:
+                    return None
+            return self._list_chapter(chapter)
+
+        scanned = False
+        total = len(self.chapters)
+        with ThreadPoolExecutor(max_workers or SCAN_WORKERS) as executor:
+            futures = {
+                executor.submit(list_if_changed, chapter): chapter
+                for chapter in self.chapters
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                if stop is not None and stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                listing = future.result()
+                if listing is not None:
+                    self._apply_chapter(futures[future], *listing)
+                    scanned = True
+                if progress is not None:
+                    progress(done, total)
+        return scanned
+
+    def scan(
+        self,
+        max_workers: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """Scan every chapter folder.
+
+        The folders are listed by a pool of `max_workers` threads, defaulting to
+        SCAN_WORKERS, which hides the latency of network shares. The tracks of each
+        chapter are available in the index as soon as its folder is listed, and
+        `progress` is called with the number of chapters done and the total. Setting
+        `stop` from another thread abandons the chapters not listed yet.
+        """
+        logger.info("Indexing backing tracks in {path}", path=self.backing_tracks_dir)
+        self._scan_chapters(
+            changed_only=False, max_workers=max_workers, progress=progress, stop=stop
         )
-    else:
-        raise ValueError(
-            f"Unsupported naming convention: {naming_convention}. "
-            f"Use one of {[f'NamingConvention.{e.name}' for e in NamingScheme]}",
+
+    def refresh(
+        self,
+        max_workers: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> bool:
+        """Scan again the chapters whose folder changed since they were last scanned.
+
+        The folders are checked and listed concurrently, as with `scan`. Returns
+        whether any chapter was scanned again.
+        """
+        return self._scan_chapters(
+            changed_only=True, max_workers=max_workers, progress=progress
         )
 
-    return track_path if track_path.is_file() else None
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the index to a JSON-serializable dictionary."""
+        with self._lock:
+            mtimes = dict(self._mtimes)
+            tracks = dict(self._tracks)
+        return {
+            "backing_tracks_dir": str(self.backing_tracks_dir),
+            "naming_scheme": self.naming_scheme.value,
+            "file_format": self.file_format.value,
+            "chapters": self.chapters.to_list(),
+            "mtimes": mtimes,
+            "tracks": {
+                str(exercise): str(path.relative_to(self.backing_tracks_dir))
+                for exercise, path in tracks.items()
+            },
+        }
+
+    def save(self, cache_path: Path | None = None) -> None:
+        """Save the index to the cache file."""
+        cache_path = cache_path or get_index_cache_path()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with cache_path.open("w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(
+        cls,
+        backing_tracks_dir: Path,
+        naming_scheme: NamingScheme = NamingScheme.DEFAULT,
+        file_format: FileFormat = FileFormat.WAV,
+        cache_path: Path | None = None,
+        chapters: ChapterMap | None = None,
+    ) -> "BackingTrackIndex":
+        """Return the index of the given directory, reusing the cache when possible.
+
+        The cached index is used if it was built for the same directory, naming
+        scheme, file format and chapters. Chapters whose folder changed since then
+        are scanned again, and the cache is updated if anything changed.
+        """
+        cache_path = cache_path or get_index_cache_path()
+        index = cls(backing_tracks_dir, naming_scheme, file_format, chapters)
+        cached = _read_index_cache(cache_path)
+        if cached is not None and (
+            cached["backing_tracks_dir"] == str(backing_tracks_dir)
+            and cached["naming_scheme"] == naming_scheme.value
+            and cached["file_format"] == file_format.value
+            and cached.get("chapters") == index.chapters.to_list()
+        ):
+            index._mtimes = cached["mtimes"]
+            index._tracks = {
+                int(exercise): backing_tracks_dir / path
+                for exercise, path in cached["tracks"].items()
+            }
+
+        if index.refresh():
+            index.save(cache_path)
+        return index
+
+
+def get_index_cache_path() -> Path:
+    """Return the path of the backing track index cache in the user cache dir."""
+    return Path(dirs.user_cache_dir) / INDEX_CACHE_FILENAME
+
+
+def _read_index_cache(cache_path: Path) -> dict[str, Any] | None:
+    """Read the cached index, returning None if it is missing or unreadable."""
+    try:
+        with cache_path.open("r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
 
 
 def play_backing_track(
+    player: Player,
     exercise: int,
-    backing_tracks_dir: Path,
-    naming_convention: NamingScheme = NamingScheme.DEFAULT,
-    file_format: FileFormat = FileFormat.WAV,
+    track_index: BackingTrackIndex,
 ) -> None:
     """Play the backing track for a given exercise.
 
-    This function locates the backing track file based on the exercise number,
-    backing tracks directory, naming convention, and file type. If the file is found,
-    it opens the track using the system's default application, otherwise it raises a
-    FileNotFoundError.
-    """
-    track_path = validate_backing_track(
-        exercise,
-        backing_tracks_dir,
-        naming_convention,
-        file_format,
-    )
+    The track is looked up in the backing track index, without touching the
+    filesystem, and played by the given player. If the index has no track for the
+    exercise, it raises a FileNotFoundError.
 
+    Raises:
+        FileNotFoundError: If the index has no backing track for the exercise.
+        OSError: If the backing track cannot be read.
+        ValueError: If the backing track is not a PCM WAV file.
+
+    """
+    track_path = track_index.get(exercise)
     if track_path is None:
         error_message = (
             f"Backing track for exercise {exercise} not found in directory "
-            f"{backing_tracks_dir}. Please check your configuration."
+            f"{track_index.backing_tracks_dir}. Please check your configuration."
         )
         logger.error(error_message)
         raise FileNotFoundError(error_message)
 
-    logger.info(f"Playing backing track '{track_path.name}'")
-    subprocess.Popen(  # noqa: S603
-        ["/usr/bin/open", str(track_path)],
-        stdout=subprocess.DEVNULL,
-    )
+    logger.info("Playing backing track '{track}'", track=track_path.name)
+    player.play(track_path)
@@ -1,8 +1,21 @@
+import json
+import os
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import suppress
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+from typing import Any
 
+from rhythm_trainer import dirs
+from rhythm_trainer.chapters import ChapterMap, default_chapter_map
 from rhythm_trainer.config import FileFormat, NamingScheme
 from rhythm_trainer.logger import get_logger
 
+PROBE_CACHE_FILENAME = "library_probe.json"
+PROBE_FILES_PER_CHAPTER = 8  # Files sampled in every chapter folder
+
 logger = get_logger(__name__)
 
 
@@ -43,60 +56,160 @@ def get_number_input(
             print("Please enter a valid number.")
 
 
-def infer_file_format(bk_tracks_dir: Path) -> FileFormat:
-    """Infer the file format from the file extension."""
-    acoustic_dir = bk_tracks_dir / "Acoustic"
-    if not acoustic_dir.is_dir():
+@dataclass(frozen=True)
+class LibraryProbe:
+    """File format and naming scheme inferred from a backing tracks directory."""
+
+    file_format: FileFormat
+    naming_scheme: NamingScheme
+
+
+def _folder_mtimes(bk_tracks_dir: Path, chapters: ChapterMap) -> dict[str, int]:
+    """Return the modification times of the directory and of its chapter folders."""
+    mtimes = {".": bk_tracks_dir.stat().st_mtime_ns}
+    for chapter in chapters:
+        try:
+            mtimes[chapter.folder] = (bk_tracks_dir / chapter.folder).stat().st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
+def _sample_track_names(bk_tracks_dir: Path, chapters: ChapterMap) -> Iterator[str]:
+    """Yield the names of up to PROBE_FILES_PER_CHAPTER files of every chapter."""
+    found_chapter = False
+    for chapter in chapters:
+        try:
+            with os.scandir(bk_tracks_dir / chapter.folder) as entries:
+                found_chapter = True
+                files = (entry.name for entry in entries if entry.is_file())
+                yield from islice(
+                    (name for name in files if not name.startswith(".")),
+                    PROBE_FILES_PER_CHAPTER,
+                )
+        except OSError:
+            continue
+
+    if not found_chapter:
         error_message = (
-            f"Backing tracks directory {bk_tracks_dir} does not contain an 'Acoustic' "
-            f"subdirectory.",
+            f"Backing tracks directory {bk_tracks_dir} does not contain any chapter "
+            f"folder."
         )
         logger.error(error_message)
         raise FileNotFoundError(error_message)
 
-    for file in acoustic_dir.iterdir():
-        if file.is_file():
-            if file.suffix.lower() == ".mp3":
-                return FileFormat.MP3
-            if file.suffix.lower() == ".wav":
-                return FileFormat.WAV
 
+def _infer_library(bk_tracks_dir: Path, chapters: ChapterMap) -> LibraryProbe:
+    """Infer the file format and naming scheme from a sample of every chapter.
+
+    Each sampled file votes for the format of its extension and for the naming
+    scheme of its name, and the most common ones win, so that a few stray files do
+    not change the result.
+    """
+    formats: Counter[FileFormat] = Counter()
+    schemes: Counter[NamingScheme] = Counter()
+    unsupported: set[str] = set()
+    for name in _sample_track_names(bk_tracks_dir, chapters):
+        suffix = Path(name).suffix.lower()
+        try:
+            formats[FileFormat(suffix.removeprefix("."))] += 1
+        except ValueError:
+            unsupported.add(suffix)
+            continue
+        if name.startswith("BK "):
+            schemes[NamingScheme.LOGICAL] += 1
+        elif " BK." in name:
+            schemes[NamingScheme.DEFAULT] += 1
+
+    if not formats:
+        if unsupported:
             error_message = (
-                f"Unsupported file format: {file.suffix}. "
-                f"Supported formats are {[f'.{e.value}' for e in FileFormat]}",
+                f"Unsupported file format: {', '.join(sorted(unsupported))}. "
+                f"Supported formats are {[f'.{e.value}' for e in FileFormat]}"
             )
             logger.error(error_message)
             raise ValueError(error_message)
+        error_message = (
+            f"No backing tracks found in {bk_tracks_dir} with a recognizable file "
+            f"format."
+        )
+        logger.error(error_message)
+        raise FileNotFoundError(error_message)
+    if not schemes:
+        error_message = (
+            f"No backing tracks found in {bk_tracks_dir} with a recognizable name."
+        )
+        logger.error(error_message)
+        raise FileNotFoundError(error_message)
+
+    return LibraryProbe(formats.most_common(1)[0][0], schemes.most_common(1)[0][0])
+
 
-    error_message = (
-        f"No backing tracks found in {bk_tracks_dir} with a recognizable file format.",
-    )
-    logger.error(error_message)
-    raise FileNotFoundError(error_message)
+def probe_library(
+    bk_tracks_dir: Path,
+    chapters: ChapterMap | None = None,
+    cache_path: Path | None = None,
+) -> LibraryProbe:
+    """Infer the file format and naming scheme of a backing tracks directory.
 
+    Naming schemes:
+        Default:
+            - {chapter} {exercise} BK.{file_format}
+        Logical:
+            - BK {chapter} {exercise:02d}.{file_format}
 
-def infer_naming_scheme(bk_tracks_dir: Path) -> NamingScheme:
-    """Infer the naming scheme from the file name.
+    A few files of every chapter folder are sampled in a single pass. The result is
+    cached along with the modification times of the directory and of its chapter
+    folders, so that the folders are only listed again once they changed.
+
+    Raises:
+        FileNotFoundError: If there is no chapter folder or no backing track.
+        ValueError: If the backing tracks only have unsupported file formats.
 
-    Default:
-        - {chapter} {exercise} BK.{file_format}
-    Logical:
-        - BK {chapter} {exercise:02d}.{file_format}
     """
-    acoustic_dir = bk_tracks_dir / "Acoustic"
-    if not acoustic_dir.is_dir():
-        raise FileNotFoundError(
-            f"Backing tracks directory {bk_tracks_dir} does not contain an 'Acoustic' "
-            f"subdirectory.",
-        )
+    chapters = chapters or default_chapter_map()
+    cache_path = cache_path or get_probe_cache_path()
+    mtimes = _folder_mtimes(bk_tracks_dir, chapters)
+    cached = _read_probe_cache(cache_path)
+    if (
+        cached is not None
+        and cached.get("backing_tracks_dir") == str(bk_tracks_dir)
+        and cached.get("mtimes") == mtimes
+    ):
+        with suppress(KeyError, ValueError):
+            return LibraryProbe(
+                FileFormat(cached["file_format"]),
+                NamingScheme(cached["naming_scheme"]),
+            )
+
+    logger.info("Probing backing tracks in {path}", path=bk_tracks_dir)
+    probe = _infer_library(bk_tracks_dir, chapters)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with cache_path.open("w") as file:
+            json.dump(
+                {
+                    "backing_tracks_dir": str(bk_tracks_dir),
+                    "mtimes": mtimes,
+                    "file_format": probe.file_format.value,
+                    "naming_scheme": probe.naming_scheme.value,
+                },
+                file,
+            )
+    except OSError as e:
+        logger.warning("Could not save the library probe: {error}", error=e)
+    return probe
+
+
+def get_probe_cache_path() -> Path:
+    """Return the path of the library probe cache in the user cache dir."""
+    return Path(dirs.user_cache_dir) / PROBE_CACHE_FILENAME
 
-    for file in acoustic_dir.iterdir():
-        if "BK" in file.name:
-            if file.name.startswith("BK "):
-                return NamingScheme.LOGICAL
-            if " BK." in file.name:
-                return NamingScheme.DEFAULT
 
-    raise FileNotFoundError(
-        f"No backing tracks found in {bk_tracks_dir} with a recognizable name.",
-    )
+def _read_probe_cache(cache_path: Path) -> dict[str, Any] | None:
+    """Read the cached probe, returning None if it is missing or unreadable."""
+    try:
+        with cache_path.open("r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
@@ -1,8 +1,10 @@
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 
 from rhythm_trainer import dirs
+from rhythm_trainer.logger import shutdown_logging
 
 
 @pytest.fixture(autouse=True)
@@ -23,6 +25,11 @@ def patch_platformdirs(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
         "user_data_dir",
         property(lambda _: str(tmp_path / "data")),
     )
+    monkeypatch.setattr(
+        type(dirs),
+        "user_cache_dir",
+        property(lambda _: str(tmp_path / "cache")),
+    )
     monkeypatch.setattr(
         type(dirs),
         "user_log_dir",
@@ -33,3 +40,10 @@ def patch_platformdirs(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
         "user_downloads_dir",
         property(lambda _: str(tmp_path / "downloads")),
     )
+
+
+@pytest.fixture(autouse=True)
+def reset_logging(patch_platformdirs: None) -> Iterator[None]:
+    """Stop the logging pipeline, so that the next test logs to its own dir."""
+    yield
+    shutdown_logging()
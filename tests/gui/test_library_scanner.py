@@ -0,0 +1,163 @@
+import json
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pytestqt.qtbot import QtBot
+
+from rhythm_trainer.chapters import default_chapter_map
+from rhythm_trainer.config import FileFormat, NamingScheme
+from rhythm_trainer.gui.library_scanner import LibraryScanner
+from rhythm_trainer.tracks import get_index_cache_path
+from rhythm_trainer.utils import LibraryProbe, probe_library
+
+
+@pytest.fixture
+def scanner() -> Iterator[LibraryScanner]:
+    library_scanner = LibraryScanner()
+    yield library_scanner
+    library_scanner.wait()
+
+
+def make_library(path: Path) -> Path:
+    (path / "Funk").mkdir(parents=True)
+    (path / "Funk" / "Funk 31 BK.wav").touch()
+    (path / "Funk" / "Funk 32 BK.wav").touch()
+    (path / "Jazz").mkdir()
+    (path / "Jazz" / "Jazz 61 BK.wav").touch()
+    return path
+
+
+def test_scan_indexes_the_library(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+) -> None:
+    bk_dir = make_library(tmp_path / "bk_tracks")
+    chapters = default_chapter_map()
+    progress: list[tuple[int, int]] = []
+
+    scan = scanner.start(bk_dir, chapters)
+    scan.progress.connect(lambda done, total: progress.append((done, total)))
+    assert scan.is_running()
+    assert scanner.is_running()
+    with qtbot.waitSignal(scan.finished) as blocker:
+        pass
+
+    index = blocker.args[0]
+    assert not scan.is_running()
+    assert not scanner.is_running()
+    assert progress[-1] == (9, 9)
+    assert index.naming_scheme == NamingScheme.DEFAULT
+    assert index.file_format == FileFormat.WAV
+    assert len(index) == 3
+    assert index.get(32) == bk_dir / "Funk" / "Funk 32 BK.wav"
+
+    with get_index_cache_path().open() as file:
+        assert json.load(file) == index.to_dict()
+
+
+def test_index_is_available_before_the_scan_finishes(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+) -> None:
+    bk_dir = make_library(tmp_path / "bk_tracks")
+
+    scan = scanner.start(bk_dir, default_chapter_map())
+    with (
+        qtbot.waitSignal(scan.indexing) as indexing,
+        qtbot.waitSignal(scan.finished) as finished,
+    ):
+        pass
+
+    assert indexing.args[0] is finished.args[0]
+
+
+def test_scan_failure_is_reported(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+) -> None:
+    scan = scanner.start(tmp_path, default_chapter_map())
+    with qtbot.waitSignal(scan.failed) as blocker:
+        pass
+
+    assert not scanner.is_running()
+    assert "does not contain any chapter folder" in blocker.args[0]
+
+
+@pytest.fixture
+def blocked_probe(monkeypatch: pytest.MonkeyPatch) -> Iterator[threading.Event]:
+    """Hold every scan in the probe until the returned event is set."""
+    release = threading.Event()
+
+    def probe(*args: Any) -> LibraryProbe:
+        release.wait()
+        return probe_library(*args)
+
+    monkeypatch.setattr("rhythm_trainer.gui.library_scanner.probe_library", probe)
+    yield release
+    release.set()
+
+
+def test_cancel_stops_the_scan(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+    blocked_probe: threading.Event,
+) -> None:
+    bk_dir = make_library(tmp_path / "bk_tracks")
+    finished: list[object] = []
+    scan = scanner.start(bk_dir, default_chapter_map())
+    scan.finished.connect(finished.append)
+
+    with qtbot.waitSignal(scan.cancelled):
+        scan.cancel()
+        blocked_probe.set()
+
+    assert not scanner.is_running()
+    assert finished == []
+    assert not get_index_cache_path().exists()
+
+
+def test_cancel_stops_that_scan_only(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+    blocked_probe: threading.Event,
+) -> None:
+    first_dir = make_library(tmp_path / "first")
+    second_dir = make_library(tmp_path / "second")
+    first = scanner.start(first_dir, default_chapter_map())
+    second = scanner.start(second_dir, default_chapter_map())
+
+    with (
+        qtbot.waitSignal(second.cancelled),
+        qtbot.waitSignal(first.finished) as finished,
+    ):
+        second.cancel()
+        blocked_probe.set()
+
+    assert finished.args[0].backing_tracks_dir == first_dir
+    assert not scanner.is_running()
+
+
+def test_scanner_cancel_stops_every_scan(
+    scanner: LibraryScanner,
+    qtbot: QtBot,
+    tmp_path: Path,
+    blocked_probe: threading.Event,
+) -> None:
+    scans = [
+        scanner.start(make_library(tmp_path / name), default_chapter_map())
+        for name in ("first", "second")
+    ]
+
+    with qtbot.waitSignals([scan.cancelled for scan in scans]):
+        scanner.cancel()
+        blocked_probe.set()
+
+    assert not scanner.is_running()
@@ -0,0 +1,312 @@
+import time
+import wave
+from pathlib import Path
+
+from pytestqt.qtbot import QtBot
+
+from rhythm_trainer import dirs
+from rhythm_trainer.chapters import default_chapter_map
+from rhythm_trainer.config import (
+    CONFIG_FILENAME,
+    AudioOutput,
+    Config,
+    FileFormat,
+    NamingScheme,
+    get_config_path,
+    save_config,
+)
+from rhythm_trainer.exercises import SECONDS_PER_DAY
+from rhythm_trainer.gui.main_window import MainWindow
+from rhythm_trainer.storage import get_state_path
+from rhythm_trainer.strategies import SpacedRepetitionStrategy
+from rhythm_trainer.tracks import BackingTrackIndex
+
+
+def test_random_mode_follows_the_plan(qtbot: QtBot) -> None:
+    save_config(Config(csv_path=Path(dirs.user_data_dir) / "ex.csv", plan_size=5))
+    window = MainWindow()
+    qtbot.addWidget(window)
+
+    upcoming = window.upcoming_exercises
+    assert len(upcoming) == 4
+    for exercise in upcoming:
+        window.next_exercise()
+        assert window.current_exercise == exercise
+
+    window.next_exercise()
+    assert len(window.upcoming_exercises) == 4
+    window.close()
+
+
+def test_due_reviews_are_served_during_a_plan(qtbot: QtBot) -> None:
+    save_config(
+        Config(
+            csv_path=Path(dirs.user_data_dir) / "ex.csv",
+            plan_size=5,
+            strategy="sm2",
+        )
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    exercise = window.current_exercise
+    assert exercise is not None
+    window.bad_feedback()
+    upcoming = window.upcoming_exercises
+
+    now = time.time()
+    window.strategy.clock = lambda: now + 2 * SECONDS_PER_DAY
+    window.next_exercise()
+
+    assert window.current_exercise == exercise
+    assert window.upcoming_exercises == upcoming
+    window.close()
+
+
+def test_session_shortcut_starts_a_session(qtbot: QtBot) -> None:
+    window = MainWindow()
+    qtbot.addWidget(window)
+
+    window._activate_tab_3()
+
+    assert window.tabs.currentWidget() is window.session_mode
+    assert window.current_exercise is not None
+    assert window.current_exercise not in window.session_mode.remaining_exercises
+    window.close()
+
+
+def test_random_draws_resume_after_restart(qtbot: QtBot) -> None:
+    csv_path = Path(dirs.user_data_dir) / "ex.csv"
+    save_config(Config(csv_path=csv_path, recent_window=0, seed=3))
+
+    def draw_exercises(count: int) -> list[int | None]:
+        window = MainWindow()
+        qtbot.addWidget(window)
+        exercises = [window.current_exercise]
+        for _ in range(count - 1):
+            window.next_exercise()
+            exercises.append(window.current_exercise)
+        window.close()
+        return exercises
+
+    first_run = draw_exercises(5)
+    second_run = draw_exercises(5)
+    get_state_path(csv_path, "rng").unlink()
+
+    assert draw_exercises(10) == first_run + second_run
+
+
+def test_strategy_state_is_saved(qtbot: QtBot) -> None:
+    save_config(Config(csv_path=Path(dirs.user_data_dir) / "ex.csv", strategy="sm2"))
+    window = MainWindow()
+    qtbot.addWidget(window)
+    exercise = window.current_exercise
+    window.bad_feedback()
+    window.close()
+
+    window = MainWindow()
+    qtbot.addWidget(window)
+    assert isinstance(window.strategy, SpacedRepetitionStrategy)
+    review = window.strategy.review(exercise)
+    assert review is not None
+    assert review.repetitions == 0
+    assert exercise in window.strategy.recent
+    window.close()
+
+
+def test_config_is_only_saved_when_the_probe_changes_it(
+    qtbot: QtBot,
+    tmp_path: Path,
+) -> None:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Funk").mkdir(parents=True)
+    (bk_dir / "Funk" / "BK Funk 31.mp3").touch()
+    save_config(
+        Config(csv_path=Path(dirs.user_data_dir) / "ex.csv", backing_tracks_dir=bk_dir)
+    )
+    config_path = get_config_path(CONFIG_FILENAME)
+
+    window = MainWindow()
+    qtbot.addWidget(window)
+    assert window.config.file_format == FileFormat.MP3
+    assert window.config.naming_scheme == NamingScheme.LOGICAL
+    window.close()
+    saved = config_path.stat().st_mtime_ns
+
+    window = MainWindow()
+    qtbot.addWidget(window)
+    assert window.config.file_format == FileFormat.MP3
+    window.close()
+    assert config_path.stat().st_mtime_ns == saved
+
+
+def test_backing_track_playback(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Funk").mkdir(parents=True)
+    with wave.open(str(bk_dir / "Funk" / "Funk 31 BK.wav"), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(8000)
+        writer.writeframes(bytes(16000 * 30))
+    save_config(
+        Config(
+            csv_path=Path(dirs.user_data_dir) / "ex.csv",
+            backing_tracks_dir=bk_dir,
+            audio_output=AudioOutput.NULL,
+        )
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    window.current_exercise = 31
+
+    window.play_backing_track()
+    assert window.player.track == bk_dir / "Funk" / "Funk 31 BK.wav"
+    assert window.player.is_playing()
+    assert window.good_button.isEnabled()
+
+    window.seek_backing_track(10)
+    assert window.player.position >= 10
+    window.seek_backing_track(-20)
+    assert window.player.position < 10
+
+    window.stop_backing_track()
+    assert not window.player.is_playing()
+
+    window.play_backing_track()
+    window.good_feedback()
+    assert not window.player.is_playing()
+    window.close()
+
+
+def test_backing_track_playback_error(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Funk").mkdir(parents=True)
+    (bk_dir / "Funk" / "Funk 31 BK.wav").write_bytes(b"not a wave file")
+    save_config(
+        Config(
+            csv_path=Path(dirs.user_data_dir) / "ex.csv",
+            backing_tracks_dir=bk_dir,
+            audio_output=AudioOutput.NULL,
+        )
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    window.current_exercise = 31
+
+    window.play_backing_track()
+
+    status_bar = window.statusBar()
+    assert status_bar is not None
+    assert "Could not decode the WAV data" in status_bar.currentMessage()
+    assert window.player.track is None
+    assert window.good_button.isEnabled()
+    window.close()
+
+
+def make_library(bk_dir: Path) -> Path:
+    for chapter in default_chapter_map():
+        (bk_dir / chapter.folder).mkdir(parents=True)
+        for exercise in chapter.exercises:
+            track = bk_dir / chapter.folder / f"{chapter.name} {exercise} BK.wav"
+            with wave.open(str(track), "wb") as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(8000)
+                writer.writeframes(bytes(100))
+    return bk_dir
+
+
+def test_upcoming_backing_tracks_are_prefetched(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = make_library(tmp_path / "tracks")
+    save_config(
+        Config(
+            csv_path=Path(dirs.user_data_dir) / "ex.csv",
+            backing_tracks_dir=bk_dir,
+            plan_size=10,
+            audio_output=AudioOutput.NULL,
+        )
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    window._prefetcher.wait()
+
+    assert window.track_index is not None
+    for exercise in [window.current_exercise, *window.upcoming_exercises[:3]]:
+        assert exercise is not None
+        assert window.track_index.get(exercise) in window.track_cache
+
+    window.play_backing_track()
+    window.good_feedback()
+    window._prefetcher.wait()
+    window.play_backing_track()
+    assert (window.track_cache.hits, window.track_cache.misses) == (2, 0)
+    window.close()
+
+
+def test_predicted_exercises_are_shown_next(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = make_library(tmp_path / "tracks")
+    save_config(
+        Config(
+            csv_path=Path(dirs.user_data_dir) / "ex.csv",
+            backing_tracks_dir=bk_dir,
+            audio_output=AudioOutput.NULL,
+        )
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    window._prefetcher.wait()
+    predicted = window.strategy.upcoming
+    assert len(predicted) == 3
+
+    for exercise in predicted:
+        window.play_backing_track()
+        window.bad_feedback()
+        assert window.current_exercise == exercise
+    window._prefetcher.wait()
+    window.play_backing_track()
+    assert window.track_cache.misses == 0
+    window.close()
+
+
+def test_index_from_the_settings_is_reused(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Funk").mkdir(parents=True)
+    (bk_dir / "Funk" / "BK Funk 31.mp3").touch()
+    save_config(
+        Config(csv_path=Path(dirs.user_data_dir) / "ex.csv", backing_tracks_dir=bk_dir)
+    )
+    index = BackingTrackIndex(bk_dir, NamingScheme.LOGICAL, FileFormat.MP3)
+    window = MainWindow()
+    qtbot.addWidget(window)
+
+    window._load_config_and_exercises(index)
+
+    assert window.track_index is index
+    assert window.config.naming_scheme == NamingScheme.LOGICAL
+    assert window.config.file_format == FileFormat.MP3
+    window.close()
+
+
+def test_cancelled_library_scan_is_started_again(qtbot: QtBot, tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Funk").mkdir(parents=True)
+    (bk_dir / "Funk" / "Funk 31 BK.wav").touch()
+    save_config(
+        Config(csv_path=Path(dirs.user_data_dir) / "ex.csv", backing_tracks_dir=bk_dir)
+    )
+    window = MainWindow()
+    qtbot.addWidget(window)
+    scan = window._library_scanner.start(bk_dir, window.config.chapters)
+    window._follow_library_scan(scan)
+
+    scan.cancel()
+    with qtbot.waitSignal(scan.cancelled):
+        pass
+    rescan = window._library_scan
+    assert rescan is not None
+    assert rescan is not scan
+    with qtbot.waitSignal(rescan.finished) as finished:
+        pass
+
+    assert window.track_index is finished.args[0]
+    assert window.track_index.get(31) == bk_dir / "Funk" / "Funk 31 BK.wav"
+    window.close()
@@ -1,12 +1,20 @@
 from pathlib import Path
-from typing import Literal
 
 import pytest
 from PyQt6.QtWidgets import QPushButton
 from pytestqt.qtbot import QtBot
 
 from rhythm_trainer.config import FileFormat, NamingScheme
-from rhythm_trainer.gui.modes import BaseModeWidget, ManualModeWidget, RandomModeWidget
+from rhythm_trainer.exercises import RecentWindow
+from rhythm_trainer.gui.modes import (
+    BaseModeWidget,
+    ManualModeWidget,
+    RandomModeWidget,
+    SessionModeWidget,
+)
+from rhythm_trainer.sampler import WeightedSampler
+from rhythm_trainer.strategies import WeightedStrategy
+from rhythm_trainer.tracks import BackingTrackIndex
 
 
 @pytest.fixture
@@ -16,82 +24,62 @@ def button(qtbot: QtBot) -> QPushButton:
     return btn
 
 
-def test_button_disabled_when_no_exercise(button: QPushButton, tmp_path: Path) -> None:
+@pytest.fixture
+def track_index(tmp_path: Path) -> BackingTrackIndex:
+    chapter = tmp_path / "Acoustic"
+    chapter.mkdir()
+    (chapter / "Acoustic 5 BK.wav").touch()
+    index = BackingTrackIndex(tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+    index.scan()
+    return index
+
+
+def test_button_disabled_when_no_exercise(
+    button: QPushButton,
+    track_index: BackingTrackIndex,
+) -> None:
     widget = BaseModeWidget(button)
     widget.current_exercise = None
-    widget.enable_bk_track_button(tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+    widget.enable_bk_track_button(track_index)
     assert not button.isEnabled()
 
 
 def test_button_enabled_when_track_exists(
     button: QPushButton,
-    monkeypatch: pytest.MonkeyPatch,
-    tmp_path: Path,
+    track_index: BackingTrackIndex,
 ) -> None:
     widget = BaseModeWidget(button)
     widget.current_exercise = 5
-
-    def fake_validate(
-        _ex: int,
-        _bk_dir: Path,
-        _naming: NamingScheme,
-        _fmt: FileFormat,
-    ) -> Path:
-        return tmp_path / "fake_track.wav"
-
-    monkeypatch.setattr(
-        "rhythm_trainer.gui.modes.validate_backing_track",
-        fake_validate,
-    )
-
-    widget.enable_bk_track_button(tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+    widget.enable_bk_track_button(track_index)
     assert button.isEnabled()
 
 
 def test_button_disabled_when_track_missing(
     button: QPushButton,
-    monkeypatch: pytest.MonkeyPatch,
-    tmp_path: Path,
+    track_index: BackingTrackIndex,
 ) -> None:
     widget = BaseModeWidget(button)
     widget.current_exercise = 7
-
-    monkeypatch.setattr(
-        "rhythm_trainer.gui.modes.validate_backing_track",
-        lambda *_args: None,
-    )
-
-    widget.enable_bk_track_button(tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+    widget.enable_bk_track_button(track_index)
     assert not button.isEnabled()
 
 
-def test_validate_backing_track_called_with_correct_args(
+def test_button_does_not_touch_filesystem(
     button: QPushButton,
+    track_index: BackingTrackIndex,
     monkeypatch: pytest.MonkeyPatch,
-    tmp_path: Path,
 ) -> None:
-    widget = BaseModeWidget(button)
-    widget.current_exercise = 42
-    called = {}
-
-    def fake_validate(
-        ex: int,
-        bk_dir: Path,
-        naming: NamingScheme,
-        fmt: FileFormat,
-    ) -> None:
-        called.update({"ex": ex, "bk_dir": bk_dir, "naming": naming, "fmt": fmt})
+    def fail(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("unexpected filesystem access")
 
-    monkeypatch.setattr(
-        "rhythm_trainer.gui.modes.validate_backing_track",
-        fake_validate,
-    )
+    monkeypatch.setattr(Path, "is_file", fail)
+    monkeypatch.setattr(Path, "is_dir", fail)
+    monkeypatch.setattr("os.scandir", fail)
 
-    widget.enable_bk_track_button(tmp_path, NamingScheme.LOGICAL, FileFormat.MP3)
-    assert called["ex"] == 42
-    assert called["bk_dir"] == tmp_path
-    assert called["naming"] == NamingScheme.LOGICAL
-    assert called["fmt"] == FileFormat.MP3
+    widget = BaseModeWidget(button)
+    widget.current_exercise = 5
+    widget.enable_bk_track_button(track_index)
+    assert button.isEnabled()
 
 
 def test_widget_construction_sets_label(button: QPushButton) -> None:
@@ -106,48 +94,21 @@ def test_pick_exercise_sets_current_and_label(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     widget = RandomModeWidget(button)
-    # Patch pick_random_exercise to return a known value
-    monkeypatch.setattr(
-        "rhythm_trainer.gui.modes.pick_random_exercise",
-        lambda _exercises, _weights, _buffer: 42,
-    )
-    exercises = [1, 2, 3]
-    weights = [1, 1, 1]
-    buffer = []
-    result = widget.pick_exercise(exercises, weights, buffer)
+    strategy = WeightedStrategy(WeightedSampler([1, 2, 3], [1, 1, 1]), RecentWindow())
+    # Patch the strategy to return a known value
+    monkeypatch.setattr(strategy, "draw", lambda: 42)
+    result = widget.pick_exercise(strategy)
     assert widget.current_exercise == 42
     assert widget.exercise_label.text() == "Exercise #42"
     assert result == 42
 
 
-def test_pick_exercise_passes_correct_args(
-    button: QPushButton,
-    monkeypatch: pytest.MonkeyPatch,
-) -> None:
+def test_pick_exercise_draws_from_strategy(button: QPushButton) -> None:
     widget = RandomModeWidget(button)
-    called = {}
-
-    def fake_picker(
-        exercises: list[int],
-        weights: list[int],
-        buffer: list[int],
-    ) -> Literal[7]:
-        called["exercises"] = exercises
-        called["weights"] = weights
-        called["buffer"] = buffer
-        return 7
-
-    monkeypatch.setattr(
-        "rhythm_trainer.gui.modes.pick_random_exercise",
-        fake_picker,
-    )
-    exercises = [10, 20]
-    weights = [2, 3]
-    buffer = [99]
-    widget.pick_exercise(exercises, weights, buffer)
-    assert called["exercises"] == exercises
-    assert called["weights"] == weights
-    assert called["buffer"] == buffer
+    recent = RecentWindow()
+    strategy = WeightedStrategy(WeightedSampler([10, 20], [0, 3]), recent)
+    assert widget.pick_exercise(strategy) == 20
+    assert list(recent) == [20]
 
 
 def test_widget_construction(button: QPushButton) -> None:
@@ -217,3 +178,23 @@ def test_validate_exercise_input_no_validator(
 
     widget.exercise_input.setText("5")
     assert widget.current_exercise is None
+
+
+def test_session_mode_walks_through_distinct_exercises(button: QPushButton) -> None:
+    widget = SessionModeWidget(button, 10)
+    widget.size_input.setValue(4)
+    widget.start_session(list(range(1, 11)), [1] * 10)
+
+    picked = [widget.pick_exercise() for _ in range(4)]
+    assert len(set(picked)) == 4
+    assert "(4/4)" in widget.exercise_label.text()
+    assert not widget.in_progress
+
+    assert widget.pick_exercise() is None
+    assert widget.current_exercise is None
+
+
+def test_session_mode_size_is_bounded(button: QPushButton) -> None:
+    widget = SessionModeWidget(button, 5)
+    assert widget.size_input.maximum() == 5
+    assert widget.size_input.value() == 5
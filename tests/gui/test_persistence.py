@@ -0,0 +1,146 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from pytestqt.qtbot import QtBot
+
+from rhythm_trainer.exercises import (
+    FeedbackEvent,
+    get_exercises_and_weights,
+    get_journal_path,
+    read_journal,
+)
+from rhythm_trainer.gui.persistence import PersistenceWorker
+from rhythm_trainer.storage import CsvWeightStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> CsvWeightStore:
+    return CsvWeightStore(tmp_path / "exercises.csv")
+
+
+@pytest.fixture
+def worker(store: CsvWeightStore) -> Iterator[PersistenceWorker]:
+    # A long interval so that only explicit flushes write to disk
+    persistence = PersistenceWorker(store, 60_000)
+    yield persistence
+    persistence.wait()
+
+
+def test_flush_writes_all_pending_events(
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+) -> None:
+    worker.submit(FeedbackEvent(1, 1, 1.0))
+    worker.submit(FeedbackEvent(2, -1, 2.0))
+    assert not get_journal_path(store.csv_path).exists()
+
+    worker.flush()
+    worker.wait()
+
+    assert list(read_journal(store.csv_path)) == [
+        FeedbackEvent(1, 1, 1.0),
+        FeedbackEvent(2, -1, 2.0),
+    ]
+
+
+def test_flush_coalesces_into_one_write(
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    writes = []
+    monkeypatch.setattr(
+        store,
+        "append",
+        lambda events: writes.append(list(events)),
+    )
+    for exercise in range(1, 6):
+        worker.submit(FeedbackEvent(exercise, 1))
+
+    worker.flush()
+    worker.flush()
+    worker.wait()
+
+    assert len(writes) == 1
+    assert [event.exercise for event in writes[0]] == [1, 2, 3, 4, 5]
+
+
+def test_write_errors_are_reported_and_retried(
+    qtbot: QtBot,
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def failing_append(_events: list[FeedbackEvent]) -> None:
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(store, "append", failing_append)
+    event = FeedbackEvent(1, 1)
+    worker.submit(event)
+
+    with qtbot.waitSignal(worker.error) as blocker:
+        worker.flush()
+
+    assert blocker.args is not None
+    assert "read-only" in blocker.args[0]
+
+    monkeypatch.undo()
+    worker.flush()
+    worker.wait()
+    assert list(read_journal(store.csv_path)) == [event]
+
+
+def test_close_writes_pending_events_and_compacts(
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+) -> None:
+    worker.submit(FeedbackEvent(3, 1))
+
+    worker.close()
+
+    assert not get_journal_path(store.csv_path).exists()
+    _, weights = get_exercises_and_weights(store.csv_path, 1, 5)
+    assert weights == [1, 1, 2, 1, 1]
+
+
+def test_close_retries_a_failed_pooled_write(
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def failing_append(_events: list[FeedbackEvent]) -> None:
+        monkeypatch.undo()
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(store, "append", failing_append)
+    worker.submit(FeedbackEvent(2, 1))
+    worker.flush()
+    worker.submit(FeedbackEvent(3, 1))
+
+    worker.close()
+
+    _, weights = get_exercises_and_weights(store.csv_path, 1, 5)
+    assert weights == [1, 2, 2, 1, 1]
+
+
+def test_close_reports_errors(
+    qtbot: QtBot,
+    store: CsvWeightStore,
+    worker: PersistenceWorker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def failing_compact() -> None:
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(store, "compact", failing_compact)
+
+    with qtbot.waitSignal(worker.error):
+        worker.close()
+
+
+def test_timer_flushes(qtbot: QtBot, store: CsvWeightStore) -> None:
+    worker = PersistenceWorker(store, 10)
+    worker.submit(FeedbackEvent(1, 1))
+    qtbot.waitUntil(lambda: get_journal_path(store.csv_path).exists())
+    worker.close()
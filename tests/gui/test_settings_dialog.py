@@ -1,13 +1,18 @@
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 from PyQt6.QtCore import QSize
-from PyQt6.QtWidgets import QFileDialog
+from PyQt6.QtWidgets import QDialog, QFileDialog
 from pytestqt.qtbot import QtBot
 
 from rhythm_trainer import dirs
+from rhythm_trainer.chapters import Chapter, ChapterMap
 from rhythm_trainer.config import MAX_EXERCISES, Config
+from rhythm_trainer.gui.library_scanner import LibraryScanner
 from rhythm_trainer.gui.settings_dialog import SettingsDialog
+from rhythm_trainer.tracks import BackingTrackIndex
 
 
 @pytest.fixture
@@ -85,6 +90,52 @@ def test_browse_bk_tracks_dir(
     assert dialog.bk_tracks_dir == bk_dir_path
 
 
+def test_browse_bk_tracks_dir_scans_in_background(
+    dialog: SettingsDialog,
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bk_dir_path = tmp_path / "bk_tracks"
+    for chapter, exercise in [("Acoustic", 1), ("Soul", 82)]:
+        (bk_dir_path / chapter).mkdir(parents=True)
+        (bk_dir_path / chapter / f"{chapter} {exercise} BK.mp3").touch()
+    monkeypatch.setattr(QFileDialog, "exec", lambda self: 1)
+    monkeypatch.setattr(QFileDialog, "selectedFiles", lambda self: [str(bk_dir_path)])
+
+    dialog._browse_bk_tracks_dir()
+    assert dialog.bk_tracks_progress.isVisibleTo(dialog)
+    assert not dialog.bk_tracks_line.isVisibleTo(dialog)
+    assert dialog.library_scan is not None
+    with qtbot.waitSignal(dialog.library_scan.finished):
+        pass
+
+    assert dialog.track_index is not None
+    assert dialog.track_index.get(82) == bk_dir_path / "Soul" / "Soul 82 BK.mp3"
+    assert dialog.bk_tracks_progress.value() == 9
+    assert not dialog.bk_tracks_progress.isVisibleTo(dialog)
+    assert dialog.bk_tracks_line.isVisibleTo(dialog)
+    assert dialog.bk_tracks_line.toolTip().endswith("2 backing tracks found")
+
+
+def test_browse_bk_tracks_dir_reports_scan_errors(
+    dialog: SettingsDialog,
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(QFileDialog, "exec", lambda self: 1)
+    monkeypatch.setattr(QFileDialog, "selectedFiles", lambda self: [str(tmp_path)])
+
+    dialog._browse_bk_tracks_dir()
+    assert dialog.library_scan is not None
+    with qtbot.waitSignal(dialog.library_scan.failed):
+        pass
+
+    assert dialog.track_index is None
+    assert "does not contain any chapter folder" in dialog.bk_tracks_line.toolTip()
+
+
 @pytest.mark.parametrize("value", [1, 13, 17, 21, 42, 90])
 def test_set_first_exercise(dialog: SettingsDialog, value: int) -> None:
     dialog.range_min_spin.setValue(value)
@@ -124,6 +175,27 @@ def test_read_config_with_bk_dir(dialog: SettingsDialog) -> None:
     assert dialog.range_max_spin.value() == 27
 
 
+def test_read_config_takes_the_range_limit_from_the_chapters(
+    dialog: SettingsDialog,
+) -> None:
+    config = Config(
+        csv_path=Path(dirs.user_data_dir) / "test.csv",
+        first_exercise=13,
+        last_exercise=150,
+        chapters=ChapterMap([Chapter("Funk", 1, 60), Chapter("Jazz", 61, 120)]),
+    )
+    dialog.read_config(config)
+
+    assert dialog.range_min_spin.maximum() == 120
+    assert dialog.range_max_spin.maximum() == 120
+    assert dialog.last_exercise == 120
+
+    dialog.range_max_spin.setValue(100)
+    dialog.range_min_spin.setValue(95)
+    assert dialog.range_max_spin.maximum() == 120
+    assert (dialog.first_exercise, dialog.last_exercise) == (95, 100)
+
+
 def test_read_config_without_bk_dir(dialog: SettingsDialog) -> None:
     csv_path = Path(dirs.user_data_dir) / "test.csv"
     config = Config(
@@ -144,3 +216,110 @@ def test_read_config_without_bk_dir(dialog: SettingsDialog) -> None:
     assert dialog.last_exercise == 27
     assert dialog.range_min_spin.value() == 13
     assert dialog.range_max_spin.value() == 27
+
+
+@pytest.fixture
+def blocked_listing(monkeypatch: pytest.MonkeyPatch) -> Iterator[threading.Event]:
+    """Hold the listing of every chapter folder until the returned event is set."""
+    release = threading.Event()
+    list_chapter = BackingTrackIndex._list_chapter
+
+    def blocked(
+        self: BackingTrackIndex,
+        chapter: Chapter,
+    ) -> tuple[int | None, set[str] | None]:
+        release.wait()
+        return list_chapter(self, chapter)
+
+    monkeypatch.setattr(BackingTrackIndex, "_list_chapter", blocked)
+    yield release
+    release.set()
+
+
+def browse_library(
+    dialog: SettingsDialog,
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Path:
+    bk_dir_path = tmp_path / "bk_tracks"
+    (bk_dir_path / "Soul").mkdir(parents=True)
+    (bk_dir_path / "Soul" / "Soul 82 BK.wav").touch()
+    monkeypatch.setattr(QFileDialog, "exec", lambda self: 1)
+    monkeypatch.setattr(QFileDialog, "selectedFiles", lambda self: [str(bk_dir_path)])
+    dialog._browse_bk_tracks_dir()
+    assert dialog.library_scan is not None
+    with qtbot.waitSignal(dialog.library_scan.indexing):
+        pass
+    return bk_dir_path
+
+
+def test_accepting_leaves_the_scan_running(
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    blocked_listing: threading.Event,
+) -> None:
+    scanner = LibraryScanner()
+    dialog = SettingsDialog(scanner)
+    qtbot.addWidget(dialog)
+    bk_dir_path = browse_library(dialog, qtbot, tmp_path, monkeypatch)
+    index = dialog.track_index
+
+    scan = dialog.library_scan
+    assert scan is not None
+
+    dialog.done(QDialog.DialogCode.Accepted)
+    assert scan.is_running()
+    assert dialog.library_scan is scan
+
+    with qtbot.waitSignal(scan.finished):
+        blocked_listing.set()
+    assert dialog.track_index is index
+    assert index is not None
+    assert index.get(82) == bk_dir_path / "Soul" / "Soul 82 BK.wav"
+    scanner.wait()
+
+
+def test_cancelling_stops_the_scan(
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    blocked_listing: threading.Event,
+) -> None:
+    scanner = LibraryScanner()
+    dialog = SettingsDialog(scanner)
+    qtbot.addWidget(dialog)
+    browse_library(dialog, qtbot, tmp_path, monkeypatch)
+    scan = dialog.library_scan
+    assert scan is not None
+
+    dialog.done(QDialog.DialogCode.Rejected)
+
+    with qtbot.waitSignal(scan.cancelled):
+        blocked_listing.set()
+    assert dialog.track_index is None
+    assert dialog.library_scan is None
+    scanner.wait()
+
+
+def test_cancelling_leaves_the_scan_of_another_dialog_running(
+    qtbot: QtBot,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    blocked_listing: threading.Event,
+) -> None:
+    scanner = LibraryScanner()
+    accepted = SettingsDialog(scanner)
+    qtbot.addWidget(accepted)
+    browse_library(accepted, qtbot, tmp_path, monkeypatch)
+    accepted.done(QDialog.DialogCode.Accepted)
+    scan = accepted.library_scan
+    assert scan is not None
+    cancelled = SettingsDialog(scanner)
+    qtbot.addWidget(cancelled)
+    cancelled.done(QDialog.DialogCode.Rejected)
+
+    with qtbot.waitSignal(scan.finished):
+        blocked_listing.set()
+    scanner.wait()
@@ -0,0 +1,101 @@
+import threading
+from pathlib import Path
+
+import pytest
+from pytestqt.qtbot import QtBot
+
+from rhythm_trainer.config import FileFormat, NamingScheme
+from rhythm_trainer.gui.track_watcher import TrackIndexWatcher
+from rhythm_trainer.tracks import BackingTrackIndex, get_index_cache_path
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> BackingTrackIndex:
+    bk_dir = tmp_path / "tracks"
+    (bk_dir / "Acoustic").mkdir(parents=True)
+    (bk_dir / "Acoustic" / "Acoustic 1 BK.wav").touch()
+    track_index = BackingTrackIndex(bk_dir, NamingScheme.DEFAULT, FileFormat.WAV)
+    track_index.scan()
+    return track_index
+
+
+def test_watches_existing_folders(index: BackingTrackIndex) -> None:
+    watcher = TrackIndexWatcher(index)
+    assert watcher.watched_paths() == [
+        index.backing_tracks_dir,
+        index.backing_tracks_dir / "Acoustic",
+    ]
+
+
+def test_new_track_is_indexed(qtbot: QtBot, index: BackingTrackIndex) -> None:
+    watcher = TrackIndexWatcher(index, 10)
+    track = index.backing_tracks_dir / "Acoustic" / "Acoustic 2 BK.wav"
+
+    with qtbot.waitSignal(watcher.changed):
+        track.touch()
+
+    assert index.get(2) == track
+    assert get_index_cache_path().is_file()
+    watcher.wait()
+
+
+def test_deleted_track_is_removed(qtbot: QtBot, index: BackingTrackIndex) -> None:
+    watcher = TrackIndexWatcher(index, 10)
+
+    with qtbot.waitSignal(watcher.changed):
+        (index.backing_tracks_dir / "Acoustic" / "Acoustic 1 BK.wav").unlink()
+
+    assert index.get(1) is None
+    watcher.wait()
+
+
+def test_new_chapter_is_watched(qtbot: QtBot, index: BackingTrackIndex) -> None:
+    watcher = TrackIndexWatcher(index, 10)
+    chapter = index.backing_tracks_dir / "Funk"
+
+    with qtbot.waitSignal(watcher.changed):
+        chapter.mkdir()
+    assert chapter in watcher.watched_paths()
+
+    with qtbot.waitSignal(watcher.changed):
+        (chapter / "Funk 31 BK.wav").touch()
+    assert index.get(31) == chapter / "Funk 31 BK.wav"
+    watcher.wait()
+
+
+def test_changes_only_rescan_affected_chapter(
+    index: BackingTrackIndex,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    watcher = TrackIndexWatcher(index)
+    scanned = []
+    monkeypatch.setattr(index, "scan_chapter", scanned.append)
+
+    chapter = str(index.backing_tracks_dir / "Acoustic")
+    watcher._on_directory_changed(chapter)
+    watcher._on_directory_changed(chapter)
+    watcher._on_directory_changed(str(index.backing_tracks_dir.parent))
+    watcher.apply_changes()
+    watcher.wait()
+
+    assert scanned == [index.chapters.find(1)]
+
+
+def test_changes_are_scanned_off_the_gui_thread(
+    qtbot: QtBot,
+    index: BackingTrackIndex,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    watcher = TrackIndexWatcher(index)
+    threads = []
+    monkeypatch.setattr(
+        index, "scan_chapter", lambda _: threads.append(threading.get_ident())
+    )
+
+    with qtbot.waitSignal(watcher.changed):
+        watcher._on_directory_changed(str(index.backing_tracks_dir / "Acoustic"))
+        watcher.apply_changes()
+
+    watcher.wait()
+    assert threads
+    assert threading.get_ident() not in threads
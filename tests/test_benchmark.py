@@ -0,0 +1,44 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from rhythm_trainer import benchmark
+from rhythm_trainer.config import Config
+from rhythm_trainer.strategies import STRATEGIES, Feedback
+
+
+def test_synthetic_feedback_rate() -> None:
+    stream = benchmark.synthetic_feedback(random.Random(0), 0.25)
+    feedback = [next(stream) for _ in range(4000)]
+    assert 800 < feedback.count(Feedback.BAD) < 1200
+
+
+def test_run_benchmark() -> None:
+    result = benchmark.run_benchmark(
+        "weighted",
+        90,
+        Config(csv_path=Path()),
+        steps=50,
+    )
+    assert result.strategy == "weighted"
+    assert result.catalog_size == 90
+    assert result.draws_per_second > 0
+    assert 0 < result.update_p50_us <= result.update_p95_us <= result.update_p99_us
+    assert result.peak_memory_mb > 0
+
+
+def test_main_prints_json_lines(capsys: pytest.CaptureFixture[str]) -> None:
+    args = ["--strategy", "weighted", "--size", "90", "--size", "200", "--json"]
+    benchmark.main([*args, "--steps", "10"])
+    lines = capsys.readouterr().out.splitlines()
+    results = [json.loads(line) for line in lines]
+    assert [r["catalog_size"] for r in results] == [90, 200]
+
+
+def test_main_prints_table(capsys: pytest.CaptureFixture[str]) -> None:
+    benchmark.main(["--size", "90", "--steps", "10", "--sampler-engine", "alias"])
+    header, *rows = capsys.readouterr().out.splitlines()
+    assert "draws/s" in header
+    assert [row.split()[0] for row in rows] == sorted(STRATEGIES)
@@ -0,0 +1,88 @@
+import pytest
+
+from rhythm_trainer.chapters import Chapter, ChapterMap, default_chapter_map
+
+
+def test_default_chapter_map() -> None:
+    chapters = default_chapter_map()
+    assert len(chapters) == 9
+    assert chapters.find(1) == Chapter("Acoustic", 1, 10)
+    assert chapters.find(82) == Chapter("Soul", 81, 90, "Soul")
+    assert chapters.find(91) is None
+    assert chapters.find(0) is None
+    assert chapters.last_exercise == 90
+
+
+def test_equal_chapter_maps_hash_equal() -> None:
+    chapters = ChapterMap([Chapter("Jazz", 11, 20), Chapter("Funk", 1, 10)])
+    same = ChapterMap([Chapter("Funk", 1, 10), Chapter("Jazz", 11, 20)])
+
+    assert chapters == same
+    assert hash(chapters) == hash(same)
+    assert {chapters, same, default_chapter_map()} == {same, default_chapter_map()}
+
+
+def test_last_exercise() -> None:
+    chapters = ChapterMap([Chapter("Funk", 121, 150), Chapter("Jazz", 1, 20)])
+    assert chapters.last_exercise == 150
+    assert ChapterMap([]).last_exercise == 0
+
+
+def test_chapter_folder_defaults_to_name() -> None:
+    assert Chapter("Funk", 1, 10).folder == "Funk"
+    assert Chapter("Funk", 1, 10, "03 Funk").folder == "03 Funk"
+
+
+def test_find_with_gaps_and_unsorted_chapters() -> None:
+    chapters = ChapterMap(
+        [Chapter("B", 20, 29), Chapter("A", 1, 5), Chapter("C", 100, 1000)],
+    )
+    assert [chapter.name for chapter in chapters] == ["A", "B", "C"]
+    assert chapters.find(5).name == "A"  # pyright: ignore[reportOptionalMemberAccess]
+    assert chapters.find(6) is None
+    assert chapters.find(20).name == "B"  # pyright: ignore[reportOptionalMemberAccess]
+    assert chapters.find(500).name == "C"  # pyright: ignore[reportOptionalMemberAccess]
+    assert chapters.find(1001) is None
+
+
+def test_find_in_many_chapters() -> None:
+    chapters = ChapterMap(
+        Chapter(f"Chapter {i}", i * 7 + 1, i * 7 + 7) for i in range(500)
+    )
+    assert all(
+        chapters.find(exercise) == chapters.chapters[(exercise - 1) // 7]
+        for exercise in range(1, 3501)
+    )
+
+
+def test_by_folder() -> None:
+    chapters = ChapterMap([Chapter("Funk", 1, 10, "03 Funk")])
+    assert chapters.by_folder("03 Funk") == chapters.find(1)
+    assert chapters.by_folder("Funk") is None
+
+
+@pytest.mark.parametrize(
+    ("chapters", "match"),
+    [
+        ([Chapter("A", 1, 10), Chapter("B", 10, 20)], "overlapping"),
+        ([Chapter("A", 5, 4)], "Invalid exercise range"),
+        ([Chapter("A", 0, 4)], "Invalid exercise range"),
+        ([Chapter("A", 1, 9, "X"), Chapter("B", 10, 20, "X")], "same folder 'X'"),
+    ],
+)
+def test_invalid_chapter_map(chapters: list[Chapter], match: str) -> None:
+    with pytest.raises(ValueError, match=match):
+        ChapterMap(chapters)
+
+
+def test_list_round_trip() -> None:
+    chapters = default_chapter_map()
+    assert ChapterMap.from_list(chapters.to_list()) == chapters
+    assert ChapterMap.from_list(
+        [{"name": "Funk", "first_exercise": 1, "last_exercise": 10}],
+    ) == ChapterMap([Chapter("Funk", 1, 10)])
+
+
+def test_from_list_rejects_missing_fields() -> None:
+    with pytest.raises(ValueError, match="Invalid chapter"):
+        ChapterMap.from_list([{"name": "Funk", "first_exercise": 1}])
@@ -3,10 +3,13 @@ from pathlib import Path
 import pytest
 
 from rhythm_trainer import dirs
+from rhythm_trainer.chapters import Chapter, ChapterMap, default_chapter_map
 from rhythm_trainer.config import (
+    AudioOutput,
     Config,
     FileFormat,
     NamingScheme,
+    SamplerEngine,
     get_config_path,
     parse_config,
     save_config,
@@ -23,6 +26,20 @@ def test_config_to_dict_with_backing_tracks(tmp_path: Path) -> None:
     assert config_dict["backing_tracks_dir"] == str(tmp_path / "bk")
     assert config_dict["naming_scheme"] == "default"
     assert config_dict["file_format"] == "wav"
+    assert config_dict["recent_window"] == 10
+    assert config_dict["plan_size"] == 0
+    assert config_dict["sampler_engine"] == "fenwick"
+    assert config_dict["strategy"] == "weighted"
+    assert config_dict["seed"] is None
+    assert config_dict["decay_half_life_days"] == 0
+    assert config_dict["audio_output"] == "qt"
+    assert config_dict["prefetch_cache_mb"] == 256
+    assert config_dict["chapters"][0] == {
+        "name": "Acoustic",
+        "first_exercise": 1,
+        "last_exercise": 10,
+        "folder": "Acoustic",
+    }
 
 
 def test_config_to_dict_without_backing_tracks() -> None:
@@ -81,6 +98,14 @@ def test_parse_config_reads_existing(
         backing_tracks_dir=bk_dir,
         naming_scheme=NamingScheme.DEFAULT,
         file_format=FileFormat.MP3,
+        recent_window=4,
+        plan_size=20,
+        sampler_engine=SamplerEngine.ALIAS,
+        seed=1234,
+        decay_half_life_days=14.5,
+        chapters=ChapterMap([Chapter("Grooves", 1, 200, "01 Grooves")]),
+        audio_output=AudioOutput.NULL,
+        prefetch_cache_mb=64,
     )
     save_config(sample_config, config_filename)
 
@@ -90,6 +115,23 @@ def test_parse_config_reads_existing(
     assert config.backing_tracks_dir == bk_dir
     assert config.naming_scheme == NamingScheme.DEFAULT
     assert config.file_format == FileFormat.MP3
+    assert config.recent_window == 4
+    assert config.plan_size == 20
+    assert config.sampler_engine == SamplerEngine.ALIAS
+    assert config.seed == 1234
+    assert config.decay_half_life_days == 14.5
+    assert config.chapters == ChapterMap([Chapter("Grooves", 1, 200, "01 Grooves")])
+    assert config.audio_output == AudioOutput.NULL
+    assert config.prefetch_cache_mb == 64
+
+
+def test_parse_config_defaults_chapters() -> None:
+    config_filename = "test_config.yaml"
+    get_config_path(config_filename).write_text(
+        "csv_path: foo.csv\nbacking_tracks_dir: null\nchapters: null\n"
+    )
+
+    assert parse_config(config_filename).chapters == default_chapter_map()
 
 
 def test_parse_config_invalid_backing_tracks_dir(
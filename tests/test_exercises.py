@@ -1,13 +1,33 @@
 import csv
+import random
+from collections import Counter
+from itertools import pairwise
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from rhythm_trainer.exercises import (
+    MAX_DECAY_REJECTIONS,
+    SECONDS_PER_DAY,
+    FeedbackEvent,
+    RecentWindow,
+    WeightDecay,
+    append_feedback,
+    apply_delta,
+    compact_journal,
     get_exercises_and_weights,
+    get_folding_paths,
+    get_journal_path,
+    get_last_touched,
+    iter_exercises_and_weights,
     pick_random_exercise,
+    plan_session,
+    read_journal,
+    sample_distinct_exercises,
     save_exercises_and_weights,
 )
+from rhythm_trainer.sampler import WeightedSampler
 
 
 def test_get_exercises_and_weights_from_csv(tmp_path: Path) -> None:
@@ -59,12 +79,12 @@ def test_save_exercises_and_weights_to_existing_csv(tmp_path: Path) -> None:
     with csv_path.open("r") as file:
         reader = csv.reader(file)
         header = next(reader)
-        assert header == ["Exercise", "Weight"]
+        assert header == ["Exercise", "Weight", "Touched"]
         for i, row in enumerate(reader):
             if i < len(exercises):
-                assert row == [str(exercises[i]), str(weights[i])]
+                assert row == [str(exercises[i]), str(weights[i]), ""]
             else:
-                assert row == [str(i + 1), "0"]
+                assert row == [str(i + 1), "0", ""]
 
 
 def test_save_exercises_and_weights_to_new_csv(tmp_path: Path) -> None:
@@ -80,49 +100,441 @@ def test_save_exercises_and_weights_to_new_csv(tmp_path: Path) -> None:
     with csv_path.open("r") as file:
         reader = csv.reader(file)
         header = next(reader)
-        assert header == ["Exercise", "Weight"]
+        assert header == ["Exercise", "Weight", "Touched"]
         for i, row in enumerate(reader):
             if i < len(exercises):
-                assert row == [str(exercises[i]), str(weights[i])]
+                assert row == [str(exercises[i]), str(weights[i]), ""]
             else:
-                assert row == [str(i + 1), "0"]
+                assert row == [str(i + 1), "0", ""]
+
+
+def test_save_exercises_and_weights_folds_journal(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2, 3], [2, 2, 2], 3)
+    append_feedback(csv_path, [FeedbackEvent(1, 1), FeedbackEvent(3, -1)])
+
+    save_exercises_and_weights(csv_path, [2], [5], 3)
+
+    assert not get_journal_path(csv_path).exists()
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [3, 5, 1])
+
+
+def test_append_feedback_writes_journal_only(tmp_path: Path) -> None:
+    csv_path = tmp_path / "data" / "exercises.csv"
+    append_feedback(csv_path, [FeedbackEvent(2, 1, 100.0), FeedbackEvent(3, -1, 101.5)])
+
+    assert not csv_path.exists()
+    assert list(read_journal(csv_path)) == [
+        FeedbackEvent(2, 1, 100.0),
+        FeedbackEvent(3, -1, 101.5),
+    ]
+
+
+def test_get_exercises_and_weights_replays_journal(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2, 3, 4], [1, 3, 1, 1], 4)
+    append_feedback(
+        csv_path,
+        [FeedbackEvent(2, 1), FeedbackEvent(2, 1), FeedbackEvent(3, -1)],
+    )
+    append_feedback(csv_path, [FeedbackEvent(4, 1)])
+
+    exercises, weights = get_exercises_and_weights(csv_path, 2, 4)
+
+    assert exercises == [2, 3, 4]
+    assert weights == [5, 1, 2]
+
+
+def test_get_exercises_and_weights_replays_journal_without_csv(
+    tmp_path: Path,
+) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    append_feedback(csv_path, [FeedbackEvent(1, 1), FeedbackEvent(3, 1)])
+
+    exercises, weights = get_exercises_and_weights(csv_path, 2, 4)
+
+    assert exercises == [1, 2, 3, 4]
+    assert weights == [0, 1, 2, 1]  # Exercise 1 is out of range
+
+
+def test_read_journal_skips_malformed_lines(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    get_journal_path(csv_path).write_text("1.0,2,1\n2.0,3\n3.0,4,-1\n")
+
+    assert [event.exercise for event in read_journal(csv_path)] == [2, 4]
+
+
+def test_compact_journal(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [1, 4], 5)
+    append_feedback(
+        csv_path, [FeedbackEvent(2, -1, 100.0), FeedbackEvent(5, 1, 200.5)], 5
+    )
+
+    compact_journal(csv_path, 5)
+
+    assert not get_journal_path(csv_path).exists()
+    with csv_path.open("r") as file:
+        rows = list(csv.reader(file))
+    assert rows == [
+        ["Exercise", "Weight", "Touched"],
+        ["1", "1", ""],
+        ["2", "3", "100.0"],
+        ["3", "0", ""],
+        ["4", "0", ""],
+        ["5", "2", "200.5"],
+    ]
+
+
+def interrupt_compaction(
+    monkeypatch: pytest.MonkeyPatch,
+    method: str,
+    suffix: str,
+) -> None:
+    """Make the given Path method fail on the files with the given suffix, once."""
+    original = getattr(Path, method)
+
+    def interrupted(path: Path, *args: object, **kwargs: object) -> object:
+        if path.name.endswith(suffix):
+            monkeypatch.undo()
+            error_message = "Interrupted"
+            raise OSError(error_message)
+        return original(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, method, interrupted)
+
+
+def test_compact_journal_interrupted_before_replacing_csv(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [1, 4], 3)
+    append_feedback(csv_path, [FeedbackEvent(2, 1, 100.0)], 3)
+    interrupt_compaction(monkeypatch, "replace", ".tmp")
+
+    with pytest.raises(OSError, match="Interrupted"):
+        compact_journal(csv_path, 3)
+
+    assert not get_journal_path(csv_path).exists()
+    assert len(get_folding_paths(csv_path)) == 1
+    append_feedback(csv_path, [FeedbackEvent(2, 1, 200.0)], 3)
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [1, 6, 1])
+
+    compact_journal(csv_path, 3)
+
+    assert list(tmp_path.glob("exercises.*")) == [csv_path]
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [1, 6, 1])
+    assert get_last_touched(csv_path, 1, 3) == {2: 200.0}
+
+
+def test_compact_journal_interrupted_after_replacing_csv(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [1, 4], 3)
+    append_feedback(csv_path, [FeedbackEvent(2, 1, 100.0)], 3)
+    interrupt_compaction(monkeypatch, "unlink", ".folding")
+
+    with pytest.raises(OSError, match="Interrupted"):
+        compact_journal(csv_path, 3)
+
+    # The journal set aside is already folded, so it is not replayed again
+    assert get_folding_paths(csv_path) == []
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [1, 5, 1])
+
+    save_exercises_and_weights(csv_path, [], [], 3)
+    assert list(tmp_path.glob("exercises.*")) == [csv_path]
+
+
+def test_compact_journal_past_total_exercises(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [1, 4], 2)
+    append_feedback(csv_path, [FeedbackEvent(5, 1, 200.5)], 2)
+
+    compact_journal(csv_path, 2)
+
+    # The rows stay dense, so that the exercises are found by their row number
+    assert get_exercises_and_weights(csv_path, 4, 5) == ([4, 5], [1, 2])
+
+
+def test_get_last_touched(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [1, 4], 5)
+    append_feedback(csv_path, [FeedbackEvent(2, -1, 100.0)], 5)
+    compact_journal(csv_path, 5)
+    append_feedback(csv_path, [FeedbackEvent(4, 1, 300.0), FeedbackEvent(5, 1, 400.0)])
+
+    assert get_last_touched(csv_path, 1, 4) == {2: 100.0, 4: 300.0}
+
+
+def test_get_last_touched_from_two_column_csv(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    csv_path.write_text("Exercise,Weight\n1,3\n2,1\n")
+    assert get_last_touched(csv_path, 1, 2) == {}
+
+    save_exercises_and_weights(csv_path, [2], [2], 2)
+    assert get_exercises_and_weights(csv_path, 1, 2) == ([1, 2], [3, 2])
+
+
+def test_weight_decay() -> None:
+    decay = WeightDecay(half_life_days=2)
+    assert decay.value(9, 0) == 9
+    assert decay.value(9, 2 * SECONDS_PER_DAY) == pytest.approx(5)
+    assert decay.value(9, 4 * SECONDS_PER_DAY) == pytest.approx(3)
+    assert decay.value(1, 4 * SECONDS_PER_DAY) == 1
+    assert decay.value(0, 4 * SECONDS_PER_DAY) == 1
+
+
+def test_compact_journal_without_journal(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    compact_journal(csv_path)
+    assert not csv_path.exists()
+
+
+def test_append_feedback_compacts_large_journal(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("rhythm_trainer.exercises.JOURNAL_COMPACTION_SIZE", 64)
+    csv_path = tmp_path / "exercises.csv"
+    append_feedback(csv_path, [FeedbackEvent(1, 1)], 3)
+    assert get_journal_path(csv_path).exists()
+
+    append_feedback(csv_path, [FeedbackEvent(1, 1)] * 3, 3)
+
+    assert not get_journal_path(csv_path).exists()
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [5, 1, 1])
+
+
+@pytest.mark.parametrize(
+    ("weight", "delta", "expected"),
+    [(0, 1, 2), (1, 1, 2), (3, -1, 2), (1, -1, 1), (0, 0, 1)],
+)
+def test_apply_delta(weight: int, delta: int, expected: int) -> None:
+    assert apply_delta(weight, delta) == expected
 
 
 @pytest.mark.parametrize("expected", [1, 2, 3, 4, 5, 6, 7])
-def test_pick_random_exercise_no_buffer(
+def test_pick_random_exercise_no_recent_window(
     monkeypatch: pytest.MonkeyPatch,
     expected: int,
 ) -> None:
-    monkeypatch.setattr("random.choices", lambda _, weights=None, k=1: [expected])
+    sampler = WeightedSampler(range(1, 11), range(1, 11))
+    monkeypatch.setattr(sampler, "draw", lambda: expected)
 
-    exercise = pick_random_exercise(
-        exercises=list(range(1, 11)),
-        weights=list(range(1, 11)),
-    )
+    exercise = pick_random_exercise(sampler)
 
     assert exercise == expected
 
 
-def test_pick_random_exercise_buffer_full(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr("random.choices", lambda _, weights=None, k=1: [1])
+def test_pick_random_exercise_excludes_recent_window() -> None:
+    sampler = WeightedSampler(range(1, 11), [1] * 10)
+    recent = RecentWindow(9)
+    for exercise in range(1, 10):
+        recent.push(exercise)
+
+    assert pick_random_exercise(sampler, recent) == 10
+    assert 10 in recent
+    assert 1 not in recent
+    # Exercise 1 was evicted by the previous pick and is now the only one available
+    assert pick_random_exercise(sampler, recent) == 1
+    assert sampler.total == 10  # Masks are released after each draw
+
+
+def test_pick_random_exercise_never_repeats_within_window() -> None:
+    sampler = WeightedSampler(range(1, 21), [50, *[1] * 19])
+    recent = RecentWindow(5)
+    picks = [pick_random_exercise(sampler, recent) for _ in range(200)]
+
+    for i in range(len(picks)):
+        assert picks[i] not in picks[max(0, i - 5) : i]
+
+
+def test_pick_random_exercise_window_covers_all_weights() -> None:
+    sampler = WeightedSampler([1, 2, 3], [1, 1, 0])
+    recent = RecentWindow(10)
+    recent.push(2)
+    recent.push(1)
+
+    # Both exercises with a non-zero weight are recent: the oldest one is released
+    assert pick_random_exercise(sampler, recent) == 2
+    assert list(recent) == [1, 2]
+
+
+def test_pick_random_exercise_redraws_rejected_exercises() -> None:
+    sampler = WeightedSampler([1, 2, 3], [1, 1, 1])
+    recent = RecentWindow(1)
+    proposals: list[int] = []
+
+    def accept(exercise: int) -> bool:
+        proposals.append(exercise)
+        return exercise == 3
+
+    assert pick_random_exercise(sampler, recent, accept) == 3
+    assert proposals[-1] == 3
+    assert list(recent) == [3]
+
+
+def test_pick_random_exercise_gives_up_rejecting() -> None:
+    sampler = WeightedSampler([1, 2], [1, 1])
+    calls = Counter[str]()
+
+    def accept(_: int) -> bool:
+        calls["accept"] += 1
+        return False
+
+    assert pick_random_exercise(sampler, None, accept) in {1, 2}
+    assert calls["accept"] == MAX_DECAY_REJECTIONS
+
+
+def test_pick_random_exercise_ignores_unknown_recent_exercises() -> None:
+    sampler = WeightedSampler([1, 2], [1, 1])
+    recent = RecentWindow(3)
+    for exercise in (99, 1, 2):
+        recent.push(exercise)
+
+    assert pick_random_exercise(sampler, recent) == 1
+
+
+def test_recent_window_evicts_oldest() -> None:
+    recent = RecentWindow(3)
+    for exercise in (1, 2, 3, 4):
+        recent.push(exercise)
+
+    assert list(recent) == [2, 3, 4]
+    assert 1 not in recent
+    assert 4 in recent
+    assert len(recent) == 3
+
+
+def test_recent_window_push_existing_moves_to_newest() -> None:
+    recent = RecentWindow(3)
+    for exercise in (1, 2, 3, 1):
+        recent.push(exercise)
 
-    buffer = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-    exercise = pick_random_exercise(
-        exercises=list(range(1, 11)),
-        weights=list(range(1, 11)),
-        buffer=buffer,
+    assert list(recent) == [2, 3, 1]
+    assert recent.pop_oldest() == 2
+    assert 2 not in recent
+
+
+def test_recent_window_size_zero() -> None:
+    recent = RecentWindow(0)
+    recent.push(1)
+    assert len(recent) == 0
+
+
+def test_recent_window_negative_size() -> None:
+    with pytest.raises(ValueError, match="non-negative"):
+        RecentWindow(-1)
+
+
+def test_plan_session_length_and_window() -> None:
+    rng = np.random.default_rng(0)
+    plan = plan_session(range(1, 31), [1] * 30, 100, 5, rng)
+    assert len(plan) == 100
+    assert set(plan) <= set(range(1, 31))
+    for i in range(len(plan)):
+        assert plan[i] not in plan[max(i - 5, 0) : i]
+
+
+def test_plan_session_skips_zero_weights() -> None:
+    rng = np.random.default_rng(1)
+    plan = plan_session([1, 2, 3, 4], [0, 2, 0, 3], 20, 0, rng)
+    assert set(plan) == {2, 4}
+
+
+def test_plan_session_follows_weights() -> None:
+    rng = np.random.default_rng(2)
+    counts = Counter(plan_session([1, 2, 3], [1, 1, 8], 5000, 0, rng))
+    assert counts[3] > 3 * (counts[1] + counts[2])
+
+
+def test_plan_session_window_covers_all_weights() -> None:
+    rng = np.random.default_rng(3)
+    plan = plan_session([1, 2, 3], [1, 1, 0], 6, 10, rng)
+    assert len(plan) == 6
+    assert all(a != b for a, b in pairwise(plan))
+
+
+def test_plan_session_updates_existing_window() -> None:
+    recent = RecentWindow(2)
+    recent.push(1)
+    recent.push(2)
+    plan = plan_session([1, 2, 3], [1, 1, 1], 1, recent, np.random.default_rng(4))
+    assert plan == [3]
+    assert list(recent) == [2, 3]
+
+
+def test_plan_session_accepts_arrays() -> None:
+    plan = plan_session(
+        np.arange(1, 11),
+        np.ones(10, dtype=np.int64),
+        5,
+        3,
+        np.random.default_rng(5),
+    )
+    assert len(plan) == 5
+    assert all(isinstance(exercise, int) for exercise in plan)
+
+
+def test_plan_session_all_zero() -> None:
+    with pytest.raises(ValueError, match="all weights are zero"):
+        plan_session([1, 2], [0, 0], 3)
+
+
+def test_plan_session_mismatched_lengths() -> None:
+    with pytest.raises(ValueError, match="exercises but"):
+        plan_session([1, 2], [1], 3)
+
+
+def test_plan_session_empty() -> None:
+    assert plan_session([1, 2], [0, 0], 0) == []
+
+
+def test_iter_exercises_and_weights_matches_lists(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, list(range(1, 11)), list(range(1, 11)), 10)
+    append_feedback(csv_path, [FeedbackEvent(4, 1), FeedbackEvent(9, -1)], 10)
+
+    exercises, weights = get_exercises_and_weights(csv_path, 3, 9)
+    assert list(iter_exercises_and_weights(csv_path, 3, 9)) == list(
+        zip(exercises, weights, strict=True),
     )
 
-    assert exercise == 1
 
+def test_iter_exercises_and_weights_without_csv(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    append_feedback(csv_path, [FeedbackEvent(2, 2)], 5)
+    assert list(iter_exercises_and_weights(csv_path, 2, 4)) == [(2, 3), (3, 1), (4, 1)]
+
+
+def test_sample_distinct_exercises_are_distinct() -> None:
+    rng = random.Random(0)
+    items = [(exercise, exercise % 4) for exercise in range(1, 41)]
+    sample = sample_distinct_exercises(items, 15, rng)
+    assert len(sample) == len(set(sample)) == 15
+    assert all(exercise % 4 != 0 for exercise in sample)
+
+
+def test_sample_distinct_exercises_fewer_positive_than_k() -> None:
+    sample = sample_distinct_exercises([(1, 1), (2, 0), (3, 5)], 3)
+    assert sorted(sample) == [1, 3]
+
+
+def test_sample_distinct_exercises_follows_weights() -> None:
+    rng = random.Random(1)
+    items = [(1, 1), (2, 1), (3, 1), (4, 20)]
+    firsts = Counter(sample_distinct_exercises(items, 2, rng)[0] for _ in range(2000))
+    assert firsts[4] > 1500
+
+
+def test_sample_distinct_exercises_single_pass() -> None:
+    items = iter([(1, 1), (2, 2), (3, 3)])
+    assert len(sample_distinct_exercises(items, 2)) == 2
+    assert next(items, None) is None
 
-def test_pick_random_exercise_max_attempts(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr("random.choices", lambda _, weights=None, k=1: [1])
 
-    buffer = [1, 2, 3]
-    with pytest.raises(RuntimeError, match="Failed to select a unique"):
-        pick_random_exercise(
-            exercises=list(range(1, 11)),
-            weights=list(range(1, 11)),
-            buffer=buffer,
-        )
+def test_sample_distinct_exercises_zero_k() -> None:
+    assert sample_distinct_exercises([(1, 1)], 0) == []
@@ -1,14 +1,24 @@
+import gettext
 import locale
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from typing import Any
 
 import pytest
 from pytestqt.qtbot import QtBot
 
+from rhythm_trainer import i18n
 from rhythm_trainer.gui.main_window import MainWindow
 
 type AppFactory = Callable[[str | None], MainWindow]
 
 
+@pytest.fixture(autouse=True)
+def reset_language() -> Iterator[None]:
+    i18n.set_language(None)
+    yield
+    i18n.set_language(None)
+
+
 @pytest.fixture
 def app_factory(
     qtbot: QtBot,
@@ -131,3 +141,77 @@ def test_manual_tab(
 ) -> None:
     app = app_factory(lang)
     assert app.tabs.tabText(1) == expected
+
+
+@pytest.mark.parametrize(
+    ("lang", "expected"),
+    [
+        ("en_US", "Session"),
+        ("it_IT", "Sessione"),
+        ("fr_FR", "Session"),
+        (None, "Session"),
+    ],
+)
+def test_session_tab(
+    app_factory: AppFactory,
+    lang: str | None,
+    expected: str,
+) -> None:
+    app = app_factory(lang)
+    assert app.tabs.tabText(2) == expected
+
+
+def test_catalog_is_loaded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    i18n.clear_cache()
+    calls = []
+    translation = gettext.translation
+
+    def counting_translation(
+        *args: Any,
+        **kwargs: Any,
+    ) -> gettext.NullTranslations:
+        calls.append(kwargs["languages"])
+        return translation(*args, **kwargs)
+
+    monkeypatch.setattr("gettext.translation", counting_translation)
+
+    i18n.set_language("it_IT")
+    for _ in range(3):
+        assert i18n._("Good") == "Bene"
+        assert i18n._("Bad") == "Male"
+
+    assert calls == [["it_IT"]]
+
+
+def test_set_language_overrides_locale() -> None:
+    i18n.set_language("it_IT")
+    assert i18n.get_language() == "it_IT"
+    assert i18n._("Good") == "Bene"
+
+    i18n.set_language("en_US")
+    assert i18n._("Good") == "Good"
+
+    i18n.set_language(None)
+    assert i18n.get_language() == "en_US"
+
+
+def test_language_defaults_when_locale_unset(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("locale.getlocale", lambda: (None, None))
+    assert i18n.get_language() == i18n.DEFAULT_LANGUAGE
+
+
+def test_locale_is_read_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def getlocale() -> tuple[str, str]:
+        calls.append(True)
+        return ("it_IT", "UTF-8")
+
+    monkeypatch.setattr("locale.getlocale", getlocale)
+    for _ in range(3):
+        assert i18n._("Good") == "Bene"
+    assert len(calls) == 1
+
+    i18n.set_language(None)
+    assert i18n.get_language() == "it_IT"
+    assert len(calls) == 2
@@ -1,40 +1,160 @@
 import logging
+from logging.handlers import QueueHandler
 from pathlib import Path
 
+import pytest
+
 from rhythm_trainer import dirs
-from rhythm_trainer.logger import get_logger
+from rhythm_trainer.logger import (
+    DEFAULT_LEVEL,
+    LogMessage,
+    StructuredLogger,
+    configure_logging,
+    get_logger,
+    shutdown_logging,
+)
 
 
 def test_get_logger_returns_logger() -> None:
-    logger = get_logger("test_logger")
-    assert isinstance(logger, logging.Logger)
+    logger = get_logger("rhythm_trainer.test_logger")
+    assert isinstance(logger, StructuredLogger)
+    assert isinstance(logger.logger, logging.Logger)
+
 
+def test_logger_has_a_single_queue_handler() -> None:
+    logger = get_logger("rhythm_trainer.test_logger_handlers").logger
+    get_logger("rhythm_trainer.test_logger_handlers")
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], QueueHandler)
 
-def test_logger_has_console_and_file_handlers() -> None:
-    logger = get_logger("test_logger_handlers")
-    handler_types = {type(h) for h in logger.handlers}
+
+def test_listener_has_console_and_file_handlers() -> None:
+    listener = configure_logging()
+    handler_types = {type(h) for h in listener.handlers}
     assert logging.StreamHandler in handler_types
     assert logging.FileHandler in handler_types
 
 
+def test_configure_logging_twice_is_a_no_op() -> None:
+    assert configure_logging() is configure_logging()
+
+
 def test_logger_creates_log_file_and_writes() -> None:
-    logger = get_logger("test_logger_file")
+    logger = get_logger("rhythm_trainer.test_logger_file")
     log_file = Path(dirs.user_log_dir) / "rhythm_trainer.log"
     logger.info("Hello log!")
-    logger.handlers[1].flush()  # Ensure file handler flushes
+    shutdown_logging()  # Ensure the queued records are written
     assert log_file.exists()
     content = log_file.read_text()
     assert "Hello log!" in content
-    assert "test_logger_file" in content
+    assert "rhythm_trainer.test_logger_file" in content
 
 
 def test_logger_format_in_file() -> None:
-    logger = get_logger("test_logger_format")
+    logger = get_logger("rhythm_trainer.test_logger_format")
     log_file = Path(dirs.user_log_dir) / "rhythm_trainer.log"
     logger.error("Format test")
-    logger.handlers[1].flush()
+    shutdown_logging()
     content = log_file.read_text()
     # Check for timestamp, logger name, level, and message
-    assert "test_logger_format" in content
+    assert "rhythm_trainer.test_logger_format" in content
     assert "ERROR" in content
     assert "Format test" in content
+
+
+def test_logging_restarts_after_shutdown() -> None:
+    listener = configure_logging()
+    shutdown_logging()
+    shutdown_logging()
+
+    get_logger("rhythm_trainer.test_logger_restart").info("Restarted")
+    assert configure_logging() is not listener
+    shutdown_logging()
+
+    log_file = Path(dirs.user_log_dir) / "rhythm_trainer.log"
+    assert "Restarted" in log_file.read_text()
+
+
+class _Field:
+    def __init__(self) -> None:
+        self.formatted = 0
+
+    def __format__(self, format_spec: str) -> str:
+        self.formatted += 1
+        return "field"
+
+
+def test_structured_message_fields(caplog: pytest.LogCaptureFixture) -> None:
+    logger = get_logger("rhythm_trainer.test_logger_fields")
+    with caplog.at_level(logging.INFO, logger="rhythm_trainer.test_logger_fields"):
+        logger.info("Exercise {exercise} has weight {weight}", exercise=3, weight=2)
+
+    (record,) = caplog.records
+    assert isinstance(record.msg, LogMessage)
+    assert record.getMessage() == "Exercise 3 has weight 2"
+    assert record.fields == {"exercise": 3, "weight": 2}
+
+
+def test_message_without_fields_is_not_formatted(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    logger = get_logger("rhythm_trainer.test_logger_braces")
+    with caplog.at_level(logging.INFO, logger="rhythm_trainer.test_logger_braces"):
+        logger.info("Literal {braces}")
+
+    assert caplog.records[0].getMessage() == "Literal {braces}"
+
+
+def test_disabled_level_does_not_format() -> None:
+    logger = get_logger("rhythm_trainer.test_logger_disabled")
+    logger.logger.setLevel(logging.INFO)
+    field = _Field()
+
+    logger.debug("Value {value}", value=field)
+
+    assert not logger.isEnabledFor(logging.DEBUG)
+    assert field.formatted == 0
+
+
+def test_queue_formats_the_message_when_logged() -> None:
+    logger = get_logger("rhythm_trainer.test_logger_queued")
+    fields = {"value": [1]}
+    (queue_handler,) = logger.logger.handlers
+    record = logging.LogRecord(
+        "rhythm_trainer.test_logger_queued",
+        logging.DEBUG,
+        __file__,
+        0,
+        LogMessage("Value {value}", fields),
+        None,
+        None,
+    )
+    prepared = queue_handler.prepare(record)
+    fields["value"].append(2)
+
+    assert prepared.msg == "Value [1]"
+    assert prepared.args is None
+    assert isinstance(record.msg, LogMessage)
+
+
+def test_get_logger_keeps_the_configured_level() -> None:
+    logger = get_logger("rhythm_trainer.test_logger_level")
+    logger.logger.setLevel(logging.WARNING)
+
+    assert get_logger("rhythm_trainer.test_logger_level").logger.level == (
+        logging.WARNING
+    )
+    assert get_logger("rhythm_trainer.test_logger_inherited").logger.level == (
+        logging.NOTSET
+    )
+    assert get_logger("rhythm_trainer.test_logger_inherited").isEnabledFor(
+        DEFAULT_LEVEL
+    )
+
+
+def test_log_records_point_to_the_caller(caplog: pytest.LogCaptureFixture) -> None:
+    logger = get_logger("rhythm_trainer.test_logger_caller")
+    with caplog.at_level(logging.INFO, logger="rhythm_trainer.test_logger_caller"):
+        logger.info("Caller {name}", name="test")
+
+    assert caplog.records[0].funcName == "test_log_records_point_to_the_caller"
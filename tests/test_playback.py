@@ -0,0 +1,203 @@
+import io
+import wave
+from pathlib import Path
+
+import pytest
+
+from rhythm_trainer.playback import (
+    Audio,
+    FileSink,
+    NullSink,
+    Player,
+    decode_wave,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_wave(
+    frames: bytes,
+    sample_rate: int = 8000,
+    channels: int = 1,
+    sample_width: int = 2,
+) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def track(tmp_path: Path) -> Path:
+    path = tmp_path / "Funk 31 BK.wav"
+    path.write_bytes(make_wave(bytes(range(256)) * 125, channels=2))  # 1 second
+    return path
+
+
+def test_decode_wave() -> None:
+    frames = bytes(range(12))
+
+    audio = decode_wave(make_wave(frames, 44100, 2, 2))
+
+    assert audio == Audio(frames, 44100, 2, 2)
+    assert audio.frame_size == 4
+    assert audio.frame_count == 3
+
+
+def test_decode_wave_widens_24_bit_samples() -> None:
+    audio = decode_wave(make_wave(b"\x01\x02\x03\xfd\xfe\xff", sample_width=3))
+
+    assert audio.sample_width == 4
+    assert audio.frames == b"\x00\x01\x02\x03\x00\xfd\xfe\xff"
+
+
+def test_decode_wave_invalid_data() -> None:
+    with pytest.raises(ValueError, match="Could not decode the WAV data"):
+        decode_wave(b"ID3\x04\x00 not a wave file")
+
+
+def test_audio_frame_at() -> None:
+    audio = Audio(bytes(8000), 4000, 1, 2)
+
+    assert audio.duration == 1
+    assert audio.frame_at(0.25) == 1000
+    assert audio.frame_at(-1) == 0
+    assert audio.frame_at(2) == 4000
+
+
+def test_null_sink_advances_with_the_clock() -> None:
+    clock = FakeClock()
+    sink = NullSink(clock)
+    sink.start(Audio(bytes(8000), 4000, 1, 2), 1000)
+
+    clock.now = 0.5
+    assert sink.position() == 3000
+    assert sink.is_active()
+
+    sink.stop()
+    clock.now = 0.75
+    assert sink.position() == 3000
+    assert not sink.is_active()
+
+
+def test_null_sink_stops_at_the_end() -> None:
+    clock = FakeClock()
+    sink = NullSink(clock)
+    sink.start(Audio(bytes(8000), 4000, 1, 2))
+
+    clock.now = 2
+    assert sink.position() == 4000
+    assert not sink.is_active()
+
+
+def test_file_sink_writes_from_the_start_frame(tmp_path: Path) -> None:
+    audio = Audio(bytes(range(8)), 8000, 2, 2)
+    sink = FileSink(tmp_path / "out.wav")
+
+    sink.start(audio, 1)
+
+    with wave.open(str(sink.path), "rb") as reader:
+        assert reader.getnchannels() == 2
+        assert reader.getframerate() == 8000
+        assert reader.readframes(reader.getnframes()) == bytes(range(4, 8))
+
+
+def test_player_play_stop_and_seek(track: Path) -> None:
+    clock = FakeClock()
+    player = Player(NullSink(clock))
+
+    player.play(track)
+    assert player.track == track
+    assert player.duration == 1
+    assert player.is_playing()
+
+    clock.now = 0.25
+    assert player.position == 0.25
+    player.stop()
+    assert not player.is_playing()
+
+    player.seek(0.5)
+    assert player.is_playing()
+    assert player.position == 0.5
+    clock.now = 0.5
+    assert player.position == 0.75
+
+
+def test_player_seek_is_clamped(track: Path, tmp_path: Path) -> None:
+    sink = FileSink(tmp_path / "out.wav")
+    player = Player(sink)
+    player.play(track)
+
+    player.seek(-3)
+    assert sink.position() == 0
+
+    player.seek(10)
+    assert sink.position() == 8000
+    assert not player.is_playing()
+
+
+def test_player_seek_without_track() -> None:
+    player = Player(NullSink())
+
+    player.seek(1)
+
+    assert player.position == 0
+    assert not player.is_playing()
+
+
+def test_player_uses_the_loader(track: Path) -> None:
+    loaded: list[Path] = []
+
+    def loader(path: Path) -> bytes:
+        loaded.append(path)
+        return track.read_bytes()
+
+    player = Player(NullSink(), loader=loader)
+    player.play(Path("elsewhere.wav"))
+
+    assert loaded == [Path("elsewhere.wav")]
+    assert player.duration == 1
+
+
+def test_player_measures_latency(track: Path, caplog: pytest.LogCaptureFixture) -> None:
+    times = iter([1.0, 1.2])
+    player = Player(NullSink(), latency_budget=0.1, timer=lambda: next(times))
+
+    player.play(track)
+
+    assert player.latency == pytest.approx(0.2)
+    assert "over the budget of 100 ms" in caplog.text
+
+
+def test_player_invalid_track(tmp_path: Path) -> None:
+    path = tmp_path / "Funk 31 BK.wav"
+    path.write_bytes(b"ID3\x04\x00")
+    player = Player(NullSink())
+
+    with pytest.raises(ValueError, match="Could not decode"):
+        player.play(path)
+    assert player.track is None
+
+
+def test_player_opens_compressed_tracks(track: Path, tmp_path: Path) -> None:
+    opened: list[Path] = []
+    player = Player(NullSink(), opener=opened.append)
+    player.play(track)
+    player.loader = lambda _: pytest.fail("Decoded an MP3 track")
+    mp3 = tmp_path / "Funk 31 BK.MP3"
+
+    player.play(mp3)
+
+    assert opened == [mp3]
+    assert player.track == mp3
+    assert player.duration == 0
+    assert not player.is_playing()
@@ -0,0 +1,179 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from rhythm_trainer.prefetch import TrackCache, TrackPrefetcher
+
+
+def make_track(tmp_path: Path, name: str, size: int) -> Path:
+    track = tmp_path / name
+    track.write_bytes(bytes(size))
+    return track
+
+
+def test_cache_counts_hits_and_misses(tmp_path: Path) -> None:
+    track = make_track(tmp_path, "a.wav", 10)
+    cache = TrackCache(100)
+    assert cache.hit_rate == 0
+
+    assert cache.get(track) == bytes(10)
+    assert cache.get(track) == bytes(10)
+    assert cache.get(track) == bytes(10)
+
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.hit_rate == pytest.approx(2 / 3)
+    assert cache.size == 10
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    a, b, c = (make_track(tmp_path, f"{name}.wav", 40) for name in "abc")
+    cache = TrackCache(100)
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)
+
+    cache.get(c)
+
+    assert a in cache
+    assert b not in cache
+    assert c in cache
+    assert cache.size == 80
+
+
+def test_cache_skips_tracks_larger_than_the_cache(tmp_path: Path) -> None:
+    small = make_track(tmp_path, "small.wav", 10)
+    large = make_track(tmp_path, "large.wav", 200)
+    cache = TrackCache(100)
+    cache.get(small)
+
+    assert cache.get(large) == bytes(200)
+
+    assert large not in cache
+    assert small in cache
+
+
+def test_cache_prefetch_serves_hits(tmp_path: Path) -> None:
+    track = make_track(tmp_path, "a.wav", 10)
+    cache = TrackCache(100)
+
+    cache.prefetch(track)
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    cache.get(track)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_cache_prefetch_marks_track_as_recently_used(tmp_path: Path) -> None:
+    a, b, c = (make_track(tmp_path, f"{name}.wav", 40) for name in "abc")
+    cache = TrackCache(100)
+    cache.prefetch(a)
+    cache.prefetch(b)
+
+    cache.prefetch(a)
+    cache.prefetch(c)
+
+    assert a in cache
+    assert b not in cache
+
+
+def test_cache_get_waits_for_the_track_being_prefetched(tmp_path: Path) -> None:
+    track = make_track(tmp_path, "a.wav", 10)
+    started = threading.Event()
+    release = threading.Event()
+    reads: list[Path] = []
+
+    def slow_loader(path: Path) -> bytes:
+        reads.append(path)
+        started.set()
+        release.wait()
+        return path.read_bytes()
+
+    cache = TrackCache(100, slow_loader)
+    prefetch = threading.Thread(target=cache.prefetch, args=(track,))
+    prefetch.start()
+    started.wait()
+
+    timer = threading.Timer(0.05, release.set)
+    timer.start()
+    assert cache.get(track) == bytes(10)
+    prefetch.join()
+
+    assert reads == [track]
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_cache_clear(tmp_path: Path) -> None:
+    track = make_track(tmp_path, "a.wav", 10)
+    cache = TrackCache(100)
+    cache.get(track)
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_prefetcher_loads_tracks_that_fit(tmp_path: Path) -> None:
+    a, b, c = (make_track(tmp_path, f"{name}.wav", 40) for name in "abc")
+    cache = TrackCache(100)
+    prefetcher = TrackPrefetcher(cache)
+
+    prefetcher.schedule([a, b, c])
+    prefetcher.wait()
+    prefetcher.close()
+
+    assert a in cache
+    assert b in cache
+    assert c not in cache
+
+
+def test_prefetcher_keeps_likely_tracks_over_older_ones(tmp_path: Path) -> None:
+    a, b, c = (make_track(tmp_path, f"{name}.wav", 40) for name in "abc")
+    cache = TrackCache(100)
+    cache.get(a)
+    cache.get(b)
+    prefetcher = TrackPrefetcher(cache)
+
+    prefetcher.schedule([a, c])
+    prefetcher.wait()
+    prefetcher.close()
+
+    assert a in cache
+    assert b not in cache
+    assert c in cache
+
+
+def test_prefetcher_logs_unreadable_tracks(
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    track = make_track(tmp_path, "a.wav", 10)
+    cache = TrackCache(100)
+    prefetcher = TrackPrefetcher(cache)
+
+    prefetcher.schedule([tmp_path / "missing.wav", track])
+    prefetcher.wait()
+    prefetcher.close()
+
+    assert track in cache
+    assert "Could not prefetch 'missing.wav'" in caplog.text
+
+
+def test_prefetcher_abandons_superseded_tracks(tmp_path: Path) -> None:
+    a, b = (make_track(tmp_path, f"{name}.wav", 10) for name in "ab")
+    release = threading.Event()
+
+    def slow_loader(path: Path) -> bytes:
+        release.wait()
+        return path.read_bytes()
+
+    cache = TrackCache(100, slow_loader)
+    prefetcher = TrackPrefetcher(cache)
+    prefetcher.schedule([a, b])
+    prefetcher.schedule([])
+    release.set()
+    prefetcher.wait()
+    prefetcher.close()
+
+    assert b not in cache
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from rhythm_trainer.rng import (
+    create_rng,
+    get_rng_state,
+    numpy_rng,
+    restore_rng,
+    spawn_rngs,
+)
+
+
+def test_create_rng_is_reproducible() -> None:
+    assert create_rng(3).random() == create_rng(3).random()
+    assert create_rng(3).random() != create_rng(4).random()
+
+
+def test_spawn_rngs_are_independent_and_reproducible() -> None:
+    first = [rng.random() for rng in spawn_rngs(7, 4)]
+    second = [rng.random() for rng in spawn_rngs(7, 4)]
+    assert first == second
+    assert len(set(first)) == 4
+    assert first[0] != create_rng(7).random()
+
+
+def test_numpy_rng_follows_rng_state() -> None:
+    assert numpy_rng(create_rng(1)).random() == numpy_rng(create_rng(1)).random()
+
+
+def test_restore_rng_resumes_stream() -> None:
+    rng = create_rng(5)
+    rng.random()
+    state = get_rng_state(rng, 5)
+    expected = [rng.random() for _ in range(3)]
+
+    restored = restore_rng(state, 5)
+    assert [restored.random() for _ in range(3)] == expected
+
+
+def test_restore_rng_without_seed() -> None:
+    rng = random.Random()
+    state = get_rng_state(rng, None)
+    assert restore_rng(state, None).random() == rng.random()
+
+
+@pytest.mark.parametrize("saved", [None, {"seed": 6, "version": 1, "state": []}])
+def test_restore_rng_starts_from_seed(saved: dict | None) -> None:
+    assert restore_rng(saved, 5).random() == create_rng(5).random()
+
+
+@pytest.mark.parametrize(
+    "saved",
+    [
+        {"seed": 5},
+        {"seed": 5, "version": 99, "state": []},
+        {"seed": 5, "version": 1, "state": [3, [1, 2], None]},
+    ],
+)
+def test_restore_rng_ignores_invalid_state(saved: dict) -> None:
+    assert restore_rng(saved, 5).random() == create_rng(5).random()
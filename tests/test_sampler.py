@@ -0,0 +1,221 @@
+import random
+from collections import Counter
+
+import pytest
+
+from rhythm_trainer.config import SamplerEngine
+from rhythm_trainer.sampler import (
+    AliasSampler,
+    Sampler,
+    WeightedSampler,
+    create_sampler,
+)
+
+
+class FixedRandom(random.Random):
+    """Generator whose `random` method returns the given values in turn."""
+
+    def __init__(self, *values: float) -> None:
+        super().__init__(0)
+        self.values = list(values)
+
+    def random(self) -> float:
+        return self.values.pop(0)
+
+
+def test_sampler_exposes_exercises_and_weights() -> None:
+    sampler = WeightedSampler([3, 4, 5], [1, 2, 3])
+    assert len(sampler) == 3
+    assert sampler.exercises == [3, 4, 5]
+    assert sampler.weights == [1, 2, 3]
+    assert sampler.total == 6
+    assert sampler.weight(4) == 2
+    assert 5 in sampler
+    assert 6 not in sampler
+
+
+def test_sampler_rejects_mismatched_lengths() -> None:
+    with pytest.raises(ValueError, match="exercises but"):
+        WeightedSampler([1, 2], [1])
+
+
+def test_sampler_rejects_negative_weights() -> None:
+    with pytest.raises(ValueError, match="non-negative"):
+        WeightedSampler([1, 2], [1, -1])
+
+
+def test_sampler_update_changes_total_and_weight() -> None:
+    sampler = WeightedSampler(range(1, 11), [1] * 10)
+    sampler.update(7, 5)
+    assert sampler.weight(7) == 5
+    assert sampler.total == 14
+
+    sampler.update(7, 0)
+    assert sampler.total == 9
+
+
+def test_sampler_update_unknown_exercise() -> None:
+    sampler = WeightedSampler([1, 2], [1, 1])
+    with pytest.raises(KeyError, match="not handled"):
+        sampler.update(3, 1)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(0.0, 1), (0.09, 1), (0.1, 2), (0.29, 2), (0.3, 3), (0.59, 3), (0.6, 4)],
+)
+def test_sampler_draw_follows_cumulative_weights(value: float, expected: int) -> None:
+    sampler = WeightedSampler([1, 2, 3, 4], [1, 2, 3, 4], FixedRandom(value))
+    assert sampler.draw() == expected
+
+
+def test_sampler_draw_skips_zero_weights() -> None:
+    rng = FixedRandom(0.0, 0.5, 0.999999)
+    sampler = WeightedSampler([1, 2, 3, 4, 5], [0, 3, 0, 0, 0], rng)
+    assert [sampler.draw() for _ in range(3)] == [2, 2, 2]
+
+
+def test_sampler_draw_rounding_overshoot() -> None:
+    sampler = WeightedSampler([1, 2, 3], [2, 1, 0], FixedRandom(1.0))
+    assert sampler.draw() == 2
+
+
+@pytest.mark.parametrize("engine", list(SamplerEngine))
+def test_sampler_draws_are_reproducible(engine: SamplerEngine) -> None:
+    def draws(seed: int) -> list[int]:
+        sampler = create_sampler(
+            engine, range(1, 21), range(1, 21), random.Random(seed)
+        )
+        return [sampler.draw() for _ in range(50)]
+
+    assert draws(1) == draws(1)
+    assert draws(1) != draws(2)
+
+
+def test_sampler_draw_all_zero() -> None:
+    sampler = WeightedSampler([1, 2], [0, 0])
+    with pytest.raises(ValueError, match="all weights are zero"):
+        sampler.draw()
+
+
+def test_sampler_draw_distribution_after_updates() -> None:
+    sampler = WeightedSampler(range(1, 6), [1] * 5)
+    sampler.update(2, 0)
+    sampler.update(5, 0)
+    sampler.update(3, 8)
+
+    counts = Counter(sampler.draw() for _ in range(5000))
+    assert set(counts) == {1, 3, 4}
+    assert counts[3] > counts[1] + counts[4]
+
+
+def test_sampler_masked_exercise_is_never_drawn() -> None:
+    sampler = WeightedSampler(range(1, 6), [1, 1, 10, 1, 1])
+    sampler.mask(3)
+    assert sampler.is_masked(3)
+    assert sampler.total == 4
+    assert sampler.weight(3) == 10
+    assert all(sampler.draw() != 3 for _ in range(500))
+
+    sampler.unmask(3)
+    assert not sampler.is_masked(3)
+    assert sampler.total == 14
+
+
+def test_sampler_update_while_masked() -> None:
+    sampler = WeightedSampler([1, 2], [1, 1])
+    sampler.mask(1)
+    sampler.update(1, 5)
+    assert sampler.total == 1
+    assert sampler.weight(1) == 5
+
+    sampler.unmask(1)
+    assert sampler.total == 6
+
+
+def test_sampler_masked_context_restores_masks() -> None:
+    sampler = WeightedSampler([1, 2, 3], [1, 2, 3])
+    sampler.mask(1)
+    with sampler.masked([1, 2]):
+        assert sampler.total == 3
+        assert sampler.draw() == 3
+
+    assert sampler.is_masked(1)
+    assert not sampler.is_masked(2)
+    assert sampler.total == 5
+
+
+@pytest.mark.parametrize("sampler_class", [WeightedSampler, AliasSampler])
+def test_samplers_draw_proportionally(sampler_class: type[Sampler]) -> None:
+    sampler = sampler_class(range(1, 5), [1, 0, 3, 6])
+    counts = Counter(sampler.draw() for _ in range(10000))
+    assert set(counts) == {1, 3, 4}
+    assert 700 < counts[1] < 1300
+    assert 2500 < counts[3] < 3500
+    assert 5500 < counts[4] < 6500
+
+
+@pytest.mark.parametrize("sampler_class", [WeightedSampler, AliasSampler])
+def test_samplers_masking(sampler_class: type[Sampler]) -> None:
+    sampler = sampler_class(range(1, 6), [1, 1, 10, 1, 1])
+    with sampler.masked([3]):
+        assert sampler.total == 4
+        assert all(sampler.draw() != 3 for _ in range(500))
+    assert sampler.total == 14
+
+
+def test_alias_sampler_update_marks_dirty() -> None:
+    sampler = AliasSampler([1, 2, 3], [1, 1, 1])
+    assert not sampler.dirty
+
+    sampler.update(2, 1)
+    assert not sampler.dirty
+
+    sampler.update(2, 0)
+    sampler.update(3, 0)
+    assert sampler.dirty
+    assert sampler.total == 1
+
+    assert sampler.draw() == 1
+    assert not sampler.dirty
+
+
+def test_alias_sampler_update_while_masked() -> None:
+    sampler = AliasSampler([1, 2], [1, 1])
+    sampler.mask(1)
+    sampler.update(1, 5)
+    assert sampler.total == 1
+    assert sampler.draw() == 2
+
+    sampler.unmask(1)
+    assert sampler.total == 6
+
+
+def test_alias_sampler_falls_back_to_scan_when_mostly_masked(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sampler = AliasSampler(range(1, 101), [100] * 99 + [1])
+    for exercise in range(1, 100):
+        sampler.mask(exercise)
+    scans = []
+    scan = sampler._scan
+    monkeypatch.setattr(sampler, "_scan", lambda: scans.append(1) or scan())
+
+    assert all(sampler.draw() == 100 for _ in range(20))
+    assert scans
+
+
+def test_alias_sampler_draw_all_zero() -> None:
+    sampler = AliasSampler([1, 2], [0, 0])
+    with pytest.raises(ValueError, match="all weights are zero"):
+        sampler.draw()
+
+
+@pytest.mark.parametrize(
+    ("engine", "sampler_class"),
+    [(SamplerEngine.FENWICK, WeightedSampler), (SamplerEngine.ALIAS, AliasSampler)],
+)
+def test_create_sampler(engine: SamplerEngine, sampler_class: type[Sampler]) -> None:
+    sampler = create_sampler(engine, [1, 2], [1, 2])
+    assert type(sampler) is sampler_class
+    assert sampler.weights == [1, 2]
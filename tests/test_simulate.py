@@ -0,0 +1,116 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rhythm_trainer import simulate
+from rhythm_trainer.config import Config
+from rhythm_trainer.exercises import apply_delta
+from rhythm_trainer.simulate import LearnerModel, Learners, WeightRule
+
+
+def test_default_weight_rule_matches_strategy() -> None:
+    weights = np.array([0, 1, 2, 5, 0, 1, 2, 5])
+    bad = np.array([False] * 4 + [True] * 4)
+    expected = [
+        apply_delta(int(w), 1 if b else (-1 if w > 1 else 0))
+        for w, b in zip(weights, bad, strict=True)
+    ]
+    assert WeightRule().apply(weights, bad).tolist() == expected
+
+
+def test_weight_rule() -> None:
+    rule = WeightRule(increment=3, decrement=2, min_weight=2)
+    weights = np.array([1, 3, 5, 1, 5])
+    bad = np.array([False, False, False, True, True])
+    assert rule.apply(weights, bad).tolist() == [2, 2, 3, 5, 8]
+
+
+def test_learners_improve_with_practice() -> None:
+    learners = Learners(LearnerModel(), 10, 5, np.random.default_rng(0))
+    before = learners.skills.copy()
+    learners.practice(np.full(10, 2))
+
+    assert np.all(learners.skills[:, 2] > before[:, 2])
+    assert np.array_equal(learners.skills[:, [0, 1, 3, 4]], before[:, [0, 1, 3, 4]])
+
+
+def test_learners_forget() -> None:
+    model = LearnerModel(learning_rate=0.5, forgetting_rate=0.5)
+    learners = Learners(model, 10, 5, np.random.default_rng(0))
+    learners.practice(np.zeros(10, dtype=int))
+    practiced = learners.skills[:, 0].copy()
+    learners.practice(np.ones(10, dtype=int))
+
+    assert np.all(learners.skills[:, 0] < practiced)
+    assert np.all(learners.skills[:, 0] > learners.initial_skills[:, 0])
+
+
+def test_learners_need_exercises() -> None:
+    with pytest.raises(ValueError, match="At least one learner"):
+        Learners(LearnerModel(), 10, 0, np.random.default_rng(0))
+
+
+def test_simulate_reaches_mastery() -> None:
+    result = simulate.simulate(LearnerModel(learning_rate=0.5), 50, 10, 500)
+
+    assert np.all(result.coverage_steps >= 10)
+    assert np.all(result.mastery_steps >= result.coverage_steps)
+    assert np.all(np.diff(result.coverage) >= 0)
+    summary = result.summary()
+    assert summary["mastered_learners"] == 1.0
+    assert summary["final_coverage"] == 1.0
+
+
+def test_simulate_excludes_recent_exercises() -> None:
+    # With a window covering all but one exercise, the picks cycle in order, so every
+    # exercise is practiced once in the first steps
+    result = simulate.simulate(LearnerModel(), 20, 5, 5, recent_window=4)
+    assert np.all(result.coverage_steps == 5)
+
+
+def test_simulate_is_reproducible() -> None:
+    first = simulate.simulate(LearnerModel(), 20, 10, 100, seed=3)
+    second = simulate.simulate(LearnerModel(), 20, 10, 100, seed=3)
+    assert np.array_equal(first.mastered_fraction, second.mastered_fraction)
+
+
+def test_simulate_rejects_invalid_weights() -> None:
+    with pytest.raises(ValueError, match="positive initial weights"):
+        simulate.simulate(LearnerModel(), 10, 3, 10, weights=[1, 0, 1])
+
+
+def test_simulate_matches_strategy() -> None:
+    model = LearnerModel(learning_rate=0.3)
+    vectorized = simulate.simulate(model, 200, 20, 200, seed=1)
+    strategy = simulate.simulate_strategy(
+        "weighted", Config(csv_path=Path()), model, 200, 20, 200, seed=1
+    )
+
+    assert vectorized.mastered_fraction[-1] == pytest.approx(
+        strategy.mastered_fraction[-1], abs=0.05
+    )
+    assert np.median(vectorized.coverage_steps) == pytest.approx(
+        np.median(strategy.coverage_steps), rel=0.15
+    )
+
+
+def test_main_prints_json(capsys: pytest.CaptureFixture[str]) -> None:
+    simulate.main(["--learners", "5", "--exercises", "4", "--steps", "20", "--json"])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["learners"] == 5
+    assert summary["steps"] == 20
+
+
+def test_does_not_import_qt() -> None:
+    code = "import sys, rhythm_trainer.simulate; print('PyQt6' in sys.modules)"
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    assert output.strip() == "False"
@@ -0,0 +1,380 @@
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from rhythm_trainer.chapters import Chapter, ChapterMap
+from rhythm_trainer.config import Config, StorageBackend
+from rhythm_trainer.exercises import (
+    FeedbackEvent,
+    append_feedback,
+    get_exercises_and_weights,
+    get_journal_path,
+    save_exercises_and_weights,
+)
+from rhythm_trainer.storage import (
+    BinaryWeightStore,
+    CsvWeightStore,
+    SqliteWeightStore,
+    get_binary_path,
+    get_sqlite_path,
+    get_state_path,
+    migrate_csv_to_binary,
+    migrate_csv_to_sqlite,
+    open_weight_store,
+)
+
+
+def test_csv_store_round_trip(tmp_path: Path) -> None:
+    store = CsvWeightStore(tmp_path / "exercises.csv", 5)
+    store.append([FeedbackEvent(2, 1), FeedbackEvent(2, 1), FeedbackEvent(4, 1)])
+    assert store.load(2, 4) == ([1, 2, 3, 4], [0, 3, 1, 2])
+
+    store.compact()
+    assert not get_journal_path(store.csv_path).exists()
+    assert store.load(2, 4) == ([2, 3, 4], [3, 1, 2])
+
+
+def test_sqlite_store_uses_wal(tmp_path: Path) -> None:
+    store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    with closing(sqlite3.connect(store.db_path)) as connection:
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_sqlite_store_load_defaults(tmp_path: Path) -> None:
+    store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    assert store.load(3, 6) == ([3, 4, 5, 6], [1, 1, 1, 1])
+
+
+def test_sqlite_store_append_updates_single_rows(tmp_path: Path) -> None:
+    store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    store.set_weights([1, 2, 3], [0, 3, 5])
+
+    store.append(
+        [
+            FeedbackEvent(1, 1),
+            FeedbackEvent(2, -1),
+            FeedbackEvent(3, -1),
+            FeedbackEvent(7, 1),
+        ],
+    )
+
+    assert store.load(1, 7) == (list(range(1, 8)), [2, 2, 4, 1, 1, 1, 2])
+
+
+def test_sqlite_store_load_range_with_gaps(tmp_path: Path) -> None:
+    store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    store.set_weights([10, 40, 90], [4, 5, 6])
+    assert store.load(40, 43) == ([40, 41, 42, 43], [5, 1, 1, 1])
+
+
+def test_sqlite_store_matches_csv_rules(tmp_path: Path) -> None:
+    events = [FeedbackEvent(e, d) for e, d in [(1, 1), (1, 1), (1, -1), (2, -1)]]
+    csv_store = CsvWeightStore(tmp_path / "exercises.csv", 3)
+    sqlite_store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    csv_store.append(events)
+    sqlite_store.append(events)
+
+    assert csv_store.load(1, 3) == sqlite_store.load(1, 3)
+
+
+def test_sqlite_store_concurrent_readers(tmp_path: Path) -> None:
+    store = SqliteWeightStore(tmp_path / "weights.sqlite3")
+    store.set_weights(range(1, 101), [2] * 100)
+    results = []
+
+    def read() -> None:
+        for _ in range(20):
+            results.append(store.load(1, 100)[1][0])
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    store.append([FeedbackEvent(1, 1)] * 10)
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 80
+    assert all(2 <= weight <= 12 for weight in results)
+    assert store.load(1, 1) == ([1], [12])
+
+
+def test_migrate_csv_to_sqlite(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2, 3], [1, 4, 2], 5)
+    append_feedback(csv_path, [FeedbackEvent(3, 1)])
+    db_path = get_sqlite_path(csv_path)
+
+    store = migrate_csv_to_sqlite(csv_path, db_path)
+
+    assert db_path.exists()
+    assert not db_path.with_suffix(".migrating").exists()
+    assert store.load(1, 5) == ([1, 2, 3, 4, 5], [1, 4, 3, 1, 1])
+    assert store.load_touched(1, 5).keys() == {3}
+    # The CSV file is still usable afterwards
+    assert get_exercises_and_weights(csv_path, 1, 3) == ([1, 2, 3], [1, 4, 3])
+
+
+def test_open_weight_store_csv(tmp_path: Path) -> None:
+    config = Config(csv_path=tmp_path / "exercises.csv")
+    assert isinstance(open_weight_store(config), CsvWeightStore)
+
+
+def test_open_weight_store_covers_the_chapters(tmp_path: Path) -> None:
+    config = Config(
+        csv_path=tmp_path / "exercises.csv",
+        chapters=ChapterMap([Chapter("Funk", 1, 60), Chapter("Jazz", 61, 120)]),
+    )
+    store = open_weight_store(config)
+    store.append([FeedbackEvent(2, 1)])
+    store.compact()
+
+    assert store.load(91, 120) == (list(range(91, 121)), [1] * 30)
+
+    config.storage_backend = StorageBackend.BINARY
+    binary_store = open_weight_store(config)
+    assert isinstance(binary_store, BinaryWeightStore)
+    assert binary_store.slots == 120
+    binary_store.close()
+
+
+def test_open_weight_store_sqlite_migrates_once(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [3, 3], 2)
+    config = Config(csv_path=csv_path, storage_backend=StorageBackend.SQLITE)
+
+    store = open_weight_store(config)
+    assert isinstance(store, SqliteWeightStore)
+    assert store.load(1, 2) == ([1, 2], [3, 3])
+
+    store.append([FeedbackEvent(1, 1)])
+    save_exercises_and_weights(csv_path, [1, 2], [9, 9], 2)
+    assert open_weight_store(config).load(1, 2) == ([1, 2], [4, 3])
+
+
+def test_open_weight_store_sqlite_without_csv(tmp_path: Path) -> None:
+    config = Config(
+        csv_path=tmp_path / "exercises.csv",
+        storage_backend=StorageBackend.SQLITE,
+    )
+    store = open_weight_store(config)
+    assert store.load(1, 2) == ([1, 2], [1, 1])
+    assert not config.csv_path.exists()
+
+
+def test_open_weight_store_unsupported_backend(tmp_path: Path) -> None:
+    config = Config(csv_path=tmp_path / "exercises.csv")
+    config.storage_backend = "xml"  # pyright: ignore[reportAttributeAccessIssue]
+    with pytest.raises(ValueError, match="Unsupported storage backend"):
+        open_weight_store(config)
+
+
+def test_binary_store_creates_header(tmp_path: Path) -> None:
+    path = tmp_path / "exercises.weights"
+    store = BinaryWeightStore(path, 10)
+    store.close()
+
+    data = path.read_bytes()
+    assert data[:4] == b"RTWB"
+    assert len(data) == 12 + 10 * 8
+
+
+def test_binary_store_rejects_invalid_file(tmp_path: Path) -> None:
+    path = tmp_path / "exercises.weights"
+    path.write_bytes(b"not a weight file")
+    with pytest.raises(ValueError, match="not a valid weight file"):
+        BinaryWeightStore(path)
+
+
+def test_binary_store_append_writes_single_slot(tmp_path: Path) -> None:
+    path = tmp_path / "exercises.weights"
+    store = BinaryWeightStore(path, 10)
+    store.append([FeedbackEvent(3, 1), FeedbackEvent(3, 1), FeedbackEvent(5, -1)])
+    store.compact()
+
+    assert store.weight(3) == 3
+    assert store.weight(5) == 1
+    assert store.weight(4) == 0
+    assert store.load(2, 5) == ([2, 3, 4, 5], [1, 3, 1, 1])
+    store.close()
+
+    data = path.read_bytes()
+    assert data[12 + 2 * 4 : 12 + 3 * 4] == (3).to_bytes(4, "little")
+
+
+def test_binary_store_persists_between_openings(tmp_path: Path) -> None:
+    path = tmp_path / "exercises.weights"
+    store = BinaryWeightStore(path, 10)
+    store.append([FeedbackEvent(7, 1)])
+    store.close()
+
+    store = BinaryWeightStore(path)
+    assert store.slots == 10
+    assert store.weight(7) == 2
+    store.close()
+
+
+def test_binary_store_grows_for_new_exercises(tmp_path: Path) -> None:
+    store = BinaryWeightStore(tmp_path / "exercises.weights", 4)
+    store.append([FeedbackEvent(6, 1)])
+
+    assert store.slots == 8
+    assert store.load(3, 10) == (list(range(3, 11)), [1, 1, 1, 2, 1, 1, 1, 1])
+    store.close()
+
+
+@pytest.mark.parametrize("exercise", [0, -3])
+def test_binary_store_rejects_exercises_below_one(
+    tmp_path: Path,
+    exercise: int,
+) -> None:
+    path = tmp_path / "exercises.weights"
+    store = BinaryWeightStore(path, 4)
+    header = path.read_bytes()[:12]
+
+    with pytest.raises(ValueError, match="Exercises start at 1"):
+        store.append([FeedbackEvent(2, 1), FeedbackEvent(exercise, 1)])
+    with pytest.raises(ValueError, match="Exercises start at 1"):
+        store.set_weights([exercise], [5])
+    with pytest.raises(ValueError, match="Exercises start at 1"):
+        store.set_touched({exercise: 100.0})
+    store.close()
+
+    assert path.read_bytes()[:12] == header
+    store = BinaryWeightStore(path)
+    assert store.weight(2) == 0
+    store.close()
+
+
+def test_binary_store_matches_csv_rules(tmp_path: Path) -> None:
+    events = [FeedbackEvent(e, d) for e, d in [(1, 1), (1, 1), (1, -1), (2, -1)]]
+    csv_store = CsvWeightStore(tmp_path / "exercises.csv", 3)
+    binary_store = BinaryWeightStore(tmp_path / "exercises.weights", 3)
+    csv_store.append(events)
+    binary_store.append(events)
+
+    assert csv_store.load(1, 3) == binary_store.load(1, 3)
+    binary_store.close()
+
+
+def test_binary_store_export_csv(tmp_path: Path) -> None:
+    store = BinaryWeightStore(tmp_path / "exercises.weights", 4)
+    store.set_weights([1, 4], [2, 5])
+    csv_path = tmp_path / "export.csv"
+
+    store.export_csv(csv_path)
+    store.close()
+
+    assert get_exercises_and_weights(csv_path, 1, 4) == ([1, 2, 3, 4], [2, 1, 1, 5])
+    assert csv_path.read_text().splitlines()[:2] == ["Exercise,Weight,Touched", "1,2,"]
+
+
+def test_migrate_csv_to_binary(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2, 3], [1, 4, 2], 5)
+    append_feedback(csv_path, [FeedbackEvent(3, 1)])
+    binary_path = get_binary_path(csv_path)
+
+    store = migrate_csv_to_binary(csv_path, binary_path)
+
+    assert not binary_path.with_suffix(".migrating").exists()
+    assert store.load(1, 5) == ([1, 2, 3, 4, 5], [1, 4, 3, 1, 1])
+    assert store.load_touched(1, 5).keys() == {3}
+    store.close()
+
+
+def test_binary_store_upgrades_version_1(tmp_path: Path) -> None:
+    path = tmp_path / "exercises.weights"
+    header = b"RTWB" + (1).to_bytes(2, "little") + bytes(2) + (3).to_bytes(4, "little")
+    path.write_bytes(header + b"".join(w.to_bytes(4, "little") for w in (2, 0, 5)))
+
+    store = BinaryWeightStore(path)
+    assert store.load(1, 3) == ([1, 2, 3], [2, 1, 5])
+    assert store.load_touched(1, 3) == {}
+    store.append([FeedbackEvent(2, 1, 1000.0)])
+    assert store.load_touched(1, 3) == {2: 1000.0}
+    store.close()
+
+    assert len(path.read_bytes()) == 12 + 3 * 8
+
+
+def test_binary_store_grow_keeps_touched(tmp_path: Path) -> None:
+    store = BinaryWeightStore(tmp_path / "exercises.weights", 4)
+    store.append([FeedbackEvent(2, 1, 1000.0), FeedbackEvent(4, 1, 2000.0)])
+    store.append([FeedbackEvent(6, 1, 3000.0)])
+
+    assert store.slots == 8
+    assert store.load(1, 8)[1] == [1, 2, 1, 2, 1, 2, 1, 1]
+    assert store.load_touched(1, 8) == {2: 1000.0, 4: 2000.0, 6: 3000.0}
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [StorageBackend.CSV, StorageBackend.SQLITE, StorageBackend.BINARY],
+)
+def test_store_load_touched(tmp_path: Path, backend: StorageBackend) -> None:
+    config = Config(csv_path=tmp_path / "exercises.csv", storage_backend=backend)
+    store = open_weight_store(config)
+    store.append([FeedbackEvent(2, 1, 1000.0), FeedbackEvent(5, -1, 2000.0)])
+    store.append([FeedbackEvent(2, -1, 3000.0)])
+    store.compact()
+
+    assert store.load_touched(1, 4) == {2: 3000.0}
+    assert store.load_touched(1, 10) == {2: 3000.0, 5: 2000.0}
+    store.close()
+
+
+def test_sqlite_store_adds_touched_column(tmp_path: Path) -> None:
+    db_path = tmp_path / "weights.sqlite3"
+    with closing(sqlite3.connect(db_path)) as connection, connection:
+        connection.execute(
+            "CREATE TABLE weights "
+            "(exercise INTEGER PRIMARY KEY, weight INTEGER NOT NULL)"
+        )
+        connection.execute("INSERT INTO weights VALUES (1, 3)")
+
+    store = SqliteWeightStore(db_path)
+    assert store.load(1, 1) == ([1], [3])
+    store.append([FeedbackEvent(1, 1, 1000.0)])
+    assert store.load_touched(1, 1) == {1: 1000.0}
+
+
+def test_open_weight_store_binary(tmp_path: Path) -> None:
+    csv_path = tmp_path / "exercises.csv"
+    save_exercises_and_weights(csv_path, [1, 2], [3, 3], 2)
+    config = Config(csv_path=csv_path, storage_backend=StorageBackend.BINARY)
+
+    store = open_weight_store(config)
+    assert isinstance(store, BinaryWeightStore)
+    assert store.load(1, 2) == ([1, 2], [3, 3])
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [StorageBackend.CSV, StorageBackend.SQLITE, StorageBackend.BINARY],
+)
+def test_store_state_round_trip(tmp_path: Path, backend: StorageBackend) -> None:
+    config = Config(csv_path=tmp_path / "exercises.csv", storage_backend=backend)
+    store = open_weight_store(config)
+    assert store.load_state("rng") is None
+
+    store.save_state("rng", {"seed": 1, "state": [3, [1, 2], None]})
+    store.save_state("rng", {"seed": 2, "state": [3, [4, 5], None]})
+    store.save_state("other", {"value": 1})
+    store.close()
+
+    store = open_weight_store(config)
+    assert store.load_state("rng") == {"seed": 2, "state": [3, [4, 5], None]}
+    assert store.load_state("other") == {"value": 1}
+    store.close()
+
+
+def test_csv_store_ignores_invalid_state(tmp_path: Path) -> None:
+    store = CsvWeightStore(tmp_path / "exercises.csv")
+    get_state_path(store.csv_path, "rng").write_text("{not json")
+    assert store.load_state("rng") is None
@@ -0,0 +1,404 @@
+import json
+import random
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rhythm_trainer.config import Config, SamplerEngine
+from rhythm_trainer.exercises import RecentWindow, WeightDecay
+from rhythm_trainer.sampler import AliasSampler, WeightedSampler
+from rhythm_trainer.strategies import (
+    MIN_HEAP_REBUILD,
+    SECONDS_PER_DAY,
+    STRATEGIES,
+    Feedback,
+    Review,
+    SamplingStrategy,
+    SpacedRepetitionStrategy,
+    WeightedStrategy,
+    create_strategy,
+    feedback_delta,
+    feedback_deltas,
+    register_strategy,
+)
+
+
+@pytest.fixture
+def config() -> Config:
+    return Config(csv_path=Path("exercises.csv"), recent_window=2)
+
+
+def test_default_strategy_is_registered(config: Config) -> None:
+    strategy = create_strategy("weighted", [1, 2, 3], [1, 2, 3], config)
+    assert isinstance(strategy, WeightedStrategy)
+    assert isinstance(strategy.sampler, WeightedSampler)
+    assert strategy.recent.size == 2
+    assert strategy.exercises == [1, 2, 3]
+    assert strategy.weights == [1, 2, 3]
+
+
+def test_create_strategy_uses_sampler_engine(config: Config) -> None:
+    config.sampler_engine = SamplerEngine.ALIAS
+    strategy = create_strategy("weighted", [1, 2], [1, 1], config)
+    assert isinstance(strategy, WeightedStrategy)
+    assert isinstance(strategy.sampler, AliasSampler)
+
+
+def test_create_strategy_uses_seed(config: Config) -> None:
+    config.seed = 42
+
+    def draws(rng: random.Random | None = None) -> list[int]:
+        strategy = create_strategy("weighted", range(1, 11), [1] * 10, config, rng)
+        return [strategy.draw() for _ in range(20)]
+
+    assert draws() == draws()
+    assert draws(random.Random(1)) == draws(random.Random(1))
+    assert draws(random.Random(1)) != draws()
+
+
+def test_create_unknown_strategy(config: Config) -> None:
+    with pytest.raises(ValueError, match="Unsupported sampling strategy"):
+        create_strategy("unknown", [1], [1], config)
+
+
+def test_register_strategy(
+    config: Config,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("rhythm_trainer.strategies.STRATEGIES", dict(STRATEGIES))
+
+    @register_strategy("first")
+    def _create_first(
+        exercises: Iterable[int],
+        weights: Iterable[int],
+        config: Config,
+        rng: random.Random,
+    ) -> SamplingStrategy:
+        sampler = WeightedSampler(exercises, weights, rng)
+        return WeightedStrategy(sampler, RecentWindow(config.recent_window))
+
+    strategy = create_strategy("first", [7], [3], config)
+    assert isinstance(strategy, WeightedStrategy)
+    assert strategy.draw() == 7
+    assert strategy.weights == [3]
+    assert strategy.recent.size == config.recent_window
+    with pytest.raises(ValueError, match="already exists"):
+        register_strategy("first")(_create_first)
+
+
+@pytest.mark.parametrize(
+    ("weight", "feedback", "delta", "expected"),
+    [
+        (3, Feedback.GOOD, -1, 2),
+        (1, Feedback.GOOD, 0, 1),
+        (1, Feedback.BAD, 1, 2),
+        (0, Feedback.BAD, 1, 2),
+    ],
+)
+def test_weighted_strategy_update(
+    weight: int,
+    feedback: Feedback,
+    delta: int,
+    expected: int,
+) -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2], [weight, 1]), RecentWindow())
+    assert strategy.update(1, feedback) == delta
+    assert strategy.sampler.weight(1) == expected
+
+
+def test_feedback_deltas_match_feedback_delta() -> None:
+    weights = [0, 1, 2, 5, 0, 1, 2, 5]
+    bad = [False] * 4 + [True] * 4
+    expected = [
+        feedback_delta(w, b, 3, 2, 2) for w, b in zip(weights, bad, strict=True)
+    ]
+
+    assert all(type(delta) is int for delta in expected)
+    assert feedback_deltas(np.array(weights), np.array(bad), 3, 2, 2).tolist() == (
+        expected
+    )
+
+
+def test_weighted_strategy_draw_excludes_recent() -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2, 3], [1, 1, 1]), RecentWindow(2))
+    picks = [strategy.draw() for _ in range(30)]
+    assert all(pick not in picks[max(i - 2, 0) : i] for i, pick in enumerate(picks))
+
+
+def test_weighted_strategy_predict() -> None:
+    strategy = WeightedStrategy(
+        WeightedSampler(range(1, 11), [1] * 10, random.Random(0)), RecentWindow(3)
+    )
+    reference = WeightedStrategy(
+        WeightedSampler(range(1, 11), [1] * 10, random.Random(0)), RecentWindow(3)
+    )
+    expected = [reference.draw() for _ in range(5)]
+
+    assert strategy.predict(3) == expected[:3]
+    assert strategy.predict(2) == expected[:2]
+    assert strategy.draw() == expected[0]
+    assert strategy.upcoming == expected[1:3]
+    assert [strategy.draw() for _ in range(4)] == expected[1:]
+
+
+def test_weighted_strategy_update_drops_stale_draws() -> None:
+    strategy = WeightedStrategy(
+        WeightedSampler(range(1, 11), [1] * 10, random.Random(0)), RecentWindow(3)
+    )
+    predicted = strategy.predict(6)
+    exercise = strategy.draw()
+
+    strategy.update(exercise, Feedback.BAD)
+
+    # The next three were drawn while the exercise was in their window
+    assert strategy.upcoming == predicted[1:4]
+    strategy.update(predicted[5], Feedback.BAD)
+    assert strategy.upcoming == []
+
+
+def test_weighted_strategy_plan() -> None:
+    strategy = WeightedStrategy(
+        WeightedSampler(range(1, 11), [1] * 10, random.Random(0)), RecentWindow(3)
+    )
+    first = strategy.predict(1)
+
+    planned = strategy.plan(5)
+
+    assert len(planned) == 5
+    assert strategy.upcoming == first + planned
+    picks = [strategy.draw() for _ in range(6)]
+    assert picks == first + planned
+    # The plan shares the recent window of the single draws
+    assert all(pick not in picks[max(i - 3, 0) : i] for i, pick in enumerate(picks))
+
+
+def test_weighted_strategy_plan_follows_decayed_weights() -> None:
+    clock = FakeClock()
+    strategy = WeightedStrategy(
+        WeightedSampler([1, 2], [1, 1000], random.Random(0)),
+        RecentWindow(0),
+        clock,
+        WeightDecay(1),
+    )
+    strategy.update(2, Feedback.BAD)
+    clock.advance(30)
+
+    # Both weights decayed to 1, where the stored ones would favor exercise 2
+    assert strategy.plan(200).count(1) > 50
+
+
+def test_weighted_strategy_serialize() -> None:
+    recent = RecentWindow()
+    recent.push(2)
+    strategy = WeightedStrategy(WeightedSampler([1, 2], [3, 4]), recent)
+    assert strategy.serialize() == {
+        "strategy": "weighted",
+        "weights": {1: 3, 2: 4},
+        "recent": [2],
+        "upcoming": [],
+    }
+
+
+def test_weighted_strategy_restore() -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2, 3], [1, 1, 1]), RecentWindow())
+    strategy.restore({"strategy": "weighted", "weights": {}, "recent": [3, 7, 1]})
+    assert list(strategy.recent) == [3, 1]
+
+
+def test_weighted_strategy_restores_upcoming_exercises() -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2, 3], [1, 1, 1]), RecentWindow())
+    strategy.restore({"strategy": "weighted", "upcoming": [2, 7, 3]})
+    assert strategy.upcoming == [2, 3]
+    assert strategy.draw() == 2
+
+
+def test_weighted_strategy_ignores_other_state() -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2, 3], [1, 1, 1]), RecentWindow())
+    strategy.restore({"strategy": "other", "recent": [3]})
+    assert list(strategy.recent) == []
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, days: float) -> None:
+        self.now += days * SECONDS_PER_DAY
+
+
+def make_sm2_strategy(clock: FakeClock) -> SpacedRepetitionStrategy:
+    sampler = WeightedSampler(range(1, 6), [1] * 5, random.Random(0))
+    return SpacedRepetitionStrategy(sampler, RecentWindow(2), clock)
+
+
+def test_review_schedule() -> None:
+    review = Review()
+    intervals = []
+    for _ in range(3):
+        review.schedule(4, 0.0)
+        intervals.append(review.interval)
+    assert intervals == [1, 6, 15]
+    assert review.ease == pytest.approx(2.5)
+
+    review.schedule(1, 100.0)
+    assert review.repetitions == 0
+    assert review.interval == 1
+    assert review.ease == pytest.approx(1.96)
+    assert review.due == 100.0 + SECONDS_PER_DAY
+
+    for _ in range(5):
+        review.schedule(1, 0.0)
+    assert review.ease == pytest.approx(1.3)
+
+
+def test_sm2_strategy_is_registered(config: Config) -> None:
+    strategy = create_strategy("sm2", [1, 2], [1, 1], config)
+    assert isinstance(strategy, SpacedRepetitionStrategy)
+
+
+def test_sm2_strategy_serves_overdue_exercises_first() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    strategy.update(4, Feedback.BAD)
+    clock.advance(0.5)
+    strategy.update(2, Feedback.BAD)
+    strategy.update(5, Feedback.GOOD)
+    strategy.update(5, Feedback.GOOD)
+
+    clock.advance(2)
+    assert strategy.draw() == 4
+    assert strategy.draw() == 4
+    strategy.update(4, Feedback.GOOD)
+    assert strategy.draw() == 2
+    strategy.update(2, Feedback.GOOD)
+
+    # Nothing is due anymore, so exercises are drawn by weight
+    assert strategy.review(4).due > clock.now
+    assert strategy.draw() in {1, 3, 5}
+
+
+def test_sm2_strategy_predicts_overdue_exercises_first() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    strategy.update(4, Feedback.BAD)
+
+    assert strategy.predict(2) == strategy.upcoming
+
+    clock.advance(2)
+    predicted = strategy.predict(3)
+    assert predicted[0] == 4
+    assert strategy.draw() == 4
+    strategy.update(4, Feedback.GOOD)
+    assert [strategy.draw() for _ in range(2)] == predicted[1:]
+
+
+def test_sm2_strategy_predict_excludes_recent() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    for exercise in range(1, 6):
+        strategy.update(exercise, Feedback.BAD)
+    strategy.predict(3)
+
+    for _ in range(20):
+        clock.advance(1)
+        predicted = strategy.predict(3)
+        assert len(set(predicted)) == len(predicted)
+        strategy.update(strategy.draw(), Feedback.GOOD)
+
+
+def test_sm2_strategy_serves_due_reviews_before_the_plan() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    strategy.update(4, Feedback.BAD)
+    planned = strategy.plan(3)
+
+    clock.advance(2)
+    assert strategy.draw() == 4
+    strategy.update(4, Feedback.GOOD)
+    # The plan is cut where it served the due exercise again
+    expected = planned[: planned.index(4)] if 4 in planned else planned
+    assert [strategy.draw() for _ in expected] == expected
+
+
+def test_sm2_strategy_updates_weights() -> None:
+    strategy = make_sm2_strategy(FakeClock())
+    assert strategy.update(3, Feedback.BAD) == 1
+    assert strategy.sampler.weight(3) == 2
+    assert strategy.review(3).repetitions == 0
+    assert strategy.review(1) is None
+
+
+def test_sm2_strategy_heap_stays_bounded() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    for _ in range(1000):
+        strategy.update(1, Feedback.GOOD)
+        clock.advance(1)
+    assert len(strategy._heap) <= 2 + MIN_HEAP_REBUILD
+
+
+def test_sm2_strategy_restore() -> None:
+    clock = FakeClock()
+    strategy = make_sm2_strategy(clock)
+    strategy.update(2, Feedback.GOOD)
+    strategy.update(3, Feedback.BAD)
+    state = json.loads(json.dumps(strategy.serialize()))
+
+    restored = make_sm2_strategy(clock)
+    restored.restore(state)
+    assert restored.review(2) == strategy.review(2)
+    assert restored.review(3) == strategy.review(3)
+    clock.advance(1)
+    assert restored.draw() == strategy.draw() == 2
+
+
+def make_decaying_strategy(clock: FakeClock, weights: list[int]) -> WeightedStrategy:
+    sampler = WeightedSampler(range(1, len(weights) + 1), weights, random.Random(0))
+    strategy = WeightedStrategy(sampler, RecentWindow(0), clock, WeightDecay(1))
+    strategy.set_last_touched({1: 0.0, 7: 0.0})
+    return strategy
+
+
+def test_create_strategy_uses_decay(config: Config) -> None:
+    assert create_strategy("weighted", [1], [1], config).decay is None
+    config.decay_half_life_days = 7
+    assert create_strategy("sm2", [1], [1], config).decay == WeightDecay(7)
+
+
+def test_weighted_strategy_decays_weights() -> None:
+    clock = FakeClock()
+    strategy = make_decaying_strategy(clock, [9, 5])
+    clock.advance(2)
+
+    # Exercise 2 never received feedback, so its weight does not decay
+    assert strategy.weights == [3, 5]
+    assert strategy.update(1, Feedback.GOOD) == -7
+    assert strategy.sampler.weight(1) == 2
+    clock.advance(1)
+    assert strategy.weights == [2, 5]
+
+
+def test_weighted_strategy_draws_by_decayed_weight() -> None:
+    clock = FakeClock()
+    strategy = make_decaying_strategy(clock, [9, 1])
+    clock.advance(3)
+
+    picks = [strategy.draw() for _ in range(3000)]
+    assert picks.count(1) / len(picks) == pytest.approx(2 / 3, abs=0.03)
+    # The bound of exercise 1 was lowered, but feedback is still relative to the
+    # stored weight
+    assert strategy.sampler.weight(1) == 2
+    assert strategy.update(1, Feedback.BAD) == -6
+    assert strategy.sampler.weight(1) == 3
+
+
+def test_weighted_strategy_without_decay_ignores_touched() -> None:
+    strategy = WeightedStrategy(WeightedSampler([1, 2], [9, 1]), RecentWindow())
+    strategy.set_last_touched({1: 0.0})
+    assert strategy.weights == [9, 1]
+    assert strategy.update(1, Feedback.GOOD) == -1
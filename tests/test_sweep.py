@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from rhythm_trainer import sweep
+from rhythm_trainer.sweep import SweepPoint, SweepSettings
+
+SETTINGS = SweepSettings(learners=5, exercises=6, steps=30)
+
+
+def read_lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_make_grid() -> None:
+    grid = sweep.make_grid([0, 3], [1, 2], [1], [1, 2])
+    assert len(grid) == 8
+    assert grid[0] == SweepPoint(0, 1, 1, 1)
+    assert grid[-1] == SweepPoint(3, 2, 1, 2)
+
+
+def test_make_grid_rejects_negative_window() -> None:
+    with pytest.raises(ValueError, match="non-negative"):
+        sweep.make_grid([-1])
+
+
+@pytest.mark.parametrize(
+    ("grid", "message"),
+    [
+        ({"increments": [1, 0]}, "Increments must be at least 1"),
+        ({"decrements": [-1]}, "Decrements must be at least 1"),
+        ({"min_weights": [0]}, "Minimum weights must be at least 1"),
+    ],
+)
+def test_make_grid_rejects_invalid_rule(
+    grid: dict[str, list[int]], message: str
+) -> None:
+    with pytest.raises(ValueError, match=message):
+        sweep.make_grid(**grid)
+
+
+def test_run_sweep_writes_results(tmp_path: Path) -> None:
+    output = tmp_path / "results.jsonl"
+    grid = sweep.make_grid([0, 3], [1, 2])
+    lines = list(sweep.run_sweep(grid, SETTINGS, output, max_workers=2))
+
+    assert len(lines) == 4
+    header, *results = read_lines(output)
+    assert header == {"settings": SETTINGS.to_dict()}
+    assert sorted(SweepPoint(**r["point"]).key() for r in results) == sorted(
+        point.key() for point in grid
+    )
+
+
+def test_run_sweep_resumes(tmp_path: Path) -> None:
+    output = tmp_path / "results.jsonl"
+    list(sweep.run_sweep(sweep.make_grid([0, 3]), SETTINGS, output, max_workers=2))
+    # Simulate an interruption while writing a line
+    with output.open("a") as file:
+        file.write('{"point": {"recent_')
+
+    lines = list(
+        sweep.run_sweep(sweep.make_grid([0, 2, 3]), SETTINGS, output, max_workers=2)
+    )
+
+    assert [line["point"]["recent_window"] for line in lines] == [2]
+    assert len(read_lines(output)) == 4
+
+
+def test_run_sweep_rejects_other_settings(tmp_path: Path) -> None:
+    output = tmp_path / "results.jsonl"
+    list(sweep.run_sweep(sweep.make_grid([0]), SETTINGS, output, max_workers=1))
+
+    other = SweepSettings(learners=5, exercises=6, steps=30, seed=1)
+    with pytest.raises(ValueError, match="different settings"):
+        list(sweep.run_sweep(sweep.make_grid([0]), other, output, max_workers=1))
+
+
+def test_results_do_not_depend_on_grid() -> None:
+    point = SweepPoint(recent_window=2)
+    first = sweep.run_point(point, SETTINGS)
+    second = sweep.run_point(point, SETTINGS)
+    other = sweep.run_point(SweepPoint(recent_window=3), SETTINGS)
+
+    assert first == second
+    assert first["summary"] != other["summary"]
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    output = tmp_path / "results.jsonl"
+    sweep.main(
+        [
+            str(output),
+            "--increment",
+            "1",
+            "2",
+            "--learners",
+            "3",
+            "--steps",
+            "10",
+            "--workers",
+            "1",
+        ]
+    )
+
+    assert len(capsys.readouterr().out.splitlines()) == 2
+    assert len(read_lines(output)) == 3
@@ -1,9 +1,13 @@
+import threading
+import wave
 from pathlib import Path
 
 import pytest
 
 from rhythm_trainer import tracks
+from rhythm_trainer.chapters import Chapter, ChapterMap
 from rhythm_trainer.config import FileFormat, NamingScheme
+from rhythm_trainer.playback import NullSink, Player
 
 
 def make_chapter_dir(
@@ -111,6 +115,22 @@ def test_validate_backing_track_no_chapter_dir(tmp_path: Path) -> None:
     assert result is None
 
 
+def test_validate_backing_track_beyond_chapters(tmp_path: Path) -> None:
+    assert tracks.validate_backing_track(91, tmp_path) is None
+
+
+def test_validate_backing_track_with_chapter_map(tmp_path: Path) -> None:
+    chapters = ChapterMap(
+        [Chapter("Grooves", 1, 150, "01 Grooves"), Chapter("Fills", 151, 400)],
+    )
+    (tmp_path / "01 Grooves").mkdir()
+    track = tmp_path / "01 Grooves" / "Grooves 120 BK.wav"
+    track.touch()
+
+    assert tracks.validate_backing_track(120, tmp_path, chapters=chapters) == track
+    assert tracks.validate_backing_track(160, tmp_path, chapters=chapters) is None
+
+
 def test_validate_backing_track_unsupported_naming(tmp_path: Path) -> None:
     exercise = 1
     subdir = "Acoustic"
@@ -129,30 +149,290 @@ def test_validate_backing_track_unsupported_naming(tmp_path: Path) -> None:
         )
 
 
-def test_play_backing_track_invalid_track(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr(
-        "rhythm_trainer.tracks.validate_backing_track",
-        lambda *_, **__: None,
-    )
+def test_play_backing_track_missing_from_index(tmp_path: Path) -> None:
+    player = Player(NullSink())
+    index = tracks.BackingTrackIndex(tmp_path)
 
     with pytest.raises(FileNotFoundError, match="not found in directory"):
-        tracks.play_backing_track(1, Path(), NamingScheme.DEFAULT, FileFormat.WAV)
+        tracks.play_backing_track(player, 1, index)
+    assert player.track is None
+
+
+def test_play_backing_track_valid_track(tmp_path: Path) -> None:
+    _, track = make_chapter_dir(
+        tmp_path, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV
+    )
+    with wave.open(str(track), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(8000)
+        writer.writeframes(bytes(16000))
+    index = tracks.BackingTrackIndex(tmp_path)
+    index.scan()
+    player = Player(NullSink())
+
+    tracks.play_backing_track(player, 1, index)
+
+    assert player.track == track
+    assert player.duration == 1
+    assert player.is_playing()
+
+
+def test_play_backing_track_mp3_library(tmp_path: Path) -> None:
+    _, track = make_chapter_dir(
+        tmp_path, "Acoustic", 1, NamingScheme.LOGICAL, FileFormat.MP3
+    )
+    index = tracks.BackingTrackIndex(tmp_path, NamingScheme.LOGICAL, FileFormat.MP3)
+    index.scan()
+    opened: list[Path] = []
+    player = Player(NullSink(), opener=opened.append)
+
+    tracks.play_backing_track(player, 1, index)
+
+    assert opened == [track]
+    assert player.track == track
+
+
+def test_play_backing_track_does_not_check_the_track(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _, track = make_chapter_dir(
+        tmp_path, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV
+    )
+    index = tracks.BackingTrackIndex(tmp_path)
+    index.scan()
+    monkeypatch.setattr(Path, "exists", lambda _: pytest.fail("Checked the track"))
+    monkeypatch.setattr(Path, "is_file", lambda _: pytest.fail("Checked the track"))
+    played: list[Path] = []
+    player = Player(NullSink(), loader=lambda path: played.append(path) or b"")
+
+    with pytest.raises(ValueError, match="Could not decode"):
+        tracks.play_backing_track(player, 1, index)
+    assert played == [track]
+
+
+def test_backing_track_index_scan(tmp_path: Path) -> None:
+    _, track_1 = make_chapter_dir(
+        tmp_path,
+        "Acoustic",
+        3,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+    )
+    _, track_2 = make_chapter_dir(
+        tmp_path,
+        "Soul",
+        90,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+    )
+    (tmp_path / "Soul" / "Soul 89 BK.mp3").touch()
+
+    index = tracks.BackingTrackIndex(tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+    index.scan()
+
+    assert len(index) == 2
+    assert index.get(3) == track_1
+    assert index.get(90) == track_2
+    assert index.get(89) is None
+    assert 3 in index
+    assert 4 not in index
+
+
+def test_backing_track_index_logical_naming(tmp_path: Path) -> None:
+    _, track = make_chapter_dir(
+        tmp_path,
+        "Funk",
+        32,
+        NamingScheme.LOGICAL,
+        FileFormat.MP3,
+    )
+
+    index = tracks.BackingTrackIndex(tmp_path, NamingScheme.LOGICAL, FileFormat.MP3)
+    index.scan()
+
+    assert index.get(32) == track
 
 
-def test_play_backing_track_valid_track(
+def test_backing_track_index_load_uses_cache(
     tmp_path: Path,
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    monkeypatch.setattr(
-        "rhythm_trainer.tracks.validate_backing_track",
-        lambda *_, **__: tmp_path / "valid_track.wav",
+    bk_dir = tmp_path / "tracks"
+    _, track = make_chapter_dir(
+        bk_dir,
+        "Acoustic",
+        1,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+    )
+    cache_path = tmp_path / "cache.json"
+    tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
+    )
+    assert cache_path.is_file()
+
+    def fail(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("unexpected scan")
+
+    monkeypatch.setattr("os.scandir", fail)
+    index = tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
     )
-    called = {}
 
-    def mock_popen(args: list[str], stdout: int | None) -> None:
-        called["args"] = args
-        called["stdout"] = stdout
+    assert index.get(1) == track
 
-    monkeypatch.setattr("subprocess.Popen", mock_popen)
 
-    tracks.play_backing_track(1, tmp_path, NamingScheme.DEFAULT, FileFormat.WAV)
+def test_backing_track_index_load_rescans_changed_chapters(tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    make_chapter_dir(bk_dir, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV)
+    cache_path = tmp_path / "cache.json"
+    tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
+    )
+
+    _, track = make_chapter_dir(
+        bk_dir,
+        "Jazz",
+        65,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+    )
+    (bk_dir / "Acoustic" / "Acoustic 1 BK.wav").unlink()
+
+    index = tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
+    )
+
+    assert index.get(1) is None
+    assert index.get(65) == track
+
+
+def test_backing_track_index_load_ignores_mismatched_cache(tmp_path: Path) -> None:
+    bk_dir = tmp_path / "tracks"
+    make_chapter_dir(bk_dir, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV)
+    (bk_dir / "Acoustic" / "Acoustic 1 BK.mp3").touch()
+    cache_path = tmp_path / "cache.json"
+    tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
+    )
+
+    index = tracks.BackingTrackIndex.load(
+        bk_dir,
+        NamingScheme.DEFAULT,
+        FileFormat.MP3,
+        cache_path,
+    )
+
+    assert index.get(1) == bk_dir / "Acoustic" / "Acoustic 1 BK.mp3"
+
+
+def test_backing_track_index_with_chapter_map(tmp_path: Path) -> None:
+    chapters = ChapterMap([Chapter("Fills", 91, 300, "Book 2")])
+    (tmp_path / "Book 2").mkdir()
+    track = tmp_path / "Book 2" / "Fills 250 BK.wav"
+    track.touch()
+
+    index = tracks.BackingTrackIndex(tmp_path, chapters=chapters)
+    index.scan()
+
+    assert len(index) == 1
+    assert index.get(250) == track
+
+
+def test_backing_track_index_load_ignores_cache_of_other_chapters(
+    tmp_path: Path,
+) -> None:
+    make_chapter_dir(tmp_path, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV)
+    cache_path = tmp_path / "cache.json"
+    tracks.BackingTrackIndex.load(tmp_path, cache_path=cache_path)
+
+    chapters = ChapterMap([Chapter("Acoustic", 1, 5, "Other")])
+    index = tracks.BackingTrackIndex.load(
+        tmp_path, cache_path=cache_path, chapters=chapters
+    )
+
+    assert len(index) == 0
+
+
+def test_backing_track_index_scan_stops(tmp_path: Path) -> None:
+    make_chapter_dir(tmp_path, "Funk", 31, NamingScheme.DEFAULT, FileFormat.WAV)
+    index = tracks.BackingTrackIndex(tmp_path)
+    stop = threading.Event()
+    stop.set()
+
+    index.scan(stop=stop)
+
+    assert len(index) == 0
+    assert index.to_dict()["mtimes"] == {}
+
+
+def test_backing_track_index_scan_reports_progress(tmp_path: Path) -> None:
+    make_chapter_dir(tmp_path, "Funk", 31, NamingScheme.DEFAULT, FileFormat.WAV)
+    index = tracks.BackingTrackIndex(tmp_path)
+    progress: list[tuple[int, int]] = []
+
+    index.scan(
+        max_workers=3, progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert progress == [(done, 9) for done in range(1, 10)]
+    assert len(index) == 1
+
+
+def test_backing_track_index_refresh_lists_changed_chapters_only(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    make_chapter_dir(tmp_path, "Acoustic", 1, NamingScheme.DEFAULT, FileFormat.WAV)
+    _, track = make_chapter_dir(
+        tmp_path, "Jazz", 61, NamingScheme.DEFAULT, FileFormat.WAV
+    )
+    index = tracks.BackingTrackIndex(tmp_path)
+    index.scan()
+    listed: list[str] = []
+    list_chapter = index._list_chapter
+
+    def record(chapter: Chapter) -> tuple[int | None, set[str] | None]:
+        listed.append(chapter.name)
+        return list_chapter(chapter)
+
+    monkeypatch.setattr(index, "_list_chapter", record)
+    track.rename(track.with_name("Jazz 62 BK.wav"))
+
+    assert index.refresh()
+    assert listed == ["Jazz"]
+    assert index.get(61) is None
+    assert index.get(62) == track.with_name("Jazz 62 BK.wav")
+    assert index.get(1) is not None
+
+
+def test_backing_track_index_load_corrupt_cache(tmp_path: Path) -> None:
+    make_chapter_dir(tmp_path, "Acoustic", 2, NamingScheme.DEFAULT, FileFormat.WAV)
+    cache_path = tmp_path / "cache.json"
+    cache_path.write_text("{not json")
+
+    index = tracks.BackingTrackIndex.load(
+        tmp_path,
+        NamingScheme.DEFAULT,
+        FileFormat.WAV,
+        cache_path,
+    )
+
+    assert index.get(2) is not None
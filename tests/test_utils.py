@@ -2,12 +2,13 @@ from pathlib import Path
 
 import pytest
 
+from rhythm_trainer.chapters import Chapter, ChapterMap
 from rhythm_trainer.config import FileFormat, NamingScheme
 from rhythm_trainer.utils import (
+    LibraryProbe,
     get_number_input,
     get_valid_input,
-    infer_file_format,
-    infer_naming_scheme,
+    probe_library,
 )
 
 
@@ -98,87 +99,130 @@ def test_get_number_input_between_min_max(
     assert "between 5 and 10" in captured.out
 
 
+@pytest.fixture
+def cache_path(tmp_path: Path) -> Path:
+    return tmp_path / "probe.json"
+
+
+def make_tracks(bk_dir: Path, chapter: str, *names: str) -> Path:
+    chapter_dir = bk_dir / chapter
+    chapter_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (chapter_dir / name).touch()
+    return chapter_dir
+
+
 @pytest.mark.parametrize(
     ("file_extension", "expected_format"),
     [
         (".mp3", FileFormat.MP3),
         (".wav", FileFormat.WAV),
+        (".WAV", FileFormat.WAV),
     ],
 )
-def test_infer_file_format(
+def test_probe_library_file_format(
     tmp_path: Path,
+    cache_path: Path,
     file_extension: str,
     expected_format: FileFormat,
 ) -> None:
-    acoustic_dir = tmp_path / "Acoustic"
-    acoustic_dir.mkdir()
-    (acoustic_dir / f"track{file_extension}").touch()
+    make_tracks(tmp_path, "Acoustic", f"Acoustic 1 BK{file_extension}")
+
+    assert probe_library(tmp_path, cache_path=cache_path) == LibraryProbe(
+        expected_format, NamingScheme.DEFAULT
+    )
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected_scheme"),
+    [
+        ("BK track.mp3", NamingScheme.LOGICAL),
+        ("track BK.mp3", NamingScheme.DEFAULT),
+    ],
+)
+def test_probe_library_naming_scheme(
+    tmp_path: Path,
+    cache_path: Path,
+    file_name: str,
+    expected_scheme: NamingScheme,
+) -> None:
+    make_tracks(tmp_path, "Acoustic", file_name)
 
-    assert infer_file_format(tmp_path) == expected_format
+    probe = probe_library(tmp_path, cache_path=cache_path)
+    assert probe.naming_scheme == expected_scheme
 
 
-def test_infer_file_format_no_acoustic_dir(tmp_path: Path) -> None:
-    with pytest.raises(
-        FileNotFoundError,
-        match="does not contain an 'Acoustic' subdirectory",
-    ):
-        infer_file_format(tmp_path)
+def test_probe_library_samples_every_chapter(tmp_path: Path, cache_path: Path) -> None:
+    # The first chapter only holds stray files, the others hold the backing tracks
+    make_tracks(tmp_path, "Acoustic", "notes.txt", "BK Acoustic 01.wav")
+    make_tracks(tmp_path, "Funk", "Funk 31 BK.mp3", "Funk 32 BK.mp3")
+    make_tracks(tmp_path, "Soul", "Soul 81 BK.mp3")
 
+    assert probe_library(tmp_path, cache_path=cache_path) == LibraryProbe(
+        FileFormat.MP3, NamingScheme.DEFAULT
+    )
 
-def test_infer_file_format_empty_acoustic_dir(tmp_path: Path) -> None:
-    acoustic_dir = tmp_path / "Acoustic"
-    acoustic_dir.mkdir()
 
-    with pytest.raises(FileNotFoundError, match="with a recognizable file format."):
-        infer_file_format(tmp_path)
+def test_probe_library_uses_chapter_map(tmp_path: Path, cache_path: Path) -> None:
+    chapters = ChapterMap([Chapter("Grooves", 1, 100, "01 Grooves")])
+    make_tracks(tmp_path, "01 Grooves", "BK Grooves 01.mp3")
 
+    assert probe_library(tmp_path, chapters, cache_path) == LibraryProbe(
+        FileFormat.MP3, NamingScheme.LOGICAL
+    )
 
-@pytest.mark.parametrize(
-    "file_extension",
-    [".txt", ".flac", ".ogg"],
-)
-def test_infer_file_format_invalid_extension(
+
+def test_probe_library_uses_cache(
     tmp_path: Path,
-    file_extension: str,
+    cache_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    acoustic_dir = tmp_path / "Acoustic"
-    acoustic_dir.mkdir()
-    (acoustic_dir / f"track{file_extension}").touch()
+    bk_dir = tmp_path / "tracks"
+    chapter_dir = make_tracks(bk_dir, "Acoustic", "Acoustic 1 BK.wav")
+    probe = probe_library(bk_dir, cache_path=cache_path)
+
+    def fail(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("unexpected scan")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("os.scandir", fail)
+        assert probe_library(bk_dir, cache_path=cache_path) == probe
+
+    # Changing a chapter folder invalidates the cache
+    (chapter_dir / "Acoustic 1 BK.wav").rename(chapter_dir / "Acoustic 1 BK.mp3")
+    assert probe_library(bk_dir, cache_path=cache_path).file_format == FileFormat.MP3
 
-    with pytest.raises(ValueError, match=f"Unsupported file format: {file_extension}"):
-        infer_file_format(tmp_path)
+
+def test_probe_library_no_chapter_dir(tmp_path: Path, cache_path: Path) -> None:
+    with pytest.raises(FileNotFoundError, match="does not contain any chapter folder"):
+        probe_library(tmp_path, cache_path=cache_path)
+
+
+def test_probe_library_empty_chapter_dir(tmp_path: Path, cache_path: Path) -> None:
+    make_tracks(tmp_path, "Acoustic")
+
+    with pytest.raises(FileNotFoundError, match="with a recognizable file format."):
+        probe_library(tmp_path, cache_path=cache_path)
+    assert not cache_path.exists()
 
 
 @pytest.mark.parametrize(
-    ("file_name", "expected_scheme"),
-    [
-        ("BK track.mp3", NamingScheme.LOGICAL),
-        ("track BK.mp3", NamingScheme.DEFAULT),
-    ],
+    "file_extension",
+    [".txt", ".flac", ".ogg"],
 )
-def test_infer_naming_scheme(
+def test_probe_library_invalid_extension(
     tmp_path: Path,
-    file_name: str,
-    expected_scheme: NamingScheme,
+    cache_path: Path,
+    file_extension: str,
 ) -> None:
-    acoustic_dir = tmp_path / "Acoustic"
-    acoustic_dir.mkdir()
-    (acoustic_dir / file_name).touch()
+    make_tracks(tmp_path, "Acoustic", f"track{file_extension}")
 
-    assert infer_naming_scheme(tmp_path) == expected_scheme
-
-
-def test_infer_naming_scheme_no_acoustic_dir(tmp_path: Path) -> None:
-    with pytest.raises(
-        FileNotFoundError,
-        match="does not contain an 'Acoustic' subdirectory",
-    ):
-        infer_naming_scheme(tmp_path)
+    with pytest.raises(ValueError, match=f"Unsupported file format: {file_extension}"):
+        probe_library(tmp_path, cache_path=cache_path)
 
 
-def test_infer_naming_scheme_empty_acoustic_dir(tmp_path: Path) -> None:
-    acoustic_dir = tmp_path / "Acoustic"
-    acoustic_dir.mkdir()
+def test_probe_library_unrecognizable_name(tmp_path: Path, cache_path: Path) -> None:
+    make_tracks(tmp_path, "Acoustic", "track.wav")
 
     with pytest.raises(FileNotFoundError, match="with a recognizable name."):
-        infer_naming_scheme(tmp_path)
+        probe_library(tmp_path, cache_path=cache_path)